@@ -1,8 +1,9 @@
 import streamlit as st
 import re
 import os
-from utils.content_processor import process_input
-from utils.export_utils import create_export_section
+import time
+from utils.jobs import submit_job, get_job, get_job_result, cancel_job, start_workers, DONE, QUEUED, RUNNING
+from utils.export_utils import create_export_section, create_course_export_section
 import json
 
 # Set custom theme and styling
@@ -199,6 +200,19 @@ if 'show_answers' not in st.session_state:
     st.session_state.show_answers = {}
 if 'personal_insights' not in st.session_state:
     st.session_state.personal_insights = None
+# Parsed resume/LinkedIn texts by upload hash, kept across study kits
+if 'profile_text_cache' not in st.session_state:
+    st.session_state.profile_text_cache = {}
+# Id of the background job generating the study kit; also kept in the URL,
+# so a reloaded or reconnected tab attaches to the job again
+if 'active_job' not in st.session_state:
+    st.session_state.active_job = st.query_params.get("job")
+
+# Study kits are generated by background workers, outside the script run
+start_workers()
+
+# Seconds between refreshes of the job progress panel
+JOB_POLL_SECONDS = 1.5
 
 def reset_app():
     """Reset the app to its initial state"""
@@ -208,14 +222,320 @@ def reset_app():
     st.session_state.error = None
     st.session_state.show_answers = {}
     st.session_state.personal_insights = None
+    set_active_job(None)
     st.rerun()
 
+def set_active_job(job_id):
+    """Attach the session (and its URL) to a background job, or detach it with None."""
+    st.session_state.active_job = job_id
+    if job_id:
+        st.query_params["job"] = job_id
+    else:
+        st.query_params.pop("job", None)
+
+def start_job(input_type, input_content, selection=None):
+    """Queue the generation of a study kit and show its progress."""
+    submitted = submit_job(input_type, input_content, selection=selection)
+    if submitted["success"]:
+        st.session_state.error = None
+        set_active_job(submitted["job_id"])
+        st.rerun()
+    else:
+        st.session_state.error = submitted["error"]
+        st.error(f"Error: {submitted['error']}")
+
+def cancel_active_job():
+    cancel_job(st.session_state.active_job)
+
+# Panels rerun on their own when their widgets change, instead of the whole script
+# (st.fragment from Streamlit 1.37, st.experimental_fragment from 1.33)
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda function: function)
+
+def rerun_fragment():
+    """Rerun only the current fragment where supported, otherwise the whole app."""
+    if hasattr(st, "fragment"):
+        st.rerun(scope="fragment")
+    st.rerun()
+
+def polling_fragment(function):
+    """Rerun a panel every JOB_POLL_SECONDS while it is shown (by rerunning the whole app without fragments)."""
+    streamlit_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+    if streamlit_fragment is not None:
+        return streamlit_fragment(run_every=JOB_POLL_SECONDS)(function)
+
+    def poll(*args, **kwargs):
+        function(*args, **kwargs)
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+    return poll
+
+def toggle_answer(card_index):
+    """Show or hide the answer of a flashcard."""
+    st.session_state.show_answers[card_index] = not st.session_state.show_answers.get(card_index, False)
+
+def submit_quiz(quiz):
+    """Record the selected quiz answers and the score."""
+    st.session_state.quiz_answers = {i: st.session_state.get(f"q_{i}") for i in range(len(quiz))}
+    st.session_state.quiz_score = sum(
+        1 for i, question in enumerate(quiz)
+        if isinstance(question, dict) and "correct_answer" in question
+        and st.session_state.quiz_answers.get(i) == question["correct_answer"]
+    )
+    st.session_state.quiz_submitted = True
+
+def retake_quiz():
+    """Clear the quiz answers and score."""
+    st.session_state.quiz_submitted = False
+    st.session_state.quiz_answers = {}
+    st.session_state.quiz_score = 0
+
+def reset_insights():
+    """Clear the generated personalized insights."""
+    st.session_state.personal_insights = None
+
+@fragment
+def render_flashcards(flashcards):
+    """Render the flashcards; revealing an answer only reruns this fragment."""
+    for i, card in enumerate(flashcards):
+        # Initialize show_answers state for this card if not present
+        if i not in st.session_state.show_answers:
+            st.session_state.show_answers[i] = False
+
+        if isinstance(card, dict) and "question" in card and "answer" in card:
+            question = card["question"]
+            answer = card["answer"]
+
+            col1, col2 = st.columns([5, 1])
+            with col1:
+                st.markdown(f'<div class="flashcard-q"><strong>Q:</strong> {question}</div>', unsafe_allow_html=True)
+
+                if st.session_state.show_answers[i]:
+                    st.markdown(f'<div class="flashcard-a"><strong>A:</strong> {answer}</div>', unsafe_allow_html=True)
+
+            with col2:
+                st.button("Reveal" if not st.session_state.show_answers[i] else "Hide", key=f"fc_{i}",
+                          on_click=toggle_answer, args=(i,))
+
+@fragment
+def render_quiz(quiz):
+    """Render the practice quiz and its results; submitting or retaking only reruns this fragment."""
+    # Initialize session state for quiz scores if not present
+    if 'quiz_submitted' not in st.session_state:
+        st.session_state.quiz_submitted = False
+    if 'quiz_answers' not in st.session_state:
+        st.session_state.quiz_answers = {}
+    if 'quiz_score' not in st.session_state:
+        st.session_state.quiz_score = 0
+
+    # Show quiz questions
+    if not st.session_state.quiz_submitted:
+        with st.form(key="quiz_form"):
+            valid_questions = 0
+
+            for i, question in enumerate(quiz):
+                # Verify question has required fields
+                if not isinstance(question, dict) or "question" not in question or "options" not in question:
+                    continue
+
+                # Verify options is a dictionary
+                options = question.get("options", {})
+                if not isinstance(options, dict) or len(options) < 2:
+                    continue
+
+                valid_questions += 1
+                st.markdown(f"**Question {valid_questions}:** {question['question']}")
+
+                st.radio(
+                    f"Select your answer for question {valid_questions}:",
+                    options.keys(),
+                    format_func=lambda x: f"{x}: {options[x]}",
+                    key=f"q_{i}",
+                    index=None  # No default selection
+                )
+                st.write("---")
+
+            # Only show submit if we have valid questions
+            if valid_questions > 0:
+                st.form_submit_button("Submit Quiz", on_click=submit_quiz, args=(quiz,))
+            else:
+                st.info("No valid quiz questions available.")
+
+    # Show quiz results
+    else:
+        valid_questions = sum(1 for q in quiz if isinstance(q, dict) and "question" in q and "options" in q)
+        st.subheader(f"Your Score: {st.session_state.quiz_score}/{valid_questions}")
+
+        for i, question in enumerate(quiz):
+            # Skip invalid questions
+            if not isinstance(question, dict) or "question" not in question or "options" not in question:
+                continue
+
+            user_answer = st.session_state.quiz_answers.get(i)
+            correct_answer = question.get("correct_answer", "")
+
+            st.markdown(f"**Question {i+1}:** {question['question']}")
+            options = question.get("options", {})
+
+            for opt, text in options.items():
+                if opt == correct_answer:
+                    st.success(f"✓ {opt}: {text} (Correct Answer)")
+                elif opt == user_answer:
+                    st.error(f"✗ {opt}: {text} (Your Answer)")
+                else:
+                    st.write(f"{opt}: {text}")
+
+            st.info(f"**Explanation:** {question.get('explanation', 'No explanation provided.')}")
+            st.write("---")
+
+        st.button("Retake Quiz", on_click=retake_quiz)
+
+@fragment
+def render_personal_insights(results):
+    """Render the personalized insights panel; its buttons only rerun this fragment."""
+    # Check if we already have generated insights
+    if st.session_state.personal_insights:
+        try:
+            if isinstance(st.session_state.personal_insights, dict):
+                # Try to safely access the insights
+                if "insights" in st.session_state.personal_insights and st.session_state.personal_insights["insights"]:
+                    insights = st.session_state.personal_insights["insights"]
+
+                    st.write("Here are personalized insights based on your professional profile:")
+
+                    # Local skill-to-topic match, computed without a model call
+                    relevance = st.session_state.personal_insights.get("relevance")
+                    if relevance:
+                        if relevance["matched_topics"]:
+                            st.caption(f"Profile match: {relevance['score']:.0%} of this kit's key topics relate to your skills "
+                                       f"({', '.join(relevance['matched_topics'])})")
+                        else:
+                            st.caption("Profile match: none of this kit's key topics appear among your listed skills")
+
+                    # Check that all sections exist
+                    if isinstance(insights, dict):
+                        st.markdown('<div class="insight-container">', unsafe_allow_html=True)
+
+                        st.markdown('<div class="insight-section">' +
+                                     '<h4>🔄 Relevance to Your Background</h4>' +
+                                     f'<p>{insights.get("relevance", "No relevance information available.")}</p>' +
+                                     '</div>', unsafe_allow_html=True)
+
+                        st.markdown('<div class="insight-section">' +
+                                     '<h4>🎯 Alignment with Your Skills</h4>' +
+                                     f'<p>{insights.get("alignment", "No alignment information available.")}</p>' +
+                                     '</div>', unsafe_allow_html=True)
+
+                        st.markdown('<div class="insight-section">' +
+                                     '<h4>📈 Areas for Growth</h4>' +
+                                     f'<p>{insights.get("growth_areas", "No growth areas information available.")}</p>' +
+                                     '</div>', unsafe_allow_html=True)
+
+                        st.markdown('<div class="insight-section">' +
+                                     '<h4>💡 Practical Applications</h4>' +
+                                     f'<p>{insights.get("applications", "No applications information available.")}</p>' +
+                                     '</div>', unsafe_allow_html=True)
+
+                        st.markdown('<div class="insight-section">' +
+                                     '<h4>🛤️ Personalized Learning Path</h4>' +
+                                     f'<p>{insights.get("learning_path", "No learning path information available.")}</p>' +
+                                     '</div>', unsafe_allow_html=True)
+
+                        st.markdown('</div>', unsafe_allow_html=True)
+                    else:
+                        st.error("Invalid format for insights data.")
+                else:
+                    st.error("No insights data found in the generated results.")
+
+            st.button("Reset Personalized Insights", key="reset_insights", on_click=reset_insights)
+
+        except Exception as e:
+            st.error(f"Error displaying personal insights: {str(e)}")
+            st.button("Reset Personalized Insights", key="reset_error", on_click=reset_insights)
+    else:
+        # Show form to upload profile data
+        st.write("Upload your resume and/or LinkedIn profile to receive personalized insights about how this topic relates to your background and career path.")
+
+        resume_col, linkedin_file_col, linkedin_url_col = st.columns([1, 1, 1])
+
+        with resume_col:
+            resume_file = st.file_uploader("Upload your resume (PDF/DOCX):", type=["pdf", "docx"], key="resume_upload")
+
+        with linkedin_file_col:
+            linkedin_file = st.file_uploader("Upload LinkedIn profile (PDF/DOCX/TXT):", type=["pdf", "docx", "txt"], key="linkedin_upload")
+
+        with linkedin_url_col:
+            linkedin_url = st.text_input("Or paste LinkedIn profile URL:", placeholder="https://www.linkedin.com/in/yourusername", key="linkedin_url")
+            if linkedin_url and not linkedin_file:
+                linkedin_file = linkedin_url  # Pass the URL as a string instead of a file object
+
+        if st.button("Generate Personalized Insights", key="generate_insights"):
+            if resume_file is None and linkedin_file is None and linkedin_url == "":
+                st.warning("Please upload at least one file (resume or LinkedIn profile) or provide a LinkedIn URL.")
+            else:
+                with st.spinner("Analyzing your profile and generating personalized insights..."):
+                    # Get the study content from the results, with safe access
+                    study_content = ""
+                    if results and "transcript" in results and results["transcript"]:
+                        study_content = results["transcript"]
+
+                    # Generate personalized insights
+                    insights_result = process_profile_data(resume_file, linkedin_file, study_content,
+                                                           text_cache=st.session_state.profile_text_cache)
+
+                    if insights_result["success"]:
+                        st.session_state.personal_insights = insights_result
+                        st.success("Personalized insights generated!")
+                        rerun_fragment()
+                    else:
+                        st.error(f"Error generating personalized insights: {insights_result['error']}")
+
+
+@polling_fragment
+def render_job_progress(job_id):
+    job = get_job(job_id)
+    if job is None:
+        set_active_job(None)
+        st.rerun()
+
+    if job["status"] == DONE:
+        loaded = get_job_result(job_id)
+        if loaded["success"]:
+            st.session_state.results = loaded["results"]
+            st.session_state.processing_complete = True
+        else:
+            st.session_state.error = loaded["error"]
+        set_active_job(None)
+        st.rerun()
+    elif job["status"] not in (QUEUED, RUNNING):
+        # Failed or cancelled
+        st.session_state.error = job["error"]
+        set_active_job(None)
+        st.rerun()
+
+    st.subheader("Generating Your Study Kit")
+    if job["status"] == QUEUED:
+        ahead = f" ({job['position']} ahead of yours)" if job["position"] else ""
+        st.progress(0.0, text=f"Waiting for a free worker{ahead}...")
+    else:
+        st.progress(min(max(job["progress"], 0.0), 1.0), text=f"{job['message']}...")
+        st.caption(f"Running for {time.time() - job['started_at']:.0f} s. "
+                   "You can reload the page; the study kit keeps generating.")
+    st.button("Cancel", key="cancel_job", on_click=cancel_active_job)
+
+
 # Header section
 st.markdown('<h1 class="main-header">🎓 AI Study Assistant</h1>', unsafe_allow_html=True)
 st.markdown('<p style="text-align: center; font-size: 1.2rem; margin-bottom: 2rem;">Turn any lecture or topic into a complete learning kit in minutes.</p>', unsafe_allow_html=True)
 
 # Main content
-if not st.session_state.processing_complete:
+if st.session_state.active_job and not st.session_state.processing_complete:
+    render_job_progress(st.session_state.active_job)
+
+elif not st.session_state.processing_complete:
+    # The last job's error, if it failed
+    if st.session_state.error:
+        st.error(f"Error: {st.session_state.error}")
+    
     # Input options
     st.subheader("Choose Your Input Method")
     
@@ -227,16 +547,7 @@ if not st.session_state.processing_complete:
         text_submit = st.button("Generate Study Kit", key="text_submit")
         
         if text_submit and text_input.strip():
-            st.session_state.processing = True
-            with st.spinner("Processing your text..."):
-                results = process_input("text", text_input)
-                if results["success"]:
-                    st.session_state.results = results
-                    st.session_state.processing_complete = True
-                    st.rerun()
-                else:
-                    st.session_state.error = results["error"]
-                    st.error(f"Error: {results['error']}")
+            start_job("text", text_input)
         elif text_submit:
             st.warning("Please enter some text first.")
     
@@ -246,16 +557,7 @@ if not st.session_state.processing_complete:
         
         if youtube_submit and youtube_url.strip():
             if is_youtube_url(youtube_url):
-                st.session_state.processing = True
-                with st.spinner("Processing YouTube video..."):
-                    results = process_input("youtube", youtube_url)
-                    if results["success"]:
-                        st.session_state.results = results
-                        st.session_state.processing_complete = True
-                        st.rerun()
-                    else:
-                        st.session_state.error = results["error"]
-                        st.error(f"Error: {results['error']}")
+                start_job("youtube", youtube_url)
             else:
                 st.warning("Please enter a valid YouTube URL.")
         elif youtube_submit:
@@ -266,16 +568,7 @@ if not st.session_state.processing_complete:
         audio_submit = st.button("Generate Study Kit", key="audio_submit")
         
         if audio_submit and uploaded_file is not None:
-            st.session_state.processing = True
-            with st.spinner("Transcribing and processing audio..."):
-                results = process_input("audio", uploaded_file)
-                if results["success"]:
-                    st.session_state.results = results
-                    st.session_state.processing_complete = True
-                    st.rerun()
-                else:
-                    st.session_state.error = results["error"]
-                    st.error(f"Error: {results['error']}")
+            start_job("audio", uploaded_file)
         elif audio_submit:
             st.warning("Please upload an audio file first.")
             
@@ -294,7 +587,7 @@ if not st.session_state.processing_complete:
         # Set the file types based on the user's selection
         if "Document" in file_type_choice:
             allowed_types = ["pdf", "docx", "pptx"]
-            upload_label = "Upload document files:"
+            upload_label = "Upload document files (select several to combine them):"
         elif "Video" in file_type_choice:
             allowed_types = ["mp4", "mov", "avi", "mkv"]
             upload_label = "Upload video file (will extract audio):"
@@ -305,39 +598,37 @@ if not st.session_state.processing_complete:
             allowed_types = ["zip"]
             upload_label = "Upload ZIP archive (containing multiple files):"
         
-        uploaded_file = st.file_uploader(upload_label, type=allowed_types)
+        uploaded_files = st.file_uploader(upload_label, type=allowed_types, accept_multiple_files=True)
+        
+        # Optional page/slide selection for large documents
+        selection = None
+        if "Document" in file_type_choice:
+            with st.expander("Only use part of the document (optional)"):
+                page_range = st.text_input(
+                    "Pages or slides:",
+                    placeholder="e.g. 3-5, 8",
+                    help="Only these pages (PDF) or slides (PPTX) are extracted. Applies to single-file uploads."
+                )
+                outline_sections = st.text_input(
+                    "PDF sections (bookmarks):",
+                    placeholder="e.g. Chapter 3, Chapter 4",
+                    help="Comma-separated bookmark titles from the PDF outline."
+                )
+            if page_range.strip() or outline_sections.strip():
+                selection = {"pages": page_range.strip(), "sections": outline_sections}
         
         file_submit = st.button("Generate Study Kit", key="file_submit")
         
-        if file_submit and uploaded_file is not None:
-            st.session_state.processing = True
-            
-            # Determine file extension
-            file_extension = uploaded_file.name.split('.')[-1].lower()
-            
-            with st.spinner(f"Processing {file_extension.upper()} file..."):
-                # Process file with appropriate message
-                if file_extension == "zip":
-                    status_message = "Extracting and processing files from ZIP archive..."
-                elif file_extension in ["mp4", "mov", "avi", "mkv"]:
-                    status_message = "Extracting audio from video and transcribing..."
-                elif file_extension in ["docx", "pptx", "pdf"]:
-                    status_message = f"Extracting text from {file_extension.upper()} document..."
-                else:
-                    status_message = f"Processing {file_extension.upper()} file..."
-                
-                st.info(status_message)
-                results = process_input("file", uploaded_file)
-                
-                if results["success"]:
-                    st.session_state.results = results
-                    st.session_state.processing_complete = True
-                    st.rerun()
-                else:
-                    st.session_state.error = results["error"]
-                    st.error(f"Error: {results['error']}")
+        if file_submit and uploaded_files:
+            if len(uploaded_files) > 1:
+                start_job("files", uploaded_files)
+            else:
+                start_job("file", uploaded_files[0], selection=selection)
         elif file_submit:
             st.warning("Please upload a file first.")
+    
+    # Bulk export of saved study kits, e.g. a whole course
+    create_course_export_section()
 
 else:
     # Display results
@@ -347,6 +638,10 @@ else:
     if st.button("Start Over", key="reset_top"):
         reset_app()
     
+    # Files from a multi-file upload that could not be processed
+    for file_error in (results or {}).get("file_errors", []):
+        st.warning(f"Skipped {file_error}")
+    
     # Section 1: Key Concepts Summary
     st.markdown('<h2 class="section-header">🧠 Key Concepts Summary</h2>', unsafe_allow_html=True)
     try:
@@ -406,26 +701,7 @@ else:
             # Flashcards
             if study_guide and "flashcards" in study_guide and study_guide["flashcards"]:
                 st.subheader("Flashcards")
-                for i, card in enumerate(study_guide["flashcards"]):
-                    # Initialize show_answers state for this card if not present
-                    if i not in st.session_state.show_answers:
-                        st.session_state.show_answers[i] = False
-                    
-                    if isinstance(card, dict) and "question" in card and "answer" in card:
-                        question = card["question"]
-                        answer = card["answer"]
-                        
-                        col1, col2 = st.columns([5, 1])
-                        with col1:
-                            st.markdown(f'<div class="flashcard-q"><strong>Q:</strong> {question}</div>', unsafe_allow_html=True)
-                            
-                            if st.session_state.show_answers[i]:
-                                st.markdown(f'<div class="flashcard-a"><strong>A:</strong> {answer}</div>', unsafe_allow_html=True)
-                        
-                        with col2:
-                            if st.button("Reveal" if not st.session_state.show_answers[i] else "Hide", key=f"fc_{i}"):
-                                st.session_state.show_answers[i] = not st.session_state.show_answers[i]
-                                st.rerun()
+                render_flashcards(study_guide["flashcards"])
             
             if (not study_guide or 
                 "key_terms" not in study_guide or 
@@ -449,92 +725,7 @@ else:
             
             # Verify we have quiz questions
             if quiz and isinstance(quiz, list) and len(quiz) > 0:
-                # Initialize session state for quiz scores if not present
-                if 'quiz_submitted' not in st.session_state:
-                    st.session_state.quiz_submitted = False
-                if 'quiz_answers' not in st.session_state:
-                    st.session_state.quiz_answers = {}
-                if 'quiz_score' not in st.session_state:
-                    st.session_state.quiz_score = 0
-                
-                # Show quiz questions
-                if not st.session_state.quiz_submitted:
-                    with st.form(key="quiz_form"):
-                        valid_questions = 0
-                        
-                        for i, question in enumerate(quiz):
-                            # Verify question has required fields
-                            if not isinstance(question, dict) or "question" not in question or "options" not in question:
-                                continue
-                                
-                            # Verify options is a dictionary
-                            options = question.get("options", {})
-                            if not isinstance(options, dict) or len(options) < 2:
-                                continue
-                                
-                            valid_questions += 1
-                            st.markdown(f"**Question {valid_questions}:** {question['question']}")
-                            
-                            st.session_state.quiz_answers[i] = st.radio(
-                                f"Select your answer for question {valid_questions}:",
-                                options.keys(),
-                                format_func=lambda x: f"{x}: {options[x]}",
-                                key=f"q_{i}",
-                                index=None  # No default selection
-                            )
-                            st.write("---")
-                        
-                        # Only show submit if we have valid questions
-                        if valid_questions > 0:
-                            submit_quiz = st.form_submit_button("Submit Quiz")
-                            
-                            if submit_quiz:
-                                # Calculate score
-                                correct_count = 0
-                                for i, question in enumerate(quiz):
-                                    if (isinstance(question, dict) and 
-                                        "correct_answer" in question and 
-                                        st.session_state.quiz_answers.get(i) == question["correct_answer"]):
-                                        correct_count += 1
-                                
-                                st.session_state.quiz_score = correct_count
-                                st.session_state.quiz_submitted = True
-                                st.rerun()
-                        else:
-                            st.info("No valid quiz questions available.")
-                
-                # Show quiz results
-                else:
-                    valid_questions = sum(1 for q in quiz if isinstance(q, dict) and "question" in q and "options" in q)
-                    st.subheader(f"Your Score: {st.session_state.quiz_score}/{valid_questions}")
-                    
-                    for i, question in enumerate(quiz):
-                        # Skip invalid questions
-                        if not isinstance(question, dict) or "question" not in question or "options" not in question:
-                            continue
-                            
-                        user_answer = st.session_state.quiz_answers.get(i)
-                        correct_answer = question.get("correct_answer", "")
-                        
-                        st.markdown(f"**Question {i+1}:** {question['question']}")
-                        options = question.get("options", {})
-                        
-                        for opt, text in options.items():
-                            if opt == correct_answer:
-                                st.success(f"✓ {opt}: {text} (Correct Answer)")
-                            elif opt == user_answer:
-                                st.error(f"✗ {opt}: {text} (Your Answer)")
-                            else:
-                                st.write(f"{opt}: {text}")
-                        
-                        st.info(f"**Explanation:** {question.get('explanation', 'No explanation provided.')}")
-                        st.write("---")
-                    
-                    if st.button("Retake Quiz"):
-                        st.session_state.quiz_submitted = False
-                        st.session_state.quiz_answers = {}
-                        st.session_state.quiz_score = 0
-                        st.rerun()
+                render_quiz(quiz)
             else:
                 st.info("No quiz questions available.")
         else:
@@ -607,96 +798,7 @@ else:
     # Section 6: Personalized Insights
     st.markdown('<h2 class="section-header">👤 Personalized Insights (Optional)</h2>', unsafe_allow_html=True)
     
-    # Check if we already have generated insights
-    if st.session_state.personal_insights:
-        try:
-            if isinstance(st.session_state.personal_insights, dict):
-                # Try to safely access the insights
-                if "insights" in st.session_state.personal_insights and st.session_state.personal_insights["insights"]:
-                    insights = st.session_state.personal_insights["insights"]
-                    
-                    st.write("Here are personalized insights based on your professional profile:")
-                    
-                    # Check that all sections exist
-                    if isinstance(insights, dict):
-                        st.markdown('<div class="insight-container">', unsafe_allow_html=True)
-                        
-                        st.markdown('<div class="insight-section">' +
-                                     '<h4>🔄 Relevance to Your Background</h4>' +
-                                     f'<p>{insights.get("relevance", "No relevance information available.")}</p>' +
-                                     '</div>', unsafe_allow_html=True)
-                        
-                        st.markdown('<div class="insight-section">' +
-                                     '<h4>🎯 Alignment with Your Skills</h4>' +
-                                     f'<p>{insights.get("alignment", "No alignment information available.")}</p>' +
-                                     '</div>', unsafe_allow_html=True)
-                            
-                        st.markdown('<div class="insight-section">' +
-                                     '<h4>📈 Areas for Growth</h4>' +
-                                     f'<p>{insights.get("growth_areas", "No growth areas information available.")}</p>' +
-                                     '</div>', unsafe_allow_html=True)
-                            
-                        st.markdown('<div class="insight-section">' +
-                                     '<h4>💡 Practical Applications</h4>' +
-                                     f'<p>{insights.get("applications", "No applications information available.")}</p>' +
-                                     '</div>', unsafe_allow_html=True)
-                            
-                        st.markdown('<div class="insight-section">' +
-                                     '<h4>🛤️ Personalized Learning Path</h4>' +
-                                     f'<p>{insights.get("learning_path", "No learning path information available.")}</p>' +
-                                     '</div>', unsafe_allow_html=True)
-                                     
-                        st.markdown('</div>', unsafe_allow_html=True)
-                    else:
-                        st.error("Invalid format for insights data.")
-                else:
-                    st.error("No insights data found in the generated results.")
-                    
-            if st.button("Reset Personalized Insights", key="reset_insights"):
-                st.session_state.personal_insights = None
-                st.rerun()
-                
-        except Exception as e:
-            st.error(f"Error displaying personal insights: {str(e)}")
-            if st.button("Reset Personalized Insights", key="reset_error"):
-                st.session_state.personal_insights = None
-                st.rerun()
-    else:
-        # Show form to upload profile data
-        st.write("Upload your resume and/or LinkedIn profile to receive personalized insights about how this topic relates to your background and career path.")
-        
-        resume_col, linkedin_file_col, linkedin_url_col = st.columns([1, 1, 1])
-        
-        with resume_col:
-            resume_file = st.file_uploader("Upload your resume (PDF/DOCX):", type=["pdf", "docx"], key="resume_upload")
-        
-        with linkedin_file_col:
-            linkedin_file = st.file_uploader("Upload LinkedIn profile (PDF/DOCX/TXT):", type=["pdf", "docx", "txt"], key="linkedin_upload")
-        
-        with linkedin_url_col:
-            linkedin_url = st.text_input("Or paste LinkedIn profile URL:", placeholder="https://www.linkedin.com/in/yourusername", key="linkedin_url")
-            if linkedin_url and not linkedin_file:
-                linkedin_file = linkedin_url  # Pass the URL as a string instead of a file object
-        
-        if st.button("Generate Personalized Insights", key="generate_insights"):
-            if resume_file is None and linkedin_file is None and linkedin_url == "":
-                st.warning("Please upload at least one file (resume or LinkedIn profile) or provide a LinkedIn URL.")
-            else:
-                with st.spinner("Analyzing your profile and generating personalized insights..."):
-                    # Get the study content from the results, with safe access
-                    study_content = ""
-                    if results and "transcript" in results and results["transcript"]:
-                        study_content = results["transcript"]
-                    
-                    # Generate personalized insights
-                    insights_result = process_profile_data(resume_file, linkedin_file, study_content)
-                    
-                    if insights_result["success"]:
-                        st.session_state.personal_insights = insights_result
-                        st.success("Personalized insights generated!")
-                        st.rerun()
-                    else:
-                        st.error(f"Error generating personalized insights: {insights_result['error']}")
+    render_personal_insights(results)
     
     # Add export functionality
     if results:
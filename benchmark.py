@@ -0,0 +1,435 @@
+"""
+Benchmarks for the AI Study Assistant
+
+This script measures the performance characteristics of the processing
+pipeline so regressions can be spotted before they reach users.
+
+Usage:
+    python benchmark.py coldstart
+    python benchmark.py dedup
+    python benchmark.py keyphrases
+    python benchmark.py kitstore
+    python benchmark.py notebooks
+    python benchmark.py pipeline
+    python benchmark.py all
+"""
+
+import argparse
+import random
+import subprocess
+import sys
+import time
+
+# Heavy third-party modules that should only be imported when actually needed
+HEAVY_MODULES = ["nbformat", "pptx", "docx", "PyPDF2", "moviepy", "nltk"]
+
+def _time_import(module_name, repeats=3):
+    """Import a module in a fresh interpreter and return (best seconds, heavy modules loaded)."""
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module_name}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(elapsed)\n"
+        "print(','.join(heavy) or '-')\n"
+    )
+    best = None
+    heavy = []
+    for _ in range(repeats):
+        completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if completed.returncode != 0:
+            last_line = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "unknown error"
+            return None, last_line
+        lines = completed.stdout.strip().splitlines()
+        elapsed = float(lines[-2])
+        heavy = [m for m in lines[-1].split(",") if m and m != "-"]
+        best = elapsed if best is None else min(best, elapsed)
+    return best, heavy
+
+def benchmark_coldstart():
+    """Measure cold-start import time of the modules on the app.py import chain."""
+    print("Cold-start import times (best of 3, fresh interpreter each run)")
+    print()
+    for module_name in ["utils.file_processor", "utils.content_processor"] + HEAVY_MODULES:
+        elapsed, detail = _time_import(module_name)
+        if elapsed is None:
+            print(f"{module_name:<28} unavailable ({detail})")
+        else:
+            loaded = ", ".join(detail) if detail else "none"
+            print(f"{module_name:<28} {elapsed * 1000:8.1f} ms   heavy modules loaded: {loaded}")
+
+# Vocabulary for synthetic lecture transcripts
+CONCEPTS = [
+    "k-means clustering", "hierarchical clustering", "euclidean distance", "cluster centers",
+    "unsupervised learning", "density-based methods", "elbow method", "silhouette score",
+    "gradient descent", "decision boundary", "feature scaling", "principal components",
+]
+FILLER = [
+    "the", "model", "uses", "a", "of", "and", "data", "points", "to", "is", "each", "we",
+    "compute", "between", "in", "with", "groups", "similar", "method", "for", "example",
+]
+
+def synthetic_transcript(n_words, words_per_slide=120, seed=0):
+    """Build a deterministic slide transcript of roughly n_words words."""
+    rng = random.Random(seed)
+    slides = []
+    words = 0
+    while words < n_words:
+        title = rng.choice(CONCEPTS).title()
+        body = []
+        while len(body) < words_per_slide:
+            body.extend(rng.choice(CONCEPTS).split() if rng.random() < 0.15 else [rng.choice(FILLER)])
+            if rng.random() < 0.08:
+                body[-1] += "."
+        slides.append(f"Slide {len(slides) + 1}: {title}\n{' '.join(body)}\n")
+        words += len(body) + 2
+    return "\n".join(slides)
+
+def _best_time(function, repeats=3):
+    """Return the best wall-clock time of several calls."""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def benchmark_keyphrases():
+    """Measure keyphrase/topic extraction time as the transcript grows."""
+    from utils.keyphrases import extract_keyphrases
+
+    print("Keyphrase extraction (best of 3)")
+    print()
+    for n_words in (1_000, 10_000, 100_000):
+        text = synthetic_transcript(n_words)
+        elapsed = _best_time(lambda: extract_keyphrases(text, top_n=5))
+        topics = ", ".join(extract_keyphrases(text, top_n=3))
+        print(f"{n_words:>8} words {elapsed * 1000:9.1f} ms   top topics: {topics}")
+
+def benchmark_summarizer():
+    """Measure TextRank summarization time as the transcript grows."""
+    from utils.summarizer import summarize
+    from utils.text_analysis import TextAnalysis
+    import utils.text_analysis as text_analysis
+
+    print("TextRank summarization (best of 3, analysis not cached)")
+    print()
+    for n_words in (1_000, 10_000, 100_000):
+        text = synthetic_transcript(n_words)
+        sentences = TextAnalysis(text).sentences
+
+        def run():
+            text_analysis._cache.clear()
+            return summarize(text, max_sentences=5)
+
+        elapsed = _best_time(run)
+        print(f"{n_words:>8} words {len(sentences):>6} sentences {elapsed * 1000:9.1f} ms")
+
+def benchmark_static_generators():
+    """Check that the static quiz and study guide scale linearly with the number of slides."""
+    from utils.static_fallbacks import generate_static_quiz, generate_static_study_guide
+    import utils.text_analysis as text_analysis
+
+    print("Static quiz + study guide, including the shared analysis (best of 3)")
+    print()
+    for n_words in (12_000, 120_000, 1_200_000):
+        text = synthetic_transcript(n_words)
+        n_slides = text.count("Slide ")
+
+        def run():
+            text_analysis._cache.clear()
+            generate_static_quiz(text, num_questions=10)
+            generate_static_study_guide(text)
+
+        elapsed = _best_time(run)
+        print(f"{n_slides:>8} slides {elapsed * 1000:9.1f} ms   {elapsed / n_slides * 1e6:7.1f} µs per slide")
+
+# Line fragments for fuzzing the response parser
+RESPONSE_FRAGMENTS = [
+    "KEY TERMS:", "**Important Concepts**", "## Flashcards", "3. FLASHCARDS:", "Questions",
+    "Q:", "A:", "Question 2:", "Answer:", "Correct Answer: B", "Explanation:", "Reason -",
+    "- ", "* ", "• ", "1. ", "12) ", "A) ", "B. ", "(C) ", "d) ", "?", ":", ";", "**", "__",
+    "Clustering", "k-means", "is a method", "What is", "the answer is", "é", "\t", " ", "\n", "\n\n",
+]
+
+# Pathological responses: long runs of the characters the line patterns look for,
+# and entries continued over many lines, as (start, repeated unit)
+PATHOLOGICAL_RESPONSES = {
+    "numbers": ("", "1. "),
+    "colons": ("", ":"),
+    "bold": ("", "**"),
+    "questions": ("", "Q: ?"),
+    "answers": ("", "answer "),
+    "options": ("", "A) "),
+    "term lines": ("", "Term: x\n"),
+    "heading spaces": ("", "Key terms \t*"),
+    "numbered lines": ("", "1.\n"),
+    "long answer": ("Flashcards:\nQ: What is it?\nA: It is\n", "more of the answer\n"),
+    "long definition": ("Key terms:\nTerm: a definition\n", "more of the definition\n"),
+    "long concept": ("Important concepts:\n- A concept\n", "more of the concept\n"),
+    "long question": ("1. What is\n", "more of the question\n"),
+}
+
+def benchmark_response_parser():
+    """Fuzz the free-tier response parser and check that it runs in linear time."""
+    from utils.response_parser import parse_study_guide, parse_quiz
+
+    rng = random.Random(0)
+    for _ in range(5_000):
+        response = "".join(rng.choice(RESPONSE_FRAGMENTS) for _ in range(rng.randint(0, 60)))
+        guide = parse_study_guide(response)
+        quiz = parse_quiz(response, 5)
+        assert set(guide) == {"key_terms", "important_concepts", "flashcards"}
+        assert all("?" in card["question"] and card["answer"] for card in guide["flashcards"])
+        assert len(quiz) <= 5
+        assert all(list(q["options"]) == list("ABCD") and q["correct_answer"] in "ABCD" for q in quiz)
+    print("Fuzzed 5000 random responses: OK")
+    print()
+
+    print("Parse time of pathological responses (best of 3); linear time keeps ns/char flat")
+    print()
+    for name, (start, unit) in PATHOLOGICAL_RESPONSES.items():
+        timings = []
+        for size in (10_000, 100_000, 1_000_000):
+            response = start + unit * (size // len(unit))
+            elapsed = _best_time(lambda: (parse_study_guide(response), parse_quiz(response)))
+            timings.append(elapsed / len(response) * 1e9)
+        print(f"{name:<16} " + "  ".join(f"{t:7.1f} ns/char" for t in timings))
+        # ns/char may wobble with caches and allocation, but must not grow with the size
+        assert timings[-1] < min(timings[:2]) * 1.6 + 20, f"{name}: parse time grows faster than linear"
+
+# The per-field pattern insights were extracted with before the single-pass splitter
+LEGACY_INSIGHT_PATTERN = r".*{marker}.*?([\s\S]+?)(?=\d\.|\Z)"
+INSIGHT_MARKERS = ["relates to the person's background", "align with their skills", "Areas for growth",
+                   "apply this knowledge", "learning path"]
+
+def synthetic_insights_response(n_chars):
+    """Build a five-point insights response of roughly n_chars characters."""
+    filler = "This builds on your analytics experience and your work with stakeholders, "
+    points = [
+        "How this content relates to the person's background", "Aspects that align with their skills",
+        "Areas for growth", "How to apply this knowledge", "Customized learning path",
+    ]
+    body = filler * max(1, n_chars // (len(filler) * len(points)))
+    return "\n\n".join(f"{i}. **{title}**: {body}" for i, title in enumerate(points, 1))
+
+def benchmark_insights():
+    """Compare single-pass insight parsing with the legacy per-field regex on long responses."""
+    import re
+    from utils.personal_insight import parse_insights
+    from utils.response_parser import split_numbered_sections
+
+    print("Insight section extraction (best of 3)")
+    print()
+    for n_chars in (2_000, 20_000, 200_000, 2_000_000):
+        response = synthetic_insights_response(n_chars)
+        elapsed = _best_time(lambda: parse_insights(response))
+        line = f"{len(response):>9} chars  single pass {elapsed * 1000:9.2f} ms"
+        if n_chars <= 20_000:
+            patterns = [re.compile(LEGACY_INSIGHT_PATTERN.format(marker=re.escape(m)), re.IGNORECASE) for m in INSIGHT_MARKERS]
+            legacy = _best_time(lambda: [p.search(response) for p in patterns])
+            line += f"   legacy regex {legacy * 1000:9.2f} ms"
+        print(line)
+    insights = parse_insights(synthetic_insights_response(2_000))
+    assert all(value.startswith("This builds on") for value in insights.values())
+    # Nested lists indented by even one space stay inside their section
+    nested = synthetic_insights_response(2_000).replace("\n\n2. ", "\n 1. First step\n 2. Second step\n\n2. ", 1)
+    sections = split_numbered_sections(nested, len(INSIGHT_MARKERS))
+    assert sections[0].endswith(" 1. First step\n 2. Second step"), sections[0][-60:]
+    assert all(section.startswith("This builds on") for section in sections)
+
+def synthetic_results(n_words, seed=0):
+    """Build a results dict shaped like content_processor.process_input output."""
+    from utils.document_model import ensure_structure
+
+    rng = random.Random(seed)
+    transcript = synthetic_transcript(n_words, seed=seed)
+    return {
+        "success": True,
+        "transcript": transcript,
+        "summary": "\n".join(f"## {c.title()}\n- {c} groups similar data points." for c in CONCEPTS[:7]),
+        "resources": [{"title": f"{c.title()} tutorial", "url": f"https://example.com/{i}", "description": c}
+                      for i, c in enumerate(CONCEPTS[:3])],
+        "study_guide": {
+            "key_terms": [{"term": c.title(), "definition": f"The {c} of the data points."} for c in CONCEPTS],
+            "important_concepts": [f"{c.title()} is used for example with scaled data." for c in CONCEPTS[:5]],
+            "flashcards": [{"question": f"What is {c}?", "answer": f"{c.title()} groups data."} for c in CONCEPTS[:8]],
+        },
+        "quiz": [{"question": f"Which method uses {rng.choice(CONCEPTS)}?",
+                  "options": {letter: rng.choice(CONCEPTS) for letter in "ABCD"},
+                  "correct_answer": rng.choice("ABCD"), "explanation": "See the text for details."}
+                 for _ in range(5)],
+        "detailed_notes": {"notes": [{"topic": c.title(), "definition": c, "key_points": [c] * 3, "examples": []}
+                                     for c in CONCEPTS[:3]]},
+        "structure": ensure_structure(transcript),
+        "dedup_report": {"chars_saved": 0, "tokens_saved": 0},
+        "error": None,
+    }
+
+def benchmark_kit_storage():
+    """Check stored-kit round trips and compare their speed and size with the indented JSON export."""
+    import json
+    from utils.kit_storage import dump_kit, load_kit, HAS_ORJSON, HAS_ZSTD
+
+    # Round trips, with and without compression, and rejected inputs
+    for n_words in (0, 1_000, 20_000):
+        results = synthetic_results(n_words, seed=n_words)
+        expected = json.loads(json.dumps(results))
+        for compress in (True, False):
+            assert load_kit(dump_kit(results, compress=compress)) == expected
+    stored = dump_kit(synthetic_results(1_000))
+    for bad_data in (b"", b"JSON" + stored[4:], stored[:4] + bytes([99]) + stored[5:], stored[:-10]):
+        try:
+            load_kit(bad_data)
+        except ValueError:
+            continue
+        raise AssertionError("a corrupt stored kit was loaded")
+    for bad_results in ({}, {"success": True, "quiz": "not a list"}, {"success": True, "quiz": [{"question": 1}]}):
+        try:
+            dump_kit(bad_results)
+        except ValueError:
+            continue
+        raise AssertionError("a kit violating the schema was saved")
+    print("Round trips and corrupt/invalid kit checks: OK")
+    print(f"orjson: {'yes' if HAS_ORJSON else 'no'}, zstandard: {'yes' if HAS_ZSTD else 'no (zlib)'}")
+    print()
+
+    print("Save/load time and size per kit (best of 3): JSON export (indent=2) vs stored kit")
+    print()
+    for n_words in (1_000, 10_000, 100_000):
+        results = synthetic_results(n_words)
+        exported = json.dumps(results, indent=2)
+        stored = dump_kit(results)
+        json_save = _best_time(lambda: json.dumps(results, indent=2).encode("utf-8"))
+        json_load = _best_time(lambda: json.loads(exported))
+        kit_save = _best_time(lambda: dump_kit(results))
+        kit_load = _best_time(lambda: load_kit(stored))
+        print(f"{n_words:>8} words  JSON {len(exported.encode('utf-8')) / 1024:8.1f} KiB "
+              f"save {json_save * 1000:7.2f} ms load {json_load * 1000:7.2f} ms   "
+              f"kit {len(stored) / 1024:7.1f} KiB save {kit_save * 1000:7.2f} ms load {kit_load * 1000:7.2f} ms")
+
+def numbered_deck(n_slides):
+    """Build a slide deck whose content lines differ only in their numbers, with a running footer."""
+    return "".join(
+        f"Slide {n}:\nTopic {n} heading\nStep {n}: compute the distance between the points\n"
+        f"This is content sentence number {n} about clustering, with results on page {n * 4}.\n"
+        f"CS 101 Machine Learning\nPage {n} of {n_slides}\n\n"
+        for n in range(1, n_slides + 1)
+    )
+
+def benchmark_dedup():
+    """Check that boilerplate removal keeps numbered content lines, and time it as the deck grows."""
+    from utils.deduplication import remove_boilerplate
+
+    print("Boilerplate removal on decks with numbered content and running footers (best of 3)")
+    print()
+    for n_slides in (7, 700, 7_000):
+        text = numbered_deck(n_slides)
+        result = remove_boilerplate(text)
+        for n in (1, 2, n_slides):
+            for line in (f"Topic {n} heading", f"Step {n}: compute", f"sentence number {n} about", f"on page {n * 4}."):
+                assert line in result["text"], f"lost {line!r} of slide {n}"
+        # The course line is kept once and the page footers all match
+        assert result["text"].count("CS 101 Machine Learning") == 1 and result["text"].count(f" of {n_slides}\n") == 1
+        elapsed = _best_time(lambda: remove_boilerplate(text))
+        print(f"{n_slides:>8} slides {elapsed * 1000:9.1f} ms   {result['report']['chars_saved']:>9} chars saved")
+
+def synthetic_notebook(n_cells, log_lines=1000, seed=0):
+    """Build a notebook whose code cells print long training logs and embed a base64 image."""
+    import json
+    rng = random.Random(seed)
+    cells = []
+    for i in range(n_cells):
+        log = [f"epoch {epoch} loss {rng.random():.6f} accuracy {rng.random():.4f}\n" for epoch in range(log_lines)]
+        cells.append({"cell_type": "markdown", "metadata": {}, "source": [f"## Step {i}\n", "Train the model.\n"]})
+        cells.append({
+            "cell_type": "code", "metadata": {}, "execution_count": i, "source": ["model.fit(x, y)\n"],
+            "outputs": [
+                {"output_type": "stream", "name": "stdout", "text": log},
+                {"output_type": "display_data", "metadata": {}, "data": {"image/png": "iVBORw0KGgo" * 5000}},
+                {"output_type": "execute_result", "metadata": {}, "execution_count": i,
+                 "data": {"text/plain": [f"<History {i}>"]}},
+            ],
+        })
+    notebook = {"nbformat": 4, "nbformat_minor": 5, "metadata": {}, "cells": cells}
+    return json.dumps(notebook).encode("utf-8"), cells
+
+def benchmark_notebooks():
+    """Check the omitted-output markers of capped notebook cells, and time extraction as notebooks grow."""
+    import io
+    import re
+    from utils.notebooks import extract_notebook
+
+    print("Notebook extraction with capped cell outputs (best of 3)")
+    print()
+    for n_cells in (1, 10, 100):
+        data, cells = synthetic_notebook(n_cells)
+        result = extract_notebook(io.BytesIO(data))
+        # Each marker counts every character left out of its cell: the kept text plus the
+        # omitted count adds up to all of the cell's output text ("Label:\n", text, "\n" per output)
+        code_sections = result["structure"]["sections"][1::2]
+        assert len(code_sections) == n_cells
+        for section, cell in zip(code_sections, cells[1::2]):
+            block = result["text"][section["content_start"]:section["end"]]
+            outputs = block[block.index("Output:\n"):-1]
+            omitted = re.search(r'\[\.\.\. (\d+) characters of output omitted \.\.\.\]\n', outputs)
+            assert omitted, "long stream output was not capped"
+            full = f"Output:\n{''.join(cell['outputs'][0]['text'])}\nResult:\n{cell['outputs'][2]['data']['text/plain'][0]}\n"
+            head, tail = outputs[:omitted.start()], outputs[omitted.end():]
+            assert full.startswith(head) and full.endswith(tail), "kept output is not the head and tail"
+            assert len(head) + int(omitted.group(1)) + len(tail) == len(full), (omitted.group(0), len(full))
+        report = result["output_report"]
+        assert report["truncated_cells"] == n_cells and report["binary_outputs_skipped"] == n_cells
+        elapsed = _best_time(lambda: extract_notebook(io.BytesIO(data)))
+        print(f"{n_cells:>8} cells {len(data) / 1024:9.0f} KiB {elapsed * 1000:9.1f} ms   "
+              f"kept {report['output_chars_kept']} of {report['output_chars']} output chars")
+
+def benchmark_pipeline():
+    """Run process_input offline (static fallbacks only) and check its progress reports."""
+    import utils.content_processor as content_processor
+
+    # Make every model tier fail, so the run needs no network and times only local work
+    def offline(*args, **kwargs):
+        return {"success": False, "error": "offline benchmark"}
+    for name in list(vars(content_processor)):
+        if name.startswith(("openai_", "free_")) or name == "generate_detailed_notes":
+            setattr(content_processor, name, offline)
+
+    print("process_input on text with static fallbacks")
+    print()
+    for n_words in (2_000, 20_000):
+        text = synthetic_transcript(n_words)
+        updates = []
+        start = time.perf_counter()
+        result = content_processor.process_input("text", text, progress=lambda fraction, message: updates.append((fraction, message)))
+        elapsed = time.perf_counter() - start
+        assert result["success"], result.get("error")
+        fractions = [fraction for fraction, _ in updates]
+        assert fractions == sorted(fractions) and fractions[0] == 0.0 and fractions[-1] == 1.0, updates
+        print(f"{n_words:>8} words {elapsed * 1000:9.1f} ms   {len(updates)} progress updates")
+
+BENCHMARKS = {
+    "coldstart": benchmark_coldstart,
+    "dedup": benchmark_dedup,
+    "keyphrases": benchmark_keyphrases,
+    "kitstore": benchmark_kit_storage,
+    "notebooks": benchmark_notebooks,
+    "insights": benchmark_insights,
+    "parser": benchmark_response_parser,
+    "pipeline": benchmark_pipeline,
+    "static": benchmark_static_generators,
+    "summarizer": benchmark_summarizer,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run AI Study Assistant benchmarks.")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS) + ["all"], help="Benchmark to run")
+    args = parser.parse_args()
+
+    names = sorted(BENCHMARKS) if args.benchmark == "all" else [args.benchmark]
+    for name in names:
+        start = time.perf_counter()
+        BENCHMARKS[name]()
+        print(f"\n[{name}] finished in {time.perf_counter() - start:.2f} s\n")
@@ -14,10 +14,13 @@ def print_requirements():
         "streamlit>=1.30.0",
         "aiohttp>=3.9.1",
         "anthropic>=0.8.0",
+        "av>=10.0.0",
         "faster-whisper>=0.9.0",
+        "ijson>=3.2.0",
         "moviepy>=1.0.3",
         "nbformat>=5.9.2",
         "nltk>=3.8.1",
+        "numpy>=1.26.0",
         "openai>=1.3.0",
         "pypdf2>=3.0.1",
         "python-docx>=1.0.1",
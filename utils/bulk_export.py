@@ -0,0 +1,205 @@
+"""
+Streamed ZIP export of many study kits, e.g. every lecture of a course.
+
+Kits are read one at a time from stored kit files (or JSON exports), and each
+kit's Markdown, JSON and text exports are compressed into a ZIP archive that is
+produced as a stream of byte chunks. Only the kit being exported and the chunk
+being produced are in memory, however many lectures the course has, so the
+archive can be written straight to a file, an HTTP response or a download.
+
+Usage:
+    python -m utils.bulk_export course.zip lectures/ [--format Markdown JSON] [--title "ML 101"]
+"""
+
+import os
+import re
+import json
+import logging
+import argparse
+import zipfile
+from .kit_storage import KIT_MAGIC, KIT_EXTENSION, load_kit
+from .uploads import upload_name, open_upload
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Formats exported for each kit by default (keys of export_utils.EXPORT_FORMATS)
+DEFAULT_FORMATS = ("Markdown", "JSON", "Text")
+
+# Size of the slices an export is compressed in, bounding the size of each yielded chunk
+WRITE_CHUNK_SIZE = 256 * 1024
+
+# Kit sources picked up from directories
+SOURCE_EXTENSIONS = (KIT_EXTENSION, ".json")
+
+# Characters kept in archive folder and file names
+UNSAFE_NAME_PATTERN = re.compile(r'[^\w.-]+')
+
+class _ChunkSink:
+    """Write-only file object collecting what zipfile writes until it is taken."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+def _safe_name(name):
+    """Turn a lecture name into a file-name-safe slug."""
+    return UNSAFE_NAME_PATTERN.sub("_", name).strip("._") or "kit"
+
+def load_kit_source(source):
+    """
+    Load study kit results from a stored kit or a JSON export.
+
+    Args:
+        source: A file path or a file object (e.g. an uploaded file)
+
+    Returns:
+        dict: Dictionary with success status, the kit name and results or error message
+    """
+    name = os.path.splitext(upload_name(source))[0] or "kit"
+    try:
+        with open_upload(source) as stream:
+            data = stream.read()
+        if data.startswith(KIT_MAGIC):
+            results = load_kit(data)
+        else:
+            # A JSON export wraps the results with a title and timestamp
+            exported = json.loads(data)
+            results = exported.get("data", exported) if isinstance(exported, dict) else None
+            if not isinstance(results, dict):
+                raise ValueError("not a study kit JSON export")
+        return {"success": True, "name": name, "results": results}
+    except (ValueError, OSError) as e:
+        logger.error(f"Error loading study kit {name}: {str(e)}")
+        return {"success": False, "name": name, "error": str(e)}
+
+def iter_kit_sources(sources, errors=None):
+    """
+    Load kits lazily, one at a time, skipping sources that cannot be loaded.
+
+    Args:
+        sources (list): File paths, directories (their .kit and .json files) or file objects
+        errors (list): Optional list that "name: error" strings are appended to
+
+    Yields:
+        tuple: (kit name, results)
+    """
+    for source in sources:
+        if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+            paths = sorted(entry.path for entry in os.scandir(source)
+                           if entry.is_file() and entry.name.lower().endswith(SOURCE_EXTENSIONS))
+            yield from iter_kit_sources(paths, errors)
+            continue
+        loaded = load_kit_source(source)
+        if loaded["success"]:
+            yield loaded["name"], loaded["results"]
+        elif errors is not None:
+            errors.append(f"{loaded['name']}: {loaded['error']}")
+
+def iter_course_zip(kits, formats=DEFAULT_FORMATS, title="Course Study Materials", errors=None):
+    """
+    Stream a ZIP archive with the exports of many kits.
+
+    Each kit gets a numbered folder with one file per format, and an index.md
+    listing the kits (and any sources that could not be loaded) ends the archive.
+
+    Args:
+        kits: Iterable of (name, results) pairs, e.g. from iter_kit_sources
+        formats (list): Keys of export_utils.EXPORT_FORMATS
+        title (str): Course title, prefixed to each kit's export title
+        errors (list): Optional load errors to list in the index (filled while kits are read)
+
+    Yields:
+        bytes: Consecutive chunks of the archive
+    """
+    from .export_utils import EXPORT_FORMATS
+
+    sink = _ChunkSink()
+    index = [f"# {title}\n"]
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for number, (name, results) in enumerate(kits, 1):
+            folder = f"{number:03d}-{_safe_name(name)}"
+            for export_format in formats:
+                export_function, _ = EXPORT_FORMATS[export_format]
+                export = export_function(results, f"{title}: {name}")
+                content = export["content"]
+                data = content.encode("utf-8") if isinstance(content, str) else content
+                extension = os.path.splitext(export["filename"])[1]
+                with archive.open(f"{folder}/{_safe_name(name)}{extension}", "w") as entry:
+                    for start in range(0, len(data), WRITE_CHUNK_SIZE):
+                        entry.write(data[start:start + WRITE_CHUNK_SIZE])
+                        if sink.chunks:
+                            yield sink.take()
+                del export, content, data
+            index.append(f"{number}. {name} ({folder}/)")
+            logger.info(f"Exported kit {number}: {name}")
+            if sink.chunks:
+                yield sink.take()
+
+        if errors:
+            index.append("\n## Not exported\n")
+            index.extend(f"- {error}" for error in errors)
+        archive.writestr("index.md", "\n".join(index) + "\n")
+    yield sink.take()
+
+def write_course_zip(sources, path, formats=DEFAULT_FORMATS, title="Course Study Materials"):
+    """
+    Export many kits into a ZIP file, streaming it to disk.
+
+    Args:
+        sources (list): File paths, directories or file objects of stored kits or JSON exports
+        path (str): Destination ZIP file
+        formats (list): Keys of export_utils.EXPORT_FORMATS
+        title (str): Course title
+
+    Returns:
+        dict: Dictionary with success status, number of kits, load errors and archive size, or error message
+    """
+    errors = []
+    kit_count = 0
+
+    def counted(kits):
+        nonlocal kit_count
+        for kit in kits:
+            kit_count += 1
+            yield kit
+
+    try:
+        size = 0
+        with open(path, "wb") as archive_file:
+            for chunk in iter_course_zip(counted(iter_kit_sources(sources, errors)), formats, title, errors):
+                archive_file.write(chunk)
+                size += len(chunk)
+        return {"success": True, "path": path, "kits": kit_count, "errors": errors, "size": size}
+    except (ValueError, OSError) as e:
+        logger.exception(f"Error writing course archive: {str(e)}")
+        return {"success": False, "error": f"Error writing course archive: {str(e)}"}
+
+if __name__ == "__main__":
+    from .export_utils import EXPORT_FORMATS
+
+    parser = argparse.ArgumentParser(description="Export many study kits into one ZIP archive.")
+    parser.add_argument("output", help="ZIP file to write")
+    parser.add_argument("sources", nargs="+", help="Stored kits (.kit), JSON exports or directories containing them")
+    parser.add_argument("--format", nargs="+", default=list(DEFAULT_FORMATS), choices=list(EXPORT_FORMATS),
+                        dest="formats", help="Formats exported for each kit")
+    parser.add_argument("--title", default="Course Study Materials", help="Course title")
+    args = parser.parse_args()
+
+    result = write_course_zip(args.sources, args.output, args.formats, args.title)
+    if not result["success"]:
+        raise SystemExit(result["error"])
+    for error in result["errors"]:
+        print(f"skipped {error}")
+    print(f"Wrote {result['kits']} kits to {result['path']} ({result['size'] / 1024:.1f} KiB)")
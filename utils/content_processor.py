@@ -3,15 +3,19 @@ from .openai_helpers import get_resources as openai_get_resources
 from .openai_helpers import generate_study_guide as openai_generate_study_guide
 from .openai_helpers import generate_quiz as openai_generate_quiz
 from .transcription import get_youtube_transcript, transcribe_audio
-from .file_processor import process_file
+from .file_processor import process_file, process_files
+from .uploads import upload_name, remove_temporary_file
+from .deduplication import remove_boilerplate
+from .document_model import ensure_structure, shift_structure, slide_titles, get_sections, has_slides, merge_documents
 import logging
 import os
 import io
 import re
-import nltk
-from collections import Counter
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize, sent_tokenize
+from .nlp_resources import get_stopwords
+from .keyphrases import extract_keyphrases
+from .term_index import TermIndex
+from .text_analysis import get_analysis
+from .retrieval import prompt_context
 
 # Import free AI helpers as fallbacks
 from .free_ai_helpers import get_summary as free_get_summary
@@ -25,106 +29,36 @@ from .static_fallbacks import get_static_summary, get_static_resources
 from .static_fallbacks import generate_static_study_guide, generate_static_quiz
 from .static_fallbacks import generate_static_topic_notes
 
-# Try to download NLTK resources silently
-try:
-    nltk.download('punkt', quiet=True)
-    nltk.download('stopwords', quiet=True)
-except:
-    # Continue even if download fails
-    pass
-
 # Set up logging
 logger = logging.getLogger(__name__)
 
-def extract_main_topics(text, top_n=3):
+# Maximum number of key terms extracted from slide content
+MAX_KEY_TERMS = 10
+
+def extract_main_topics(text, top_n=3, structure=None):
     """
-    Extract the main topics from a text using NLP techniques.
+    Extract the main topics from a text using statistical keyphrase extraction.
     
     Args:
         text (str): The text to extract topics from
         top_n (int): Number of topics to extract
+        structure (dict): Optional document structure of the text
         
     Returns:
-        str: The main topic as a string
+        str: The top_n main topics, separated by ", "
     """
     try:
-        # Clean the text
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        # Try to find specific topic markers
-        topic_keywords = ["topic:", "subject:", "about:", "focuses on:"]
-        for keyword in topic_keywords:
-            if keyword in text.lower():
-                idx = text.lower().find(keyword) + len(keyword)
-                end_idx = text.find('.', idx)
-                if end_idx > 0:
-                    topic = text[idx:end_idx].strip()
-                    if 3 <= len(topic.split()) <= 10:
-                        return topic
+        structure = ensure_structure(text, structure)
         
-        # Find main topic from slide titles
-        slide_pattern = r'Slide \d+:?\s*([^0-9\n]+?)(?:\d|$)'
-        slide_titles = re.findall(slide_pattern, text)
-        if slide_titles:
-            # Get the most common meaningful slide title
-            filtered_titles = [title.strip() for title in slide_titles 
-                             if len(title.split()) <= 5 and len(title.strip()) > 3]
-            if filtered_titles:
-                return max(set(filtered_titles), key=filtered_titles.count)
-        
-        # Try to find the main subject using frequency analysis
-        try:
-            # Tokenize
-            words = word_tokenize(text.lower())
-            
-            # Filter stop words and short words
-            try:
-                stop_words = set(stopwords.words('english'))
-            except:
-                # Fallback if NLTK data is not available
-                stop_words = {"the", "and", "a", "an", "in", "on", "at", "with", "for", "to", "of", "is", "are"}
-            
-            words = [word for word in words if word not in stop_words and len(word) > 3]
-            
-            # Get the most frequent words
-            word_freq = Counter(words)
-            most_common_words = [word for word, _ in word_freq.most_common(15)]
-            
-            # Look for these words in sentences to extract key phrases
-            sentences = sent_tokenize(text)
-            topic_candidates = []
-            
-            for sent in sentences[:10]:  # Look at first 10 sentences
-                for word in most_common_words:
-                    if word in sent.lower():
-                        topic_candidates.append(sent.strip())
-                        break
-            
-            if topic_candidates:
-                # Return the first good candidate
-                for candidate in topic_candidates:
-                    # Extract a reasonably sized phrase
-                    if 10 <= len(candidate.split()) <= 30:
-                        return ' '.join(candidate.split()[:7])  # First 7 words
-                    elif len(candidate.split()) < 10:
-                        return candidate
-                
-                # If we got here, return the shortest candidate
-                shortest = min(topic_candidates, key=lambda x: len(x.split()))
-                return ' '.join(shortest.split()[:5])  # First 5 words
-        except:
-            # If NLP processing fails, fall back to a simpler approach
-            pass
+        # Phrases that also appear in slide titles are boosted
+        topics = extract_keyphrases(text, top_n, title_text=" | ".join(slide_titles(structure)))
+        if topics:
+            return ", ".join(topics)
         
         # Simple fallback: Extract first 3-5 meaningful words from first sentence
         first_sentence = text.split('.')[0]
         words = first_sentence.split()
-        try:
-            stop_words = set(stopwords.words('english'))
-        except:
-            # Fallback if NLTK data is not available
-            stop_words = {"the", "and", "a", "an", "in", "on", "at", "with", "for", "to", "of", "is", "are"}
+        stop_words = get_stopwords()
         clean_words = [w for w in words if len(w) > 3 and w.lower() not in stop_words][:5]
         
         # If we still have nothing, just return the first few words
@@ -139,58 +73,60 @@ def extract_main_topics(text, top_n=3):
         return ' '.join(text.split()[:5])
 
 # Add functions for extracting information from slide content
-def extract_slide_information(text):
+def extract_slide_information(text, structure=None):
     """
     Extract useful information from slide content.
     
     Args:
         text (str): The text content of slides
+        structure (dict): Optional document structure of the text
         
     Returns:
         dict: Dictionary containing slide titles, key terms, and main topics
     """
     try:
-        # Extract slide titles
-        slide_pattern = r'Slide\s+(\d+):\s*([^\n]+)'
-        slide_matches = re.findall(slide_pattern, text, re.IGNORECASE)
+        structure = ensure_structure(text, structure)
         
+        # Extract slide titles
         slides = []
-        for num, title in slide_matches:
+        for section in get_sections(structure, "slide"):
             slides.append({
-                "number": int(num),
-                "title": title.strip()
+                "number": section["number"],
+                "title": section["title"]
             })
         
         # Sort slides by number
         slides.sort(key=lambda x: x["number"])
         
         # Extract potential key terms (capitalized phrases, bold text)
-        key_terms = []
+        candidate_terms = []
+        seen_terms = set()
         
         # Look for capitalized multi-word phrases that might be important concepts
-        term_matches = re.findall(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})\b', text)
-        for term in term_matches:
-            if len(term) > 5 and term not in [t["term"] for t in key_terms]:
-                key_terms.append({
-                    "term": term,
-                    "context": get_term_context(text, term)
-                })
+        for term in re.findall(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})\b', text):
+            if len(term) > 5 and term not in seen_terms:
+                seen_terms.add(term)
+                candidate_terms.append(term)
         
         # Look for words in **bold** or marked with emphasis
-        bold_matches = re.findall(r'\*\*(.*?)\*\*', text)
-        for term in bold_matches:
-            if term and term not in [t["term"] for t in key_terms]:
-                key_terms.append({
-                    "term": term,
-                    "context": get_term_context(text, term)
-                })
+        for term in re.findall(r'\*\*(.*?)\*\*', text):
+            if term and term not in seen_terms:
+                seen_terms.add(term)
+                candidate_terms.append(term)
+        
+        # Look up contexts only for the terms that are kept, in one shared index
+        term_index = TermIndex(text)
+        key_terms = [
+            {"term": term, "context": term_index.context(term)}
+            for term in candidate_terms[:MAX_KEY_TERMS]
+        ]
         
         # Extract main topics using the extract_main_topics function
-        main_topics = extract_main_topics(text, top_n=5).split(', ')
+        main_topics = extract_main_topics(text, top_n=5, structure=structure).split(', ')
         
         return {
             "slides": slides,
-            "key_terms": key_terms[:10],  # Limit to top 10 terms
+            "key_terms": key_terms,
             "main_topics": main_topics
         }
     except Exception as e:
@@ -206,6 +142,9 @@ def get_term_context(text, term, context_length=100):
     """
     Get the surrounding context for a term in the text.
     
+    For several terms in the same text, build one TermIndex and call its
+    context() method instead.
+    
     Args:
         text (str): The full text
         term (str): The term to find context for
@@ -215,43 +154,36 @@ def get_term_context(text, term, context_length=100):
         str: The context surrounding the term
     """
     try:
-        term_pattern = re.escape(term)
-        match = re.search(f"(.{{0,{context_length}}}{term_pattern}.{{0,{context_length}}})", text, re.IGNORECASE)
-        
-        if match:
-            context = match.group(1)
-            # Highlight the term within the context
-            highlighted = re.sub(f"({term_pattern})", r"**\1**", context, flags=re.IGNORECASE)
-            return highlighted
-        else:
-            return ""
+        return TermIndex(text).context(term, context_length)
     except Exception:
         return ""
 
-# Define fallback wrapper functions that try OpenAI first, then free APIs
-def get_summary(text, max_bullets=7):
+def get_summary(text, max_bullets=7, structure=None):
     """Wrapper that tries OpenAI first, then free AI helper, then static fallback."""
     try:
+        # Prompt with the chunks about the key topics and slide titles
+        context = prompt_context(text, structure)
+        
         # Try OpenAI first
         logger.info("Trying OpenAI for summary")
-        result = openai_get_summary(text, max_bullets)
+        result = openai_get_summary(context, max_bullets)
         if result["success"]:
             return result
         
         # If OpenAI fails, try free AI helper
         logger.info("OpenAI failed, trying free AI for summary")
-        result = free_get_summary(text, max_bullets)
+        result = free_get_summary(context, max_bullets)
         if result["success"]:
             return result
             
         # If free AI helper fails, use static fallback
         logger.info("Free AI failed, using static fallback for summary")
-        return get_static_summary(text, max_bullets)
+        return get_static_summary(text, max_bullets, structure=structure)
     except Exception as e:
         logger.exception(f"Error in get_summary fallback: {str(e)}")
         # If all else fails, use static fallback
         logger.info("Using static fallback for summary after exception")
-        return get_static_summary(text, max_bullets)
+        return get_static_summary(text, max_bullets, structure=structure)
 
 def get_resources(topic, max_resources=3):
     """Wrapper that tries OpenAI first, then free AI helper, then static fallback."""
@@ -277,85 +209,155 @@ def get_resources(topic, max_resources=3):
         logger.info("Using static fallback for resources after exception")
         return get_static_resources(topic, max_resources)
 
-def generate_study_guide(text):
+def generate_study_guide(text, structure=None):
     """Wrapper that tries OpenAI first, then free AI helper, then static fallback."""
     try:
+        # Prompt with the chunks about each key term
+        analysis = get_analysis(text, structure)
+        key_terms = list(dict.fromkeys(analysis.key_topics + analysis.capitalized_terms()[:MAX_KEY_TERMS]))
+        context = prompt_context(text, structure, queries=key_terms)
+        
         # Try OpenAI first
         logger.info("Trying OpenAI for study guide")
-        result = openai_generate_study_guide(text)
+        result = openai_generate_study_guide(context)
         if result["success"]:
             return result
         
         # If OpenAI fails, try free AI helper
         logger.info("OpenAI failed, trying free AI for study guide")
-        result = free_generate_study_guide(text)
+        result = free_generate_study_guide(context)
         if result["success"]:
             return result
             
         # If free AI helper fails, use static fallback
         logger.info("Free AI failed, using static fallback for study guide")
-        return generate_static_study_guide(text)
+        return generate_static_study_guide(text, structure=structure)
     except Exception as e:
         logger.exception(f"Error in generate_study_guide fallback: {str(e)}")
         # If all else fails, use static fallback
         logger.info("Using static fallback for study guide after exception")
-        return generate_static_study_guide(text)
+        return generate_static_study_guide(text, structure=structure)
 
-def generate_quiz(text, num_questions=5):
+def generate_quiz(text, num_questions=5, structure=None):
     """Wrapper that tries OpenAI first, then free AI helper, then static fallback."""
     try:
+        # Prompt with the chunks about one key topic per question
+        topics = get_analysis(text, structure).key_topics[:num_questions]
+        context = prompt_context(text, structure, queries=topics or None)
+        
         # Try OpenAI first
         logger.info("Trying OpenAI for quiz")
-        result = openai_generate_quiz(text, num_questions)
+        result = openai_generate_quiz(context, num_questions)
         if result["success"]:
             return result
         
         # If OpenAI fails, try free AI helper
         logger.info("OpenAI failed, trying free AI for quiz")
-        result = free_generate_quiz(text, num_questions)
+        result = free_generate_quiz(context, num_questions)
         if result["success"]:
             return result
             
         # If free AI helper fails, use static fallback
         logger.info("Free AI failed, using static fallback for quiz")
-        return generate_static_quiz(text, num_questions)
+        return generate_static_quiz(text, num_questions, structure=structure)
     except Exception as e:
         logger.exception(f"Error in generate_quiz fallback: {str(e)}")
         # If all else fails, use static fallback
         logger.info("Using static fallback for quiz after exception")
-        return generate_static_quiz(text, num_questions)
+        return generate_static_quiz(text, num_questions, structure=structure)
 
-def generate_topic_notes(text, max_sections=3):
+def generate_topic_notes(text, max_sections=3, structure=None):
     """Generate detailed notes for each topic with key points in bold and examples."""
     try:
         logger.info("Generating detailed topic notes")
+        # Prompt with the chunks about one key topic per section
+        topics = get_analysis(text, structure).key_topics[:max_sections]
+        context = prompt_context(text, structure, queries=topics or None)
+        
         # Try free AI helper first
-        result = generate_detailed_notes(text, max_sections)
+        result = generate_detailed_notes(context, max_sections)
         if result["success"]:
             return result
             
         # If free AI helper fails, use static fallback
         logger.info("Free AI failed, using static fallback for detailed notes")
-        return generate_static_topic_notes(text, max_sections)
+        return generate_static_topic_notes(text, max_sections, structure=structure)
     except Exception as e:
         logger.exception(f"Error in generate_topic_notes: {str(e)}")
         # If all else fails, use static fallback
         logger.info("Using static fallback for detailed notes after exception")
-        return generate_static_topic_notes(text, max_sections)
+        return generate_static_topic_notes(text, max_sections, structure=structure)
+
+def transcribe_extracted_audio(video_result):
+    """
+    Transcribe the audio extracted from a video, removing it from disk afterwards.
+    
+    Args:
+        video_result (dict): The result of process_file for a video file
+        
+    Returns:
+        dict: The transcription result from transcribe_audio
+    """
+    try:
+        return transcribe_audio(video_result["audio_file"])
+    finally:
+        if video_result.get("temporary_audio"):
+            remove_temporary_file(video_result["audio_file"])
 
-def process_input(input_type, input_content):
+def extract_files(files):
+    """
+    Extract several uploaded files in parallel and merge them into one transcript.
+    
+    Args:
+        files (list): The uploaded file objects
+        
+    Returns:
+        dict: Dictionary with success status, the merged "text" and its "structure",
+              the number of files used and the errors of files that failed
+    """
+    documents = []
+    errors = []
+    for file_name, file_result in process_files(files):
+        if file_result["success"] and "audio_file" in file_result:
+            # Videos are transcribed here so the Whisper model stays in this process
+            file_result = transcribe_extracted_audio(file_result)
+            if file_result["success"]:
+                file_result = {"success": True, "text": file_result["transcript"]}
+        
+        if file_result["success"]:
+            documents.append((file_name, file_result["text"], file_result.get("structure")))
+        else:
+            logger.warning(f"Skipping {file_name}: {file_result.get('error', 'Unknown error')}")
+            errors.append(f"{file_name}: {file_result.get('error', 'Unknown error')}")
+    
+    if not documents:
+        return {"success": False, "error": "None of the files could be processed. " + "; ".join(errors)}
+    
+    text, structure = merge_documents(documents)
+    return {"success": True, "text": text, "structure": structure, "file_count": len(documents), "errors": errors}
+
+def process_input(input_type, input_content, selection=None, progress=None):
     """
     Process the user input and generate study materials.
     
     Args:
-        input_type (str): The type of input ('text', 'youtube', 'audio', or 'file')
-        input_content: The actual content (text, YouTube URL, audio file, or uploaded file)
+        input_type (str): The type of input ('text', 'youtube', 'audio', 'file' or 'files')
+        input_content: The actual content (text, YouTube URL, audio file, uploaded file,
+                       or a list of uploaded files)
+        selection (dict): Optional pages/slides or PDF outline sections to extract
+                          from a document (see utils.file_processor.process_file)
+        progress (callable): Optional callback called with the completed fraction (0-1)
+                             and a message as each stage starts
         
     Returns:
         dict: Dictionary with all generated study materials and success status
     """
     logger.info(f"Processing input of type: {input_type}")
     
+    def report(fraction, message):
+        if progress is not None:
+            progress(fraction, message)
+    
     result = {
         "success": False,
         "transcript": None,
@@ -364,11 +366,14 @@ def process_input(input_type, input_content):
         "study_guide": None,
         "quiz": None,
         "detailed_notes": None,
+        "structure": None,
+        "dedup_report": None,
         "error": None
     }
     
     try:
         # Step 1: Get the text content based on input type
+        report(0.0, "Extracting content")
         if input_type == "text":
             logger.info("Processing text input")
             result["transcript"] = input_content
@@ -397,9 +402,9 @@ def process_input(input_type, input_content):
                 return {"success": False, "error": transcript_result["error"]}
                 
         elif input_type == "file":
-            logger.info(f"Processing file: {input_content.name}")
+            logger.info(f"Processing file: {upload_name(input_content)}")
             # Check if it's a video file that needs audio extraction
-            file_extension = input_content.name.split('.')[-1].lower()
+            file_extension = upload_name(input_content).split('.')[-1].lower()
             
             if file_extension in ['mp4', 'mov', 'avi', 'mkv']:
                 logger.info("Processing video file for audio extraction")
@@ -407,8 +412,7 @@ def process_input(input_type, input_content):
                 
                 if video_result["success"] and "audio_file" in video_result:
                     logger.info("Successfully extracted audio from video, transcribing...")
-                    # Now transcribe the extracted audio
-                    transcript_result = transcribe_audio(video_result["audio_file"])
+                    transcript_result = transcribe_extracted_audio(video_result)
                     
                     if transcript_result["success"]:
                         logger.info("Successfully transcribed audio from video")
@@ -422,33 +426,66 @@ def process_input(input_type, input_content):
                     return {"success": False, "error": video_result.get("error", "Failed to process video file")}
             else:
                 # For all other file types, extract text content
-                file_result = process_file(input_content)
+                file_result = process_file(input_content, selection=selection)
                 
                 if file_result["success"]:
                     logger.info(f"Successfully processed file")
                     result["transcript"] = file_result["text"]
+                    result["structure"] = file_result.get("structure")
+                    if "output_report" in file_result:
+                        result["output_report"] = file_result["output_report"]
                     result["success"] = True
                     
                     # If it's a ZIP file, add a note about processing multiple files
                     if file_extension == 'zip' and 'file_count' in file_result:
                         logger.info(f"Processed {file_result['file_count']} files from ZIP archive")
-                        result["transcript"] = f"[Processed {file_result['file_count']} files from ZIP archive]\n\n" + result["transcript"]
+                        prefix = f"[Processed {file_result['file_count']} files from ZIP archive]\n\n"
+                        result["transcript"] = prefix + result["transcript"]
+                        if result["structure"] is not None:
+                            result["structure"] = shift_structure(result["structure"], len(prefix))
                 else:
                     logger.error(f"Failed to process file: {file_result.get('error', 'Unknown error')}")
                     return {"success": False, "error": file_result.get("error", "Failed to process file")}
+        elif input_type == "files":
+            logger.info(f"Processing {len(input_content)} files")
+            files_result = extract_files(input_content)
+            
+            if files_result["success"]:
+                logger.info(f"Successfully processed {files_result['file_count']} files")
+                result["transcript"] = files_result["text"]
+                result["structure"] = files_result["structure"]
+                result["file_errors"] = files_result["errors"]
+                result["success"] = True
+            else:
+                logger.error(f"Failed to process files: {files_result['error']}")
+                return {"success": False, "error": files_result["error"]}
         else:
             logger.error(f"Invalid input type: {input_type}")
             return {"success": False, "error": "Invalid input type"}
         
         # If we have a valid transcript, proceed with generating study materials
         if result["success"] and result["transcript"]:
+            # Build the document structure once and share it with every stage
+            structure = ensure_structure(result["transcript"], result["structure"])
+            
+            # Drop repeated headers, footers and duplicate pages before prompting
+            report(0.3, "Analyzing content")
+            dedup_result = remove_boilerplate(result["transcript"], structure)
+            dedup_report = dedup_result["report"]
+            if dedup_report["chars_saved"] > 0:
+                logger.info(f"Removed duplicate text: {dedup_report['chars_saved']} chars (~{dedup_report['tokens_saved']} tokens)")
+            result["transcript"] = dedup_result["text"]
+            result["dedup_report"] = dedup_report
+            structure = dedup_result["structure"]
+            result["structure"] = structure
+            
             # Check if this looks like slide content
-            is_slide_content = re.search(r'slide\s+\d+', result["transcript"], re.IGNORECASE) is not None
+            is_slide_content = has_slides(structure)
             
             if is_slide_content:
                 # Extract slide-specific information
                 logger.info("Detected slide content, extracting slide information")
-                slide_info = extract_slide_information(result["transcript"])
+                slide_info = extract_slide_information(result["transcript"], structure=structure)
                 
                 # Use the main topics from slide extraction for resources
                 if slide_info["main_topics"] and slide_info["main_topics"][0] != "general topic":
@@ -456,16 +493,17 @@ def process_input(input_type, input_content):
                     logger.info(f"Extracted main topics from slides: {topic}")
                 else:
                     # Fallback to regular topic extraction
-                    topic = extract_main_topics(result["transcript"])
+                    topic = extract_main_topics(result["transcript"], structure=structure)
                     logger.info(f"Extracted main topic: {topic}")
             else:
                 # Regular topic extraction for non-slide content
-                topic = extract_main_topics(result["transcript"])
+                topic = extract_main_topics(result["transcript"], structure=structure)
                 logger.info(f"Extracted main topic: {topic}")
             
             # Step 2: Generate summary
             logger.info("Generating summary")
-            summary_result = get_summary(result["transcript"])
+            report(0.35, "Generating summary")
+            summary_result = get_summary(result["transcript"], structure=structure)
             if summary_result["success"]:
                 logger.info("Summary generated successfully")
                 result["summary"] = summary_result["summary"]
@@ -476,6 +514,7 @@ def process_input(input_type, input_content):
             
             # Step 3: Find resources
             logger.info("Finding resources")
+            report(0.5, "Finding resources")
             resources_result = get_resources(topic)
             if resources_result["success"]:
                 logger.info("Resources found successfully")
@@ -487,7 +526,8 @@ def process_input(input_type, input_content):
             
             # Step 4: Generate study guide
             logger.info("Generating study guide")
-            study_guide_result = generate_study_guide(result["transcript"])
+            report(0.55, "Generating study guide")
+            study_guide_result = generate_study_guide(result["transcript"], structure=structure)
             if study_guide_result["success"]:
                 logger.info("Study guide generated successfully")
                 result["study_guide"] = study_guide_result["study_guide"]
@@ -498,7 +538,8 @@ def process_input(input_type, input_content):
             
             # Step 5: Generate quiz
             logger.info("Generating quiz")
-            quiz_result = generate_quiz(result["transcript"])
+            report(0.7, "Generating quiz")
+            quiz_result = generate_quiz(result["transcript"], structure=structure)
             if quiz_result["success"]:
                 logger.info("Quiz generated successfully")
                 result["quiz"] = quiz_result["quiz"]
@@ -509,7 +550,8 @@ def process_input(input_type, input_content):
             
             # Step 6: Generate detailed notes with examples
             logger.info("Generating detailed topic notes")
-            notes_result = generate_topic_notes(result["transcript"])
+            report(0.85, "Generating detailed notes")
+            notes_result = generate_topic_notes(result["transcript"], structure=structure)
             if notes_result["success"]:
                 logger.info("Detailed notes generated successfully")
                 result["detailed_notes"] = {"notes": notes_result["notes"]}
@@ -519,6 +561,7 @@ def process_input(input_type, input_content):
                 # Just continue without detailed notes
                 
             logger.info("All processing completed successfully")
+            report(1.0, "Done")
             result["success"] = True
             return result
         
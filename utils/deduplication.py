@@ -0,0 +1,285 @@
+"""
+Boilerplate and duplicate-text removal between extraction and generation.
+
+Lecture PDFs and slide decks repeat running headers, footers, course codes,
+dates and slide numbers on every page. This module finds text repeated across
+the sections of a document (see utils.document_model) and removes it before
+the transcript is sent to the language models:
+
+- lines that appear on a large share of the pages/slides (kept once)
+- running fragments at the start of each section, such as "7 April, 2025 12"
+- sections that are exact or near duplicates of another section, such as
+  the intermediate steps of an animated slide build
+- repeated paragraphs in text that has no sections
+"""
+
+import re
+import logging
+from collections import Counter
+from .document_model import ensure_structure, new_structure, finalize_structure
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# A line counts as boilerplate when it appears in at least this share of the sections
+BOILERPLATE_MIN_SHARE = 0.5
+# ... and in at least this many sections
+BOILERPLATE_MIN_SECTIONS = 3
+# Section types that carry running headers and footers
+PAGED_SECTION_TYPES = ("slide", "page")
+# Longest leading fragment (in words) considered as a running header
+MAX_FRAGMENT_WORDS = 8
+# Longest line (in words) whose numbers are ignored when matching running headers and footers
+MAX_HEADER_WORDS = 8
+# A section is a near duplicate when this share of its word shingles occurs in another section
+NEAR_DUPLICATE_CONTAINMENT = 0.9
+# Near duplicates (e.g. slide builds) are looked for among this many preceding sections
+NEAR_DUPLICATE_WINDOW = 5
+SHINGLE_SIZE = 3
+# Sections with fewer shingles are too short to compare reliably and only dropped when identical
+MIN_NEAR_DUPLICATE_SHINGLES = 8
+
+# Average characters per token for English text with OpenAI-style tokenizers
+CHARS_PER_TOKEN = 4
+
+NUMBER_PATTERN = re.compile(r'\d+')
+
+def estimate_tokens(text):
+    """Estimate the number of LLM tokens in a text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def normalize_line(line):
+    """Normalize a line for comparison: case and whitespace."""
+    return re.sub(r'\s+', ' ', line.lower()).strip()
+
+def _collapse_numbers(text):
+    """Replace every run of digits (page numbers, dates) with '#'."""
+    return NUMBER_PATTERN.sub('#', text)
+
+def _count_numbers(words):
+    """Return how many of the words contain a digit."""
+    return sum(1 for word in words if NUMBER_PATTERN.search(word))
+
+def boilerplate_key(line):
+    """
+    Return the key under which a line is matched across sections.
+
+    Short header- and footer-like lines, where at least half of the words are
+    numbers ("Page 3 of 6", "7 April, 2025 12"), are matched with their numbers
+    collapsed, so running page numbers and dates match. Other lines only match
+    when they are the same apart from case and whitespace, so content lines
+    that differ only in their numbers ("Step 1: ...", "Step 2: ...") are kept.
+    """
+    line = normalize_line(line)
+    words = line.split()
+    if len(words) <= MAX_HEADER_WORDS and _count_numbers(words) * 2 >= len(words):
+        return _collapse_numbers(line)
+    return line
+
+def _shingles(words):
+    """Return the set of word shingles of a section body."""
+    if len(words) < SHINGLE_SIZE:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+def _split_title(body, title):
+    """Split a section body into its leading title (if repeated there) and the rest."""
+    stripped = body.lstrip()
+    if title and stripped.startswith(title):
+        head_length = len(body) - len(stripped) + len(title)
+        line_end = body.find('\n', head_length)
+        line_end = len(body) if line_end == -1 else line_end
+        rest = body[head_length:line_end].split()
+        # Titles are cut at their first digit (see document_model.clean_title); a short
+        # heading such as "Topic 3 heading" stays whole unless the rest of it is a
+        # running fragment ("7 April, 2025 12")
+        if rest and len(rest) <= MAX_FRAGMENT_WORDS and _count_numbers(rest) * 2 <= len(rest):
+            head_length = line_end
+        return body[:head_length], body[head_length:]
+    return "", body
+
+def _find_running_fragments(bodies):
+    """
+    Find normalized leading fragments shared by many section bodies.
+
+    Returns:
+        set: Normalized word tuples that should be stripped from the start of a body
+    """
+    counts = Counter()
+    for body in bodies:
+        words = _collapse_numbers(normalize_line(body.lstrip().split('\n', 1)[0])).split()[:MAX_FRAGMENT_WORDS]
+        # Count every prefix once per section
+        counts.update(tuple(words[:n]) for n in range(1, len(words) + 1))
+
+    threshold = max(BOILERPLATE_MIN_SECTIONS, BOILERPLATE_MIN_SHARE * len(bodies))
+    # Only fragments that are mostly numbers (dates, page numbers), so shared
+    # wording at the start of real content ("Step 1:") is left alone
+    return {
+        fragment for fragment, count in counts.items()
+        if count >= threshold and sum('#' in word for word in fragment) * 2 > len(fragment)
+    }
+
+def _strip_running_fragment(body, fragments):
+    """Remove the longest running fragment from the start of the first line of a body."""
+    first_line_end = body.find('\n', len(body) - len(body.lstrip()))
+    first_line = body if first_line_end == -1 else body[:first_line_end]
+    words = list(re.finditer(r'\S+', first_line))[:MAX_FRAGMENT_WORDS]
+    normalized = tuple(_collapse_numbers(normalize_line(match.group())) for match in words)
+    for n in range(len(words), 0, -1):
+        if normalized[:n] in fragments:
+            return body[words[n - 1].end():], True
+    return body, False
+
+def _deduplicate_paragraphs(text):
+    """Remove repeated paragraphs from text that has no sections."""
+    seen = set()
+    kept = []
+    removed = 0
+    for paragraph in re.split(r'\n\s*\n', text):
+        key = boilerplate_key(paragraph)
+        if key and key in seen and len(key) > 20:
+            removed += 1
+            continue
+        seen.add(key)
+        kept.append(paragraph)
+    return "\n\n".join(kept), removed
+
+def remove_boilerplate(text, structure=None):
+    """
+    Remove boilerplate and duplicate text from a transcript.
+
+    Args:
+        text (str): The transcript text
+        structure (dict): Optional document structure of the text
+
+    Returns:
+        dict: The cleaned "text", its updated "structure", and a "report" with the
+              characters and estimated tokens saved
+    """
+    structure = ensure_structure(text, structure)
+    sections = structure.get("sections", [])
+    report = {
+        "chars_before": len(text),
+        "boilerplate_lines_removed": 0,
+        "running_fragments_removed": 0,
+        "duplicate_sections_removed": 0,
+        "duplicate_paragraphs_removed": 0,
+    }
+
+    if len(sections) < 2:
+        # No page or slide structure: only drop repeated paragraphs
+        cleaned, removed = _deduplicate_paragraphs(text)
+        report["duplicate_paragraphs_removed"] = removed
+        cleaned_structure = structure if removed == 0 else ensure_structure(cleaned)
+        return _finish(text, cleaned, cleaned_structure, report)
+
+    # Running headers and footers only exist on pages and slides; repeated lines
+    # across files or notebook cells (e.g. imports) are left alone
+    paged = [s for s in sections if s["type"] in PAGED_SECTION_TYPES]
+    enough_sections = len(paged) >= BOILERPLATE_MIN_SECTIONS and len(paged) * 2 >= len(sections)
+    threshold = max(BOILERPLATE_MIN_SECTIONS, BOILERPLATE_MIN_SHARE * len(sections))
+    bodies = [text[section["content_start"]:section["end"]] for section in sections]
+
+    # Lines repeated across many sections (headers, footers, templates)
+    if enough_sections:
+        line_counts = Counter()
+        for body in bodies:
+            line_counts.update({boilerplate_key(line) for line in body.split('\n')} - {""})
+        boilerplate = {line for line, count in line_counts.items() if count >= threshold}
+
+        kept_once = set()
+        for i, body in enumerate(bodies):
+            kept_lines = []
+            for line in body.split('\n'):
+                key = boilerplate_key(line)
+                if key in boilerplate:
+                    if key in kept_once:
+                        report["boilerplate_lines_removed"] += 1
+                        continue
+                    kept_once.add(key)
+                kept_lines.append(line)
+            bodies[i] = '\n'.join(kept_lines)
+
+    # Split each section into title and body
+    parts = []
+    for section, body in zip(sections, bodies):
+        title_part, body = _split_title(body, section.get("title", ""))
+        parts.append([section, title_part, body])
+
+    # Running fragments at the start of each body (dates, course codes, slide numbers)
+    if enough_sections:
+        fragments = _find_running_fragments([body for _, _, body in parts])
+        if fragments:
+            for part in parts:
+                part[2], stripped = _strip_running_fragment(part[2], fragments)
+                report["running_fragments_removed"] += int(stripped)
+
+    # Exact and near-duplicate sections
+    exact_seen = set()
+    recent = []
+    for position, part in enumerate(parts):
+        words = normalize_line(part[2]).split()
+        if not words:
+            continue
+        key = ' '.join(words)
+        shingles = _shingles(words)
+        duplicate = key in exact_seen
+        if not duplicate:
+            for index, other in recent:
+                shorter, longer = (shingles, other) if len(shingles) <= len(other) else (other, shingles)
+                if len(shorter) >= MIN_NEAR_DUPLICATE_SHINGLES and len(shorter & longer) / len(shorter) >= NEAR_DUPLICATE_CONTAINMENT:
+                    # Keep the more complete of the two (e.g. the last step of a slide build)
+                    if len(shingles) > len(other):
+                        parts[index][2] = ""
+                        recent = [(i, s) for i, s in recent if i != index]
+                    else:
+                        duplicate = True
+                    report["duplicate_sections_removed"] += 1
+                    break
+        if duplicate:
+            if key in exact_seen:
+                report["duplicate_sections_removed"] += 1
+            part[2] = ""
+            continue
+        exact_seen.add(key)
+        recent.append((position, shingles))
+        recent = recent[-NEAR_DUPLICATE_WINDOW:]
+
+    # Rebuild the transcript and structure with updated offsets
+    cleaned_structure = new_structure(structure.get("kind", "text"))
+    pieces = [text[:sections[0]["start"]]]
+    length = len(pieces[0])
+    previous_end = sections[0]["start"]
+    for section, title_part, body in parts:
+        # Keep any text between sections (e.g. content before the first marker)
+        if section["start"] > previous_end:
+            gap = text[previous_end:section["start"]]
+            pieces.append(gap)
+            length += len(gap)
+        marker = text[section["start"]:section["content_start"]]
+        # Keep a line break after markers that stand on their own line
+        if text[section["content_start"]:section["end"]].lstrip(' \t').startswith('\n'):
+            marker += '\n'
+        body = body.strip('\n')
+        content = title_part.strip() + ('\n' if title_part.strip() and body else '') + body
+        block = marker + content.strip(' ') + "\n\n"
+        moved = dict(section)
+        moved["start"] = length
+        moved["content_start"] = length + len(marker)
+        moved["end"] = length + len(block)
+        cleaned_structure["sections"].append(moved)
+        pieces.append(block)
+        length += len(block)
+        previous_end = section["end"]
+    pieces.append(text[previous_end:])
+
+    cleaned = ''.join(pieces)
+    finalize_structure(cleaned_structure, len(cleaned))
+    return _finish(text, cleaned, cleaned_structure, report)
+
+def _finish(original, cleaned, structure, report):
+    """Fill in the savings figures of a deduplication report."""
+    report["chars_after"] = len(cleaned)
+    report["chars_saved"] = len(original) - len(cleaned)
+    report["tokens_saved"] = estimate_tokens(original) - estimate_tokens(cleaned)
+    return {"text": cleaned, "structure": structure, "report": report}
@@ -0,0 +1,246 @@
+"""
+Structured document model shared by the extraction and generation stages.
+
+Extractors return the flat transcript text together with a compact structure
+describing its sections (slides, pages, files, notebook cells or headings).
+Each section records its title and character offsets into the transcript, so
+downstream stages can look up slide titles and slide content directly instead
+of re-discovering the `Slide N:` / `Page N:` / `# FILE:` markers with regexes.
+
+A structure is a plain dictionary so it can be stored in the results and
+exported as JSON:
+
+    {
+        "kind": "slides",
+        "sections": [
+            {"type": "slide", "number": 1, "title": "Clustering",
+             "start": 0, "content_start": 9, "end": 120},
+            ...
+        ]
+    }
+"""
+
+import re
+
+# Markers emitted by the extractors in file_processor
+SECTION_MARKER_PATTERN = re.compile(
+    r'(?:^|(?<=\s))(?P<marker>Slide|Page)\s+(?P<number>\d+):[ \t]*'
+    r'|^Cell\s+(?P<cell>\d+)\s+\((?P<cell_type>Markdown|Code)\):[ \t]*$'
+    r'|^#\s+(?P<file_kind>FILE|DOCUMENT|PRESENTATION|PDF|JUPYTER NOTEBOOK):[ \t]*(?P<file_name>[^\n]*)$',
+    re.MULTILINE
+)
+
+# Structure kinds by section type, used to describe the dominant layout
+KIND_BY_SECTION_TYPE = {
+    "slide": "slides",
+    "page": "pages",
+    "file": "files",
+    "cell": "cells",
+    "heading": "headings",
+}
+
+MAX_TITLE_LENGTH = 100
+
+def new_structure(kind="text"):
+    """Create an empty document structure."""
+    return {"kind": kind, "sections": []}
+
+def clean_title(title):
+    """
+    Normalize a raw section title.
+
+    Slide exports often run the title, date and slide number together on one
+    line (e.g. "Clustering 7 April, 2025 2 Clustering is..."), so the title is
+    cut at the first digit when that still leaves a meaningful title.
+    """
+    title = re.sub(r'\s+', ' ', title or "").strip()
+    digit = re.search(r'\d', title)
+    if digit and len(title[:digit.start()].strip()) > 3:
+        title = title[:digit.start()].strip()
+    return title[:MAX_TITLE_LENGTH].strip(" :-–")
+
+def add_section(structure, section_type, number, title, start, content_start=None, end=None):
+    """
+    Append a section to a structure.
+
+    Args:
+        structure (dict): The structure to extend
+        section_type (str): 'slide', 'page', 'file', 'cell' or 'heading'
+        number (int): The 1-based section number
+        title (str): The section title
+        start (int): Offset of the section marker in the transcript
+        content_start (int): Offset where the section body starts (defaults to start)
+        end (int): Offset where the section ends (filled in by finalize_structure)
+
+    Returns:
+        dict: The new section
+    """
+    section = {
+        "type": section_type,
+        "number": number,
+        "title": clean_title(title),
+        "start": start,
+        "content_start": start if content_start is None else content_start,
+        "end": end,
+    }
+    structure["sections"].append(section)
+    return section
+
+def finalize_structure(structure, text_length):
+    """
+    Fill in missing section end offsets and the structure kind.
+
+    A section without an explicit end runs until the next section starts, or
+    to the end of the transcript for the last section.
+
+    Returns:
+        dict: The same structure, for chaining
+    """
+    sections = structure["sections"]
+    for i, section in enumerate(sections):
+        if section["end"] is None:
+            section["end"] = sections[i + 1]["start"] if i + 1 < len(sections) else text_length
+
+    if sections and structure.get("kind", "text") == "text":
+        structure["kind"] = KIND_BY_SECTION_TYPE.get(sections[0]["type"], "text")
+    return structure
+
+def _first_line(text, start, end):
+    """Return the first non-empty line of text[start:end]."""
+    for line in text[start:end].split('\n', 5)[:5]:
+        if line.strip():
+            return line.strip()
+    return ""
+
+def parse_structure(text):
+    """
+    Build a structure from the section markers in a transcript.
+
+    Used for text that did not come from an extractor (pasted text, transcripts
+    from other sources). The transcript is scanned once.
+
+    Args:
+        text (str): The transcript text
+
+    Returns:
+        dict: The document structure
+    """
+    structure = new_structure()
+    if not text:
+        return structure
+
+    matches = list(SECTION_MARKER_PATTERN.finditer(text))
+    for i, match in enumerate(matches):
+        next_start = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+
+        if match.group("marker"):
+            section_type = match.group("marker").lower()
+            number = int(match.group("number"))
+            title = _first_line(text, match.end(), next_start)
+        elif match.group("cell"):
+            section_type = "cell"
+            number = int(match.group("cell"))
+            title = _first_line(text, match.end(), next_start).lstrip("#").strip()
+        else:
+            section_type = "file"
+            number = sum(1 for s in structure["sections"] if s["type"] == "file") + 1
+            title = match.group("file_name")
+
+        add_section(structure, section_type, number, title, match.start(), match.end())
+
+    return finalize_structure(structure, len(text))
+
+def ensure_structure(text, structure=None):
+    """Return the given structure, or parse one from the text if none was provided."""
+    if structure is not None:
+        return structure
+    return parse_structure(text)
+
+def shift_structure(structure, offset):
+    """
+    Shift all section offsets, e.g. after a prefix is prepended to the transcript.
+
+    Returns:
+        dict: A new structure with shifted offsets
+    """
+    shifted = new_structure(structure.get("kind", "text"))
+    for section in structure.get("sections", []):
+        moved = dict(section)
+        for key in ("start", "content_start", "end"):
+            if moved.get(key) is not None:
+                moved[key] += offset
+        shifted["sections"].append(moved)
+    return shifted
+
+def get_sections(structure, section_type=None, before=None):
+    """
+    Return the sections of a structure.
+
+    Args:
+        structure (dict): The document structure
+        section_type (str): Optional section type to filter on (e.g. 'slide')
+        before (int): Optional offset; only sections starting before it are returned
+
+    Returns:
+        list: Matching sections in document order
+    """
+    sections = structure.get("sections", []) if structure else []
+    return [
+        s for s in sections
+        if (section_type is None or s["type"] == section_type)
+        and (before is None or s["start"] < before)
+    ]
+
+def has_slides(structure):
+    """Return True if the structure contains slide sections."""
+    return any(s["type"] == "slide" for s in (structure or {}).get("sections", []))
+
+def slide_titles(structure, before=None, min_length=4):
+    """Return the titles of the slide sections, skipping very short ones."""
+    return [
+        s["title"] for s in get_sections(structure, "slide", before)
+        if len(s["title"]) >= min_length
+    ]
+
+def section_content(text, section):
+    """
+    Return the body of a section with whitespace collapsed.
+
+    The title is dropped from the start of the body when it is repeated there,
+    as it is for slide decks where the title is the first line of the slide.
+    """
+    body = text[section["content_start"]:section["end"]]
+    body = re.sub(r'\s+', ' ', body).strip()
+    title = section.get("title", "")
+    if title and body.startswith(title):
+        body = body[len(title):].strip()
+    return body
+
+def merge_documents(documents):
+    """
+    Merge several extracted documents into one transcript with '# FILE:' sections.
+
+    Each file becomes a 'file' section covering its header, followed by the
+    document's own sections (slides, pages, ...) shifted into the merged text.
+
+    Args:
+        documents (list): (file name, text, structure) tuples; structure may be None
+
+    Returns:
+        tuple: The merged text and its structure
+    """
+    parts = []
+    length = 0
+    structure = new_structure("files")
+    for number, (file_name, text, document_structure) in enumerate(documents, start=1):
+        header = f"# FILE: {file_name}\n"
+        add_section(structure, "file", number, file_name, length, length + len(header))
+        offset = length + len(header)
+        for section in shift_structure(ensure_structure(text, document_structure), offset)["sections"]:
+            structure["sections"].append(section)
+        block = header + text.rstrip('\n') + "\n\n"
+        parts.append(block)
+        length += len(block)
+
+    merged = ''.join(parts)
+    return merged, finalize_structure(structure, len(merged))
@@ -3,31 +3,19 @@ Export utilities for the AI Study Assistant.
 Provides functionality to export study materials in various formats.
 """
 
-import base64
 import json
 import io
 import os
+import hashlib
 from datetime import datetime
 import streamlit as st
 
-def get_download_link(content, filename, text):
-    """
-    Generate a download link for a file.
-    
-    Args:
-        content (str): Content to be downloaded
-        filename (str): Name of the download file
-        text (str): Text to display for the download link
-        
-    Returns:
-        str: HTML string for the download link
-    """
-    # Encode the content to base64
-    b64 = base64.b64encode(content.encode()).decode()
-    
-    # Generate the download link
-    href = f'<a href="data:file/txt;base64,{b64}" download="{filename}">{text}</a>'
-    return href
+# Number of built exports kept per session
+MAX_CACHED_EXPORTS = 6
+
+# Largest course archive served from the app; the download button holds the whole
+# archive in memory, so larger courses are exported with the bulk_export CLI
+MAX_COURSE_ARCHIVE_BYTES = int(os.environ.get("MAX_COURSE_ARCHIVE_MB", "200")) * 1024 * 1024
 
 def format_markdown_content(title, results):
     """
@@ -220,6 +208,75 @@ def export_to_text(results, title="AI Study Assistant Results"):
         "download_text": "Download as Text"
     }
 
+def export_to_kit(results, title="AI Study Assistant Results"):
+    """
+    Export study materials as a stored kit, which can be loaded again or bulk-exported.
+    
+    Args:
+        results (dict): Dictionary containing study materials
+        title (str): Title for the kit (unused; stored kits keep the results only)
+        
+    Returns:
+        dict: Dictionary with the kit bytes, filename, and download link text
+    """
+    from .kit_storage import dump_kit, KIT_EXTENSION
+    
+    filename = f"study_materials_{datetime.now().strftime('%Y%m%d_%H%M%S')}{KIT_EXTENSION}"
+    
+    return {
+        "content": dump_kit(results),
+        "filename": filename,
+        "download_text": "Download as Study Kit"
+    }
+
+# Export builders and MIME types by format name
+EXPORT_FORMATS = {
+    "Markdown": (export_to_markdown, "text/markdown"),
+    "JSON": (export_to_json, "application/json"),
+    "Text": (export_to_text, "text/plain"),
+    "Study Kit": (export_to_kit, "application/octet-stream"),
+}
+
+def results_digest(results):
+    """
+    Return a hash identifying the contents of a results dictionary.
+
+    Args:
+        results (dict): Dictionary containing study materials
+
+    Returns:
+        str: SHA-256 hex digest of the results serialized with sorted keys
+    """
+    serialized = json.dumps(results, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+def get_export(results, export_format, title, cache, digest=None):
+    """
+    Build an export as bytes, reusing a cached copy for the same results, format and title.
+
+    Args:
+        results (dict): Dictionary containing study materials
+        export_format (str): A key of EXPORT_FORMATS
+        title (str): Title for the exported file
+        cache (dict): Cache of built exports, e.g. kept in the session state
+        digest (str): Optional precomputed results_digest(results)
+
+    Returns:
+        dict: Dictionary with the encoded content ("data"), filename, MIME type and download text
+    """
+    key = (digest or results_digest(results), export_format, title)
+    if key not in cache:
+        export_function, mime = EXPORT_FORMATS[export_format]
+        export = export_function(results, title)
+        content = export.pop("content")
+        export["data"] = content.encode("utf-8") if isinstance(content, str) else content
+        export["mime"] = mime
+        if len(cache) >= MAX_CACHED_EXPORTS:
+            # Drop the oldest export
+            del cache[next(iter(cache))]
+        cache[key] = export
+    return cache[key]
+
 def create_export_section(results):
     """
     Create a section in the app for exporting study materials.
@@ -240,35 +297,75 @@ def create_export_section(results):
     # Ask the user for a title for their export
     title = st.text_input("Title for your study materials:", "AI Study Assistant Results")
     
-    # Create columns for the different export formats
-    col1, col2, col3 = st.columns(3)
+    # Exports are only built once a format is chosen
+    export_format = st.selectbox("Export format:", list(EXPORT_FORMATS), index=None, placeholder="Choose a format")
+    if export_format is None:
+        return
     
-    # Export as Markdown
-    with col1:
-        markdown_export = export_to_markdown(results, title)
-        markdown_link = get_download_link(
-            markdown_export["content"],
-            markdown_export["filename"],
-            markdown_export["download_text"]
-        )
-        st.markdown(markdown_link, unsafe_allow_html=True)
+    # Built exports are cached per session, keyed by a hash of the results
+    # (computed once per results object, not on every rerun)
+    if 'export_cache' not in st.session_state:
+        st.session_state.export_cache = {}
+    hashed = st.session_state.get('export_results_digest')
+    if hashed is None or hashed[0] is not results:
+        hashed = (results, results_digest(results))
+        st.session_state.export_results_digest = hashed
     
-    # Export as JSON
-    with col2:
-        json_export = export_to_json(results, title)
-        json_link = get_download_link(
-            json_export["content"],
-            json_export["filename"],
-            json_export["download_text"]
-        )
-        st.markdown(json_link, unsafe_allow_html=True)
+    export = get_export(results, export_format, title, st.session_state.export_cache, digest=hashed[1])
+    st.download_button(
+        export["download_text"],
+        data=export["data"],
+        file_name=export["filename"],
+        mime=export["mime"],
+        key="export_download"
+    )
+
+def create_course_export_section():
+    """
+    Create a section in the app for exporting many saved study kits as one ZIP archive.
     
-    # Export as Text
-    with col3:
-        text_export = export_to_text(results, title)
-        text_link = get_download_link(
-            text_export["content"],
-            text_export["filename"],
-            text_export["download_text"]
-        )
-        st.markdown(text_link, unsafe_allow_html=True)
\ No newline at end of file
+    Returns:
+        None: This function directly renders UI elements using Streamlit
+    """
+    import tempfile
+    from .bulk_export import DEFAULT_FORMATS, iter_kit_sources, iter_course_zip
+    from .kit_storage import KIT_EXTENSION
+    
+    with st.expander("📦 Export a whole course"):
+        st.write("Combine saved study kits (downloaded as Study Kit or JSON) into one ZIP archive.")
+        kit_files = st.file_uploader("Saved study kits:", type=[KIT_EXTENSION.lstrip("."), "json"],
+                                     accept_multiple_files=True, key="course_kits")
+        course_title = st.text_input("Course title:", "Course Study Materials", key="course_title")
+        formats = st.multiselect("Formats:", [f for f in EXPORT_FORMATS if f != "Study Kit"],
+                                 default=list(DEFAULT_FORMATS), key="course_formats")
+        
+        if st.button("Build course archive", key="build_course_archive"):
+            if not kit_files or not formats:
+                st.warning("Please upload at least one study kit and choose a format.")
+                return
+            
+            # The archive is built in a temporary file, one kit at a time; serving it
+            # reads it into memory, since download buttons hold their data in memory
+            errors = []
+            with tempfile.TemporaryFile() as archive_file:
+                with st.spinner(f"Exporting {len(kit_files)} study kits..."):
+                    for chunk in iter_course_zip(iter_kit_sources(kit_files, errors), formats, course_title, errors):
+                        archive_file.write(chunk)
+                size = archive_file.tell()
+                if size > MAX_COURSE_ARCHIVE_BYTES:
+                    st.error(f"The course archive is {size / 2 ** 20:.0f} MB, more than the "
+                             f"{MAX_COURSE_ARCHIVE_BYTES // 2 ** 20} MB the app can serve. Export large courses "
+                             "with `python -m utils.bulk_export course.zip <kit files>` instead.")
+                    return
+                archive_file.seek(0)
+                archive_data = archive_file.read()
+            
+            for error in errors:
+                st.warning(f"Skipped {error}")
+            st.download_button(
+                "Download course archive",
+                data=archive_data,
+                file_name=f"{course_title.strip().replace(' ', '_') or 'course'}.zip",
+                mime="application/zip",
+                key="course_archive_download"
+            )
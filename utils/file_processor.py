@@ -1,66 +1,293 @@
 import os
+import io
 import zipfile
-import tempfile
 import re
 import logging
-import nbformat
-from pptx import Presentation
-from docx import Document
-from PyPDF2 import PdfReader
-# Try to import moviepy with error handling
-try:
-    import moviepy.editor
-    from moviepy.editor import VideoFileClip
-    HAS_MOVIEPY = True
-except ImportError:
-    HAS_MOVIEPY = False
+import tempfile
+import importlib
+import inspect
+import posixpath
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from xml.etree import ElementTree
+from .document_model import new_structure, add_section, finalize_structure, parse_structure
+from .uploads import open_upload, upload_path, upload_name, spool_stream, read_text, remove_temporary_file
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-def process_file(file, file_type=None):
+# Upper bound on the worker processes used to extract several files at once
+MAX_FILE_WORKERS = int(os.environ.get("MAX_FILE_WORKERS", "4"))
+
+# Registry of text extractors keyed by file extension and MIME type.
+# An extractor is either a callable taking the uploaded file object, or a
+# "package.module:function" string that is only imported on first use, so
+# heavy parsing libraries (python-pptx, python-docx, PyPDF2, moviepy)
+# are not loaded until a file of that type is actually processed.
+_EXTRACTORS = {}
+_MIME_EXTRACTORS = {}
+
+def register_extractor(extensions, extractor, mime_types=None):
+    """
+    Register an extractor for one or more file extensions and MIME types.
+    
+    Args:
+        extensions: A file extension (e.g. '.epub') or a list of extensions
+        extractor: A callable taking the file object, or a 'module:function' string
+        mime_types: Optional MIME type or list of MIME types to map to the extractor
+    """
+    if isinstance(extensions, str):
+        extensions = [extensions]
+    if isinstance(mime_types, str):
+        mime_types = [mime_types]
+    
+    for extension in extensions:
+        extension = extension.lower()
+        if not extension.startswith('.'):
+            extension = '.' + extension
+        _EXTRACTORS[extension] = extractor
+    
+    for mime_type in mime_types or []:
+        _MIME_EXTRACTORS[mime_type.lower()] = extractor
+
+def _resolve_extractor(extractor):
+    """Import a 'module:function' extractor reference, caching the result in the registry."""
+    if callable(extractor):
+        return extractor
+    
+    module_name, _, function_name = extractor.partition(':')
+    resolved = getattr(importlib.import_module(module_name), function_name)
+    
+    # Replace the string reference so the import only happens once
+    for registry in (_EXTRACTORS, _MIME_EXTRACTORS):
+        for key, value in list(registry.items()):
+            if value == extractor:
+                registry[key] = resolved
+    return resolved
+
+def get_extractor(extension=None, mime_type=None):
+    """
+    Look up the extractor for a file extension, falling back to its MIME type.
+    
+    Args:
+        extension (str): The file extension including the leading dot
+        mime_type (str): Optional MIME type reported by the uploader
+        
+    Returns:
+        callable: The extractor function, or None if the type is unsupported
+    """
+    extractor = _EXTRACTORS.get((extension or "").lower())
+    if extractor is None and mime_type:
+        extractor = _MIME_EXTRACTORS.get(mime_type.lower())
+    if extractor is None:
+        return None
+    return _resolve_extractor(extractor)
+
+def supported_extensions():
+    """Return the sorted list of registered file extensions."""
+    return sorted(_EXTRACTORS)
+
+def _accepts_selection(extractor):
+    """Return True if an extractor takes a `selection` keyword argument."""
+    try:
+        return "selection" in inspect.signature(extractor).parameters
+    except (TypeError, ValueError):
+        return False
+
+def parse_page_ranges(spec, page_count=None):
+    """
+    Parse a page or slide range specification.
+    
+    Args:
+        spec (str): Comma-separated 1-based numbers and ranges, e.g. "3-5, 8, 10-"
+        page_count (int): Optional number of pages; open ranges run to it and
+                          numbers past it are dropped
+        
+    Returns:
+        list: Sorted, unique 1-based page numbers
+        
+    Raises:
+        ValueError: If the specification is malformed
+    """
+    pages = set()
+    for part in re.split(r'[,;]', spec or ""):
+        part = part.strip()
+        if not part:
+            continue
+        match = re.fullmatch(r'(\d+)\s*(?:[-–]\s*(\d*))?', part)
+        if not match:
+            raise ValueError(f"Invalid page range: '{part}'")
+        first = int(match.group(1))
+        if match.group(2) is None:
+            last = first
+        elif match.group(2):
+            last = int(match.group(2))
+        elif page_count is not None:
+            last = page_count
+        else:
+            raise ValueError(f"Open page range '{part}' needs a known page count")
+        if first < 1 or last < first:
+            raise ValueError(f"Invalid page range: '{part}'")
+        if page_count is not None:
+            last = min(last, page_count)
+        pages.update(range(first, last + 1))
+    return sorted(pages)
+
+def _selection_titles(selection):
+    """Return the outline section titles requested in a selection."""
+    sections = (selection or {}).get("sections") or []
+    if isinstance(sections, str):
+        sections = sections.split(',')
+    return [title.strip() for title in sections if title.strip()]
+
+def _selected_indices(selection, page_count, outline_ranges=None):
+    """
+    Resolve a selection to 0-based page indices.
+    
+    Args:
+        selection (dict): The selection ("pages" range and/or outline "sections")
+        page_count (int): Number of pages or slides in the document
+        outline_ranges (list): (title, first index, end index) tuples for outline selection
+        
+    Returns:
+        list: Sorted page indices, or None to extract every page
+        
+    Raises:
+        ValueError: If the selection is malformed or matches nothing
+    """
+    if not selection:
+        return None
+    
+    indices = set()
+    pages = selection.get("pages")
+    if pages:
+        if isinstance(pages, str):
+            numbers = parse_page_ranges(pages, page_count)
+        else:
+            numbers = [n for n in pages if 1 <= n <= page_count]
+        indices.update(n - 1 for n in numbers)
+    
+    titles = _selection_titles(selection)
+    if titles:
+        if not outline_ranges:
+            raise ValueError("This document has no outline to select sections from")
+        for wanted in titles:
+            matched = [(first, end) for title, first, end in outline_ranges if wanted.lower() in title.lower()]
+            if not matched:
+                available = ", ".join(title for title, _, _ in outline_ranges[:10])
+                raise ValueError(f"No outline section matches '{wanted}'. Sections include: {available}")
+            for first, end in matched:
+                indices.update(range(first, end))
+    
+    if not pages and not titles:
+        return None
+    if not indices:
+        raise ValueError(f"The selection is outside the document's {page_count} pages or slides")
+    return sorted(indices)
+
+def process_file(file, file_type=None, selection=None):
     """
     Process a file based on its type and extract text content.
     
     Args:
-        file: The file object (from streamlit's file_uploader)
+        file: The file object (from streamlit's file_uploader) or a file path
         file_type: Optional file type to override detection
+        selection (dict): Optional part of the document to extract, with a "pages"
+                          range such as "3-5,8" and/or PDF outline "sections" titles.
+                          Only used by extractors that accept a selection.
         
     Returns:
-        dict: Dictionary with success status and extracted text or error message
+        dict: Dictionary with success status and extracted text or error message.
+              Text extractors also return a "structure" describing the sections
+              of the text (see utils.document_model).
     """
     try:
         if file is None:
             return {"success": False, "error": "No file provided"}
         
         # Get file name and extension
-        file_name = file.name
+        file_name = upload_name(file)
         extension = os.path.splitext(file_name)[1].lower() if not file_type else file_type
         
         logger.info(f"Processing file: {file_name} with extension: {extension}")
         
-        # Handle different file types
-        if extension == '.zip':
-            return process_zip_file(file)
-        elif extension == '.pptx':
-            return process_pptx_file(file)
-        elif extension == '.docx':
-            return process_docx_file(file)
-        elif extension == '.pdf':
-            return process_pdf_file(file)
-        elif extension in ['.py', '.txt']:
-            return process_text_file(file)
-        elif extension == '.ipynb':
-            return process_jupyter_notebook(file)
-        elif extension in ['.mp4', '.mov', '.avi', '.mkv']:
-            return process_video_file(file)
-        else:
+        # Dispatch to the registered extractor for this type
+        extractor = get_extractor(extension, getattr(file, "type", None))
+        if extractor is None:
             return {"success": False, "error": f"Unsupported file type: {extension}"}
+        
+        if selection and _accepts_selection(extractor):
+            return extractor(file, selection=selection)
+        if selection:
+            logger.info(f"Extractor for {extension} does not support selection, extracting everything")
+        return extractor(file)
     
     except Exception as e:
         logger.exception(f"Error processing file: {str(e)}")
         return {"success": False, "error": f"Error processing file: {str(e)}"}
 
+def _process_path(path):
+    """Extract a file from a path; module-level so worker processes can run it."""
+    return process_file(path)
+
+def _run_extractions(paths, max_workers):
+    """Run process_file over paths in worker processes, falling back to threads."""
+    if max_workers <= 1 or len(paths) <= 1:
+        return [_process_path(path) for path in paths]
+    
+    try:
+        # Extraction is CPU-bound (PDF and XML parsing), so processes run files truly in parallel
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_process_path, paths))
+    except (BrokenProcessPool, OSError, NotImplementedError) as e:
+        logger.warning(f"Process pool unavailable ({str(e)}), extracting files in threads")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_process_path, paths))
+
+def process_files(files, max_workers=None):
+    """
+    Extract several uploaded files in parallel.
+    
+    Each upload is copied to a temporary file in chunks and extracted by
+    process_file in a pool of worker processes, so the total time is close to
+    that of the largest file. Video files only have their audio extracted;
+    transcription is left to the caller, which keeps the Whisper model in the
+    main process.
+    
+    Args:
+        files (list): File objects (from streamlit's file_uploader) or file paths
+        max_workers (int): Maximum number of worker processes (defaults to
+                           MAX_FILE_WORKERS, bounded by the CPU count)
+        
+    Returns:
+        list: (file name, result) tuples in upload order, where each result is
+              the dictionary returned by process_file
+    """
+    files = [f for f in files if f is not None]
+    if max_workers is None:
+        max_workers = min(MAX_FILE_WORKERS, os.cpu_count() or 1)
+    max_workers = max(1, min(max_workers, len(files)))
+    names = [upload_name(f) for f in files]
+    
+    with ExitStack() as stack:
+        # Workers receive paths, which are cheap to pass between processes
+        paths = [
+            stack.enter_context(upload_path(f, os.path.splitext(name)[1].lower()))
+            for f, name in zip(files, names)
+        ]
+        logger.info(f"Extracting {len(paths)} files with {max_workers} workers")
+        results = _run_extractions(paths, max_workers)
+    
+    return list(zip(names, results))
+
+def _append_file_section(structure, combined_text, label, file_name, file_content):
+    """Append a '# LABEL: name' block to the combined ZIP text and record it as a file section."""
+    header = f"\n\n# {label}: {file_name}\n"
+    add_section(structure, "file", len(structure["sections"]) + 1, file_name,
+                start=len(combined_text) + 2, content_start=len(combined_text) + len(header))
+    return combined_text + header + file_content
+
 def process_zip_file(zip_file):
     """
     Process a ZIP file containing multiple study materials.
@@ -72,18 +299,14 @@ def process_zip_file(zip_file):
         dict: Dictionary with success status and extracted content or error message
     """
     try:
-        # Create a temporary directory
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Write the zip file to the temporary directory
-            zip_path = os.path.join(temp_dir, 'archive.zip')
-            with open(zip_path, 'wb') as f:
-                f.write(zip_file.getvalue())
-            
+        # Read the archive in place; members are streamed rather than extracted to disk
+        with open_upload(zip_file) as archive:
             # Extract the contents
             combined_text = ""
             file_count = 0
+            structure = new_structure("files")
             
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            with zipfile.ZipFile(archive, 'r') as zip_ref:
                 # Get list of files
                 files = zip_ref.namelist()
                 
@@ -96,60 +319,56 @@ def process_zip_file(zip_file):
                     # Get file extension
                     extension = os.path.splitext(file_name)[1].lower()
                     
-                    # Extract file to temp directory
-                    zip_ref.extract(file_name, temp_dir)
-                    extracted_path = os.path.join(temp_dir, file_name)
-                    
                     # Process based on file type
                     if extension in ['.txt', '.py']:
-                        with open(extracted_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            file_content = f.read()
-                            combined_text += f"\n\n# FILE: {file_name}\n{file_content}"
+                        with zip_ref.open(file_name) as member:
+                            file_content = io.TextIOWrapper(member, encoding='utf-8', errors='ignore').read()
+                            combined_text = _append_file_section(structure, combined_text, "FILE", file_name, file_content)
                             file_count += 1
                     
                     elif extension == '.docx':
                         try:
-                            doc = Document(extracted_path)
+                            from docx import Document
+                            with zip_ref.open(file_name) as member, spool_stream(member) as spooled:
+                                doc = Document(spooled)
                             file_content = '\n'.join([para.text for para in doc.paragraphs])
-                            combined_text += f"\n\n# DOCUMENT: {file_name}\n{file_content}"
+                            combined_text = _append_file_section(structure, combined_text, "DOCUMENT", file_name, file_content)
                             file_count += 1
                         except Exception as e:
                             logger.warning(f"Error processing DOCX file {file_name}: {str(e)}")
                     
                     elif extension == '.pptx':
                         try:
-                            prs = Presentation(extracted_path)
+                            from pptx import Presentation
+                            with zip_ref.open(file_name) as member, spool_stream(member) as spooled:
+                                prs = Presentation(spooled)
                             file_content = '\n'.join([shape.text for slide in prs.slides 
                                                 for shape in slide.shapes if hasattr(shape, "text")])
-                            combined_text += f"\n\n# PRESENTATION: {file_name}\n{file_content}"
+                            combined_text = _append_file_section(structure, combined_text, "PRESENTATION", file_name, file_content)
                             file_count += 1
                         except Exception as e:
                             logger.warning(f"Error processing PPTX file {file_name}: {str(e)}")
                     
                     elif extension == '.pdf':
                         try:
-                            reader = PdfReader(extracted_path)
-                            file_content = ""
-                            for page in reader.pages:
-                                file_content += page.extract_text() + "\n"
-                            combined_text += f"\n\n# PDF: {file_name}\n{file_content}"
+                            from PyPDF2 import PdfReader
+                            with zip_ref.open(file_name) as member, spool_stream(member) as spooled:
+                                reader = PdfReader(spooled)
+                                file_content = ""
+                                for page in reader.pages:
+                                    file_content += page.extract_text() + "\n"
+                            combined_text = _append_file_section(structure, combined_text, "PDF", file_name, file_content)
                             file_count += 1
                         except Exception as e:
                             logger.warning(f"Error processing PDF file {file_name}: {str(e)}")
                     
                     elif extension == '.ipynb':
                         try:
-                            with open(extracted_path, 'r', encoding='utf-8') as f:
-                                nb = nbformat.read(f, as_version=4)
+                            from .notebooks import extract_notebook
+                            with zip_ref.open(file_name) as member:
+                                file_content = extract_notebook(member)["text"]
                             
-                            file_content = ""
-                            for cell in nb.cells:
-                                if cell.cell_type == 'markdown':
-                                    file_content += f"# Markdown\n{cell.source}\n\n"
-                                elif cell.cell_type == 'code':
-                                    file_content += f"# Code\n{cell.source}\n\n"
-                            
-                            combined_text += f"\n\n# JUPYTER NOTEBOOK: {file_name}\n{file_content}"
+                            combined_text = _append_file_section(structure, combined_text, "JUPYTER NOTEBOOK", file_name, file_content)
                             file_count += 1
                         except Exception as e:
                             logger.warning(f"Error processing Jupyter notebook {file_name}: {str(e)}")
@@ -157,54 +376,147 @@ def process_zip_file(zip_file):
             if file_count == 0:
                 return {"success": False, "error": "No valid files found in the ZIP archive"}
             
-            return {"success": True, "text": combined_text, "file_count": file_count}
+            finalize_structure(structure, len(combined_text))
+            return {"success": True, "text": combined_text, "file_count": file_count, "structure": structure}
     
     except Exception as e:
         logger.exception(f"Error processing ZIP file: {str(e)}")
         return {"success": False, "error": f"Error processing ZIP file: {str(e)}"}
 
-def process_pptx_file(pptx_file):
+def process_pptx_file(pptx_file, selection=None):
     """
     Extract text from a PowerPoint presentation.
     
     Args:
         pptx_file: The PPTX file object
+        selection (dict): Optional slides to extract, as a "pages" range (e.g. "3-5,8")
         
     Returns:
         dict: Dictionary with success status and extracted text or error message
     """
     try:
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(suffix='.pptx', delete=False) as temp_file:
-            temp_file.write(pptx_file.getvalue())
-            temp_path = temp_file.name
+        if selection:
+            return _process_pptx_selection(pptx_file, selection)
+        
+        from pptx import Presentation
         
-        # Extract text from the presentation
-        prs = Presentation(temp_path)
+        # Parse the presentation straight from the upload stream
+        with open_upload(pptx_file) as stream:
+            prs = Presentation(stream)
         
         # Get text from slides
         text_content = ""
+        structure = new_structure("slides")
         for i, slide in enumerate(prs.slides):
+            start = len(text_content)
             text_content += f"Slide {i+1}:\n"
+            content_start = len(text_content)
+            
+            title = None
+            if slide.shapes.title is not None and slide.shapes.title.text.strip():
+                title = slide.shapes.title.text
             
             for shape in slide.shapes:
                 if hasattr(shape, "text"):
                     text_content += f"{shape.text}\n"
+                    if title is None and shape.text.strip():
+                        title = shape.text.strip().split('\n')[0]
             
             text_content += "\n"
-        
-        # Delete the temporary file
-        os.unlink(temp_path)
+            add_section(structure, "slide", i + 1, title or f"Slide {i+1}", start, content_start, len(text_content))
         
         if not text_content.strip():
             return {"success": False, "error": "No text content found in the presentation"}
             
-        return {"success": True, "text": text_content}
+        return {"success": True, "text": text_content, "structure": structure}
     
     except Exception as e:
         logger.exception(f"Error processing PowerPoint file: {str(e)}")
         return {"success": False, "error": f"Error processing PowerPoint file: {str(e)}"}
 
+# XML namespaces used when reading selected slides straight from the PPTX package
+PPTX_NAMESPACES = {
+    "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+    "p": "http://schemas.openxmlformats.org/presentationml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+
+def _pptx_slide_part_names(zip_ref):
+    """Return the package part names of the slides, in presentation order."""
+    presentation = ElementTree.fromstring(zip_ref.read("ppt/presentation.xml"))
+    relationships = ElementTree.fromstring(zip_ref.read("ppt/_rels/presentation.xml.rels"))
+    targets = {
+        rel.get("Id"): rel.get("Target")
+        for rel in relationships.iterfind("rel:Relationship", PPTX_NAMESPACES)
+    }
+    
+    part_names = []
+    for slide_id in presentation.iterfind("p:sldIdLst/p:sldId", PPTX_NAMESPACES):
+        target = targets.get(slide_id.get(f"{{{PPTX_NAMESPACES['r']}}}id"))
+        if target:
+            if target.startswith('/'):
+                part_names.append(target.lstrip('/'))
+            else:
+                part_names.append(posixpath.normpath(posixpath.join("ppt", target)))
+    return part_names
+
+def _pptx_slide_text(slide_xml):
+    """Return (title, text) of a slide part, one line per text paragraph."""
+    root = ElementTree.fromstring(slide_xml)
+    title = None
+    shape_texts = []
+    for shape in root.iter(f"{{{PPTX_NAMESPACES['p']}}}sp"):
+        body = shape.find("p:txBody", PPTX_NAMESPACES)
+        if body is None:
+            continue
+        shape_text = '\n'.join(
+            ''.join(run.text or '' for run in paragraph.iter(f"{{{PPTX_NAMESPACES['a']}}}t"))
+            for paragraph in body.iterfind("a:p", PPTX_NAMESPACES)
+        )
+        placeholder = shape.find("p:nvSpPr/p:nvPr/p:ph", PPTX_NAMESPACES)
+        if (title is None and placeholder is not None
+                and placeholder.get("type") in ("title", "ctrTitle") and shape_text.strip()):
+            title = shape_text
+        shape_texts.append(shape_text)
+    
+    if title is None:
+        title = next((t.strip().split('\n')[0] for t in shape_texts if t.strip()), None)
+    return title, ''.join(f"{t}\n" for t in shape_texts)
+
+def _process_pptx_selection(pptx_file, selection):
+    """
+    Extract only the selected slides of a presentation.
+    
+    python-pptx loads and parses every part of the package when it opens a
+    presentation, so selected slides are read directly from the ZIP container
+    instead: only the presentation index and the chosen slide parts are
+    decompressed and parsed.
+    """
+    with open_upload(pptx_file) as stream, zipfile.ZipFile(stream) as zip_ref:
+        part_names = _pptx_slide_part_names(zip_ref)
+        try:
+            indices = _selected_indices(selection, len(part_names))
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        if indices is None:
+            indices = range(len(part_names))
+        
+        text_content = ""
+        structure = new_structure("slides")
+        for index in indices:
+            title, slide_text = _pptx_slide_text(zip_ref.read(part_names[index]))
+            start = len(text_content)
+            text_content += f"Slide {index+1}:\n{slide_text}\n"
+            add_section(structure, "slide", index + 1, title or f"Slide {index+1}",
+                        start, start + len(f"Slide {index+1}:\n"), len(text_content))
+    
+    if not text_content.strip():
+        return {"success": False, "error": "No text content found in the selected slides"}
+    
+    logger.info(f"Extracted {len(structure['sections'])} of {len(part_names)} slides")
+    return {"success": True, "text": text_content, "structure": structure}
+
 def process_docx_file(docx_file):
     """
     Extract text from a Word document.
@@ -216,16 +528,22 @@ def process_docx_file(docx_file):
         dict: Dictionary with success status and extracted text or error message
     """
     try:
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as temp_file:
-            temp_file.write(docx_file.getvalue())
-            temp_path = temp_file.name
-        
-        # Extract text from the document
-        doc = Document(temp_path)
-        
-        # Get text from paragraphs
-        paragraphs = [para.text for para in doc.paragraphs]
+        from docx import Document
+        
+        # Parse the document straight from the upload stream
+        with open_upload(docx_file) as stream:
+            doc = Document(stream)
+        
+        # Get text from paragraphs, recording headings as sections
+        paragraphs = []
+        structure = new_structure("headings")
+        offset = 0
+        for para in doc.paragraphs:
+            style_name = para.style.name if para.style is not None else ""
+            if style_name.startswith("Heading") and para.text.strip():
+                add_section(structure, "heading", len(structure["sections"]) + 1, para.text, offset)
+            paragraphs.append(para.text)
+            offset += len(para.text) + 1
         text_content = '\n'.join(paragraphs)
         
         # Get text from tables
@@ -234,51 +552,101 @@ def process_docx_file(docx_file):
                 row_text = ' | '.join(cell.text for cell in row.cells)
                 text_content += f"\n{row_text}"
         
-        # Delete the temporary file
-        os.unlink(temp_path)
-        
         if not text_content.strip():
             return {"success": False, "error": "No text content found in the document"}
-            
-        return {"success": True, "text": text_content}
+        
+        finalize_structure(structure, len(text_content))
+        return {"success": True, "text": text_content, "structure": structure}
     
     except Exception as e:
         logger.exception(f"Error processing Word file: {str(e)}")
         return {"success": False, "error": f"Error processing Word file: {str(e)}"}
 
-def process_pdf_file(pdf_file):
+def _pdf_outline_ranges(reader, page_count):
+    """
+    Flatten a PDF outline (bookmarks) into page ranges.
+    
+    Each entry runs from its destination page to the page of the next entry at
+    the same or a higher level, so a chapter includes its subsections.
+    
+    Returns:
+        list: (title, first page index, end page index) tuples in outline order
+    """
+    entries = []
+    
+    def walk(items, level):
+        for item in items:
+            if isinstance(item, list):
+                walk(item, level + 1)
+                continue
+            try:
+                page_index = reader.get_destination_page_number(item)
+            except Exception:
+                continue
+            if page_index is not None and page_index >= 0:
+                entries.append((str(item.title).strip(), level, page_index))
+    
+    try:
+        walk(reader.outline, 0)
+    except Exception as e:
+        logger.warning(f"Could not read PDF outline: {str(e)}")
+        return []
+    
+    ranges = []
+    for i, (title, level, first) in enumerate(entries):
+        end = page_count
+        for _, next_level, next_first in entries[i + 1:]:
+            if next_level <= level:
+                end = next_first
+                break
+        ranges.append((title, first, max(end, first + 1)))
+    return ranges
+
+def process_pdf_file(pdf_file, selection=None):
     """
     Extract text from a PDF document.
     
     Args:
         pdf_file: The PDF file object
+        selection (dict): Optional pages to extract, as a "pages" range (e.g. "3-5,8")
+                          and/or outline "sections" titles (e.g. ["Chapter 3"])
         
     Returns:
         dict: Dictionary with success status and extracted text or error message
     """
     try:
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-            temp_file.write(pdf_file.getvalue())
-            temp_path = temp_file.name
-        
-        # Extract text from the PDF
-        reader = PdfReader(temp_path)
+        from PyPDF2 import PdfReader
         
-        # Get text from pages
         text_content = ""
-        for i, page in enumerate(reader.pages):
-            page_text = page.extract_text()
-            if page_text:
-                text_content += f"Page {i+1}:\n{page_text}\n\n"
+        structure = new_structure("pages")
         
-        # Delete the temporary file
-        os.unlink(temp_path)
+        # PyPDF2 reads pages lazily, so keep the stream open while extracting
+        with open_upload(pdf_file) as stream:
+            reader = PdfReader(stream)
+            page_count = len(reader.pages)
+            
+            # Resolve the selection; only the selected pages are parsed
+            outline_ranges = _pdf_outline_ranges(reader, page_count) if _selection_titles(selection) else None
+            try:
+                indices = _selected_indices(selection, page_count, outline_ranges)
+            except ValueError as e:
+                return {"success": False, "error": str(e)}
+            if indices is None:
+                indices = range(page_count)
+            
+            # Get text from pages
+            for i in indices:
+                page_text = reader.pages[i].extract_text()
+                if page_text:
+                    start = len(text_content)
+                    text_content += f"Page {i+1}:\n{page_text}\n\n"
+                    add_section(structure, "page", i + 1, page_text.strip().split('\n')[0],
+                                start, start + len(f"Page {i+1}:\n"), len(text_content))
         
         if not text_content.strip():
             return {"success": False, "error": "No text content found in the PDF"}
             
-        return {"success": True, "text": text_content}
+        return {"success": True, "text": text_content, "structure": structure}
     
     except Exception as e:
         logger.exception(f"Error processing PDF file: {str(e)}")
@@ -296,12 +664,12 @@ def process_text_file(text_file):
     """
     try:
         # Read the text file
-        text_content = text_file.getvalue().decode('utf-8')
+        text_content = read_text(text_file)
         
         if not text_content.strip():
             return {"success": False, "error": "Empty text file"}
             
-        return {"success": True, "text": text_content}
+        return {"success": True, "text": text_content, "structure": parse_structure(text_content)}
     
     except Exception as e:
         logger.exception(f"Error processing text file: {str(e)}")
@@ -311,44 +679,52 @@ def process_jupyter_notebook(ipynb_file):
     """
     Extract code and markdown content from a Jupyter notebook.
     
+    Cell outputs are capped per cell and binary outputs such as images are
+    skipped (see utils.notebooks).
+    
     Args:
         ipynb_file: The iPython notebook file object
         
     Returns:
-        dict: Dictionary with success status and extracted text or error message
+        dict: Dictionary with success status and extracted text or error message,
+              plus an "output_report" describing the cell outputs that were kept
     """
     try:
-        # Read the notebook content
-        notebook_content = ipynb_file.getvalue().decode('utf-8')
+        from .notebooks import extract_notebook
         
-        # Parse the notebook
-        nb = nbformat.reads(notebook_content, as_version=4)
+        # Parse the notebook incrementally from the upload stream
+        with open_upload(ipynb_file) as stream:
+            notebook = extract_notebook(stream)
         
-        # Extract text from cells
-        text_content = ""
-        for i, cell in enumerate(nb.cells):
-            if cell.cell_type == 'markdown':
-                text_content += f"Cell {i+1} (Markdown):\n{cell.source}\n\n"
-            elif cell.cell_type == 'code':
-                text_content += f"Cell {i+1} (Code):\n{cell.source}\n\n"
-                # Include outputs if available
-                if hasattr(cell, 'outputs') and cell.outputs:
-                    for output in cell.outputs:
-                        if output.output_type == 'stream' and 'text' in output:
-                            text_content += f"Output:\n{output.text}\n"
-                        elif output.output_type == 'execute_result' and 'data' in output:
-                            if 'text/plain' in output.data:
-                                text_content += f"Result:\n{output.data['text/plain']}\n"
-        
-        if not text_content.strip():
+        if not notebook["text"].strip():
             return {"success": False, "error": "No content found in the Jupyter notebook"}
-            
-        return {"success": True, "text": text_content}
+        
+        return {
+            "success": True,
+            "text": notebook["text"],
+            "structure": notebook["structure"],
+            "output_report": notebook["output_report"]
+        }
     
     except Exception as e:
         logger.exception(f"Error processing Jupyter notebook: {str(e)}")
         return {"success": False, "error": f"Error processing Jupyter notebook: {str(e)}"}
 
+def _load_video_clip():
+    """Import moviepy's VideoFileClip on first use, or return None if moviepy is unavailable."""
+    try:
+        # moviepy 2.x exposes VideoFileClip at the package root
+        from moviepy import VideoFileClip
+        return VideoFileClip
+    except ImportError:
+        pass
+    try:
+        # moviepy 1.x only provides it through moviepy.editor
+        from moviepy.editor import VideoFileClip
+        return VideoFileClip
+    except ImportError:
+        return None
+
 def process_video_file(video_file):
     """
     Extract audio from a video file and prepare it for transcription.
@@ -357,61 +733,67 @@ def process_video_file(video_file):
         video_file: The video file object
         
     Returns:
-        dict: Dictionary with success status and the audio file object for transcription
+        dict: Dictionary with success status and the path of the extracted audio file for
+              transcription. The caller removes the file once it has been transcribed.
     """
     # Check if moviepy is available
-    if not HAS_MOVIEPY:
+    VideoFileClip = _load_video_clip()
+    if VideoFileClip is None:
         return {
             "success": False, 
             "error": "Video processing is not available. The moviepy module is not installed correctly."
         }
     
+    audio_path = None
     try:
-        # Create a temporary file for the video
-        with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as temp_video_file:
-            temp_video_file.write(video_file.getvalue())
-            video_path = temp_video_file.name
-        
-        # Create a temporary file for the extracted audio
-        audio_path = video_path + ".mp3"
-        
-        # Extract audio from video
-        logger.info(f"Extracting audio from video to {audio_path}")
-        
-        # Since we checked HAS_MOVIEPY at the beginning, we know VideoFileClip is available
-        video = VideoFileClip(video_path)
-        
-        # Check if audio track exists
-        if video.audio is None:
-            # Clean up temporary file
-            os.unlink(video_path)
-            video.close()
-            return {"success": False, "error": "No audio track found in the video file"}
-        
-        video.audio.write_audiofile(audio_path, logger=None)
-        
-        # Close the video file to release resources
-        video.close()
-        
-        # Read the audio file
-        with open(audio_path, 'rb') as audio_file:
-            audio_data = audio_file.read()
-        
-        # Clean up temporary files
-        os.unlink(video_path)
-        os.unlink(audio_path)
-        
-        # Create a file-like object for the audio data
-        import io
-        audio_bytes = io.BytesIO(audio_data)
-        audio_bytes.name = "extracted_audio.mp3"
+        # Create a temporary file for the extracted audio. It is returned by path so the
+        # audio is streamed from disk during transcription instead of held in memory.
+        audio_fd, audio_path = tempfile.mkstemp(suffix=".mp3")
+        os.close(audio_fd)
+        
+        # moviepy needs a real file, so large uploads are copied to disk in chunks
+        suffix = os.path.splitext(upload_name(video_file))[1] or '.mp4'
+        with upload_path(video_file, suffix=suffix) as video_path:
+            # Extract audio from video
+            logger.info(f"Extracting audio from video to {audio_path}")
+            
+            # Since we checked for moviepy at the beginning, we know VideoFileClip is available
+            video = VideoFileClip(video_path)
+            
+            try:
+                # Check if audio track exists
+                if video.audio is None:
+                    remove_temporary_file(audio_path)
+                    return {"success": False, "error": "No audio track found in the video file"}
+                
+                video.audio.write_audiofile(audio_path, logger=None)
+            finally:
+                # Close the video file to release resources
+                video.close()
         
         return {
             "success": True, 
-            "audio_file": audio_bytes, 
+            "audio_file": audio_path, 
+            "temporary_audio": True,
             "message": "Audio extracted from video file for transcription"
         }
     
     except Exception as e:
+        # The audio file is only handed to the caller on success; remove it on any failure,
+        # including a failed upload copy or a video moviepy cannot open
+        if audio_path is not None:
+            remove_temporary_file(audio_path)
         logger.exception(f"Error processing video file: {str(e)}")
-        return {"success": False, "error": f"Error processing video file: {str(e)}"}
\ No newline at end of file
+        return {"success": False, "error": f"Error processing video file: {str(e)}"}
+
+# Built-in extractors
+register_extractor('.zip', process_zip_file, mime_types=['application/zip', 'application/x-zip-compressed'])
+register_extractor('.pptx', process_pptx_file,
+                   mime_types=['application/vnd.openxmlformats-officedocument.presentationml.presentation'])
+register_extractor('.docx', process_docx_file,
+                   mime_types=['application/vnd.openxmlformats-officedocument.wordprocessingml.document'])
+register_extractor('.pdf', process_pdf_file, mime_types=['application/pdf'])
+register_extractor(['.py', '.txt'], process_text_file, mime_types=['text/plain', 'text/x-python'])
+register_extractor('.ipynb', process_jupyter_notebook, mime_types=['application/x-ipynb+json'])
+register_extractor(['.mp4', '.mov', '.avi', '.mkv'], process_video_file,
+                   mime_types=['video/mp4', 'video/quicktime', 'video/x-msvideo', 'video/x-matroska'])
@@ -5,6 +5,9 @@ import logging
 import random
 import time
 import re
+from .text_analysis import get_analysis
+from .summarizer import summarize, sentences_by_rank
+from .response_parser import parse_study_guide, parse_quiz
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -52,6 +55,9 @@ def get_reliable_url(topic, resource_type="Article"):
     # Return a random URL from the appropriate category
     return random.choice(url_templates[resource_type])
 
+# Characters of the input text included in prompts
+PROMPT_TEXT_LIMIT = 10000
+
 # List of AI API endpoints
 # Using more reliable free models that don't require special permissions
 FREE_ENDPOINTS = [
@@ -172,7 +178,7 @@ def get_summary(text, max_bullets=7):
     """
     try:
         # Truncate long inputs
-        truncated_text = text[:10000] + "..." if len(text) > 10000 else text
+        truncated_text = text[:PROMPT_TEXT_LIMIT] + "..." if len(text) > PROMPT_TEXT_LIMIT else text
         
         prompt = (
             f"Create a structured summary of key concepts from this text:\n\n"
@@ -199,25 +205,16 @@ def get_summary(text, max_bullets=7):
             # Create a more structured fallback summary if all APIs fail
             logger.warning("Using fallback structured summary method")
             
-            # Extract sentences and organize by potential topics
-            sentences = re.split(r'(?<=[.!?])\s+', truncated_text)
-            
-            # Find capitalized phrases that might be topics or key terms
-            topics = []
-            key_terms = []
+            # Organize the sentences by potential topics
+            analysis = get_analysis(text)
+            sentences = analysis.sentences_before(PROMPT_TEXT_LIMIT)
             
-            for sentence in sentences:
-                # Look for capitalized multi-word phrases that might be topics
-                topic_matches = re.findall(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+){1,3})', sentence)
-                topics.extend(topic_matches)
-                
-                # Look for capitalized terms that might be key terms
-                term_matches = re.findall(r'\b([A-Z][a-z]{3,})\b', sentence)
-                key_terms.extend(term_matches)
+            # Capitalized multi-word phrases might be topics, capitalized words key terms
+            topics = list(dict.fromkeys(analysis.capitalized_phrases(PROMPT_TEXT_LIMIT)))[:max_bullets]
+            key_terms = list(dict.fromkeys(analysis.capitalized_words(PROMPT_TEXT_LIMIT, min_length=4)))
             
-            # Get unique topics and terms
-            topics = list(set(topics))[:max_bullets]
-            key_terms = list(set(key_terms))
+            # Sentences of the whole text, most central first
+            ranked_sentences = sentences_by_rank(text)
             
             # Build structured summary
             structured_summary = "# Key Concepts Summary\n\n"
@@ -227,12 +224,12 @@ def get_summary(text, max_bullets=7):
                 # Create heading
                 structured_summary += f"## {topic}\n\n"
                 
-                # Add definition - find sentences containing the topic
-                topic_sentences = [s for s in sentences if topic in s]
+                # Add definition - the most central sentences containing the topic
+                topic_sentences = [s for s in ranked_sentences if topic in s] or [s for s in sentences if topic in s]
                 if topic_sentences:
                     structured_summary += f"{topic_sentences[0]}\n\n"
                 
-                # Add bullet points - use nearby sentences
+                # Add bullet points - use the next most central sentences
                 structured_summary += "Key points:\n\n"
                 bullet_count = min(3, len(topic_sentences) - 1)
                 for j in range(bullet_count):
@@ -245,21 +242,13 @@ def get_summary(text, max_bullets=7):
                     structured_summary += f"• {point}\n"
                 structured_summary += "\n"
             
-            # If no topics were found, use generic headings
+            # If no topics were found, list the most central sentences
             if not topics:
-                chunk_size = len(sentences) // max_bullets
-                for i in range(min(max_bullets, len(sentences) // 5)):
-                    start_idx = i * chunk_size
-                    end_idx = min(start_idx + chunk_size, len(sentences))
-                    chunk = sentences[start_idx:end_idx]
-                    
-                    structured_summary += f"## Topic {i+1}\n\n"
-                    if chunk:
-                        structured_summary += f"{chunk[0]}\n\n"
-                        structured_summary += "Key points:\n\n"
-                        for j in range(min(3, len(chunk) - 1)):
-                            point = chunk[j + 1]
-                            structured_summary += f"• {point}\n"
+                key_points = summarize(text, max_bullets)
+                if key_points:
+                    structured_summary += "## Key Points\n\n"
+                    for point in key_points:
+                        structured_summary += f"• {point}\n"
                     structured_summary += "\n"
             
             return {"success": True, "summary": structured_summary}
@@ -393,7 +382,7 @@ def generate_detailed_notes(text, max_sections=3):
     """
     try:
         # Truncate long inputs
-        truncated_text = text[:10000] + "..." if len(text) > 10000 else text
+        truncated_text = text[:PROMPT_TEXT_LIMIT] + "..." if len(text) > PROMPT_TEXT_LIMIT else text
         
         prompt = (
             f"Create detailed study notes on this content with {max_sections} main topic sections. "
@@ -413,12 +402,13 @@ def generate_detailed_notes(text, max_sections=3):
         if not generated_text:
             # Create basic notes from the text if API fails
             sections = []
-            sentences = re.split(r'(?<=[.!?])\s+', truncated_text)
+            analysis = get_analysis(text)
+            sentences = analysis.sentences_before(PROMPT_TEXT_LIMIT)
             
             # Try to identify potential section topics
             potential_topics = []
-            for i, sentence in enumerate(sentences):
-                if len(sentence.split()) <= 10 and len(sentence.split()) >= 3:
+            for i, (sentence, word_count) in enumerate(zip(sentences, analysis.sentence_word_counts)):
+                if word_count <= 10 and word_count >= 3:
                     # Short sentences might be headings/topics
                     if i < len(sentences) - 5:  # Ensure there's content after
                         potential_topics.append((i, sentence))
@@ -586,26 +576,24 @@ def generate_detailed_notes(text, max_sections=3):
         logger.exception(f"Error generating detailed notes: {str(e)}")
         return {"success": False, "error": f"Error generating detailed notes: {str(e)}"}
 
-def generate_study_guide(text):
+def generate_study_guide(text, structure=None):
     """
     Generate a study guide with definitions, key terms, and flashcards using AI APIs.
     
     Args:
         text (str): The text to generate a study guide from
+        structure (dict): Optional document structure of the text
         
     Returns:
         dict: Dictionary with success status and either study guide or error message
     """
     try:
         # Truncate long inputs
-        truncated_text = text[:10000] + "..." if len(text) > 10000 else text
+        truncated_text = text[:PROMPT_TEXT_LIMIT] + "..." if len(text) > PROMPT_TEXT_LIMIT else text
         
-        # Extract slide titles
-        slide_titles = []
-        slide_pattern = r'Slide \d+:?\s*([^0-9\n]+?)(?:\d|$)'
-        matches = re.findall(slide_pattern, truncated_text)
-        if matches:
-            slide_titles = [title.strip() for title in matches if len(title.strip()) > 3]
+        # Look up slide titles within the truncated text
+        analysis = get_analysis(text, structure)
+        slide_titles = analysis.slide_titles(before=len(truncated_text))
         
         # Add slide titles to the prompt if found
         slide_text = ""
@@ -633,86 +621,8 @@ def generate_study_guide(text):
             if not generated_text:
                 return {"success": False, "error": "Unable to generate study guide. Please try again later."}
         
-        # Process and structure the response
-        sections = {
-            "key_terms": [],
-            "important_concepts": [],
-            "flashcards": []
-        }
-        
-        # Try different parsing approaches for key terms
-        # Method 1: Look for clearly marked sections
-        terms_pattern = r'(?:KEY TERMS?|Key Terms?|TERMS?|Terms?|DEFINITIONS?|Definitions?)(?::|;|\n)(.*?)(?:(?:IMPORTANT CONCEPTS|Important Concepts|CONCEPTS|Concepts|FLASHCARDS|Flashcards)|$)'
-        terms_match = re.search(terms_pattern, generated_text, re.DOTALL | re.IGNORECASE)
-        
-        if terms_match:
-            terms_text = terms_match.group(1).strip()
-            # Try different patterns for term:definition pairs
-            term_patterns = [
-                r'[\d\*\-\•]*\s*([^:]+)[:]\s*(.*?)(?=(?:[\d\*\-\•])|$)',  # Standard pattern
-                r'[\d\*\-\•]+\s*([^:]+)[:]\s*(.*?)(?=(?:[\d\*\-\•]+)|$)',  # Numbered items
-                r'([^:]+)[:]\s*(.*?)(?=\n\n|\n[A-Z]|\Z)',                 # Simple term: definition
-                r'([^:]+)[:]\s*(.*?)(?=\n\s*[^:]+:|\Z)'                  # Term: definition until next term
-            ]
-            
-            # Try each pattern
-            term_entries = []
-            for pattern in term_patterns:
-                found_entries = re.findall(pattern, terms_text, re.DOTALL)
-                if found_entries:
-                    term_entries = found_entries
-                    break
-                    
-            # Process found terms
-            for term, definition in term_entries:
-                if term and definition:
-                    term = term.strip()
-                    definition = definition.strip()
-                    # Skip entries that are too short or don't look like real terms
-                    if len(term) > 1 and len(definition) > 5:
-                        sections["key_terms"].append({
-                            "term": term,
-                            "definition": definition
-                        })
-        
-        # Method 2: If section headers aren't clear, look for term-definition patterns directly
-        if not sections["key_terms"]:
-            # Look for patterns like "Term: definition" throughout the text
-            direct_terms = re.findall(r'([A-Z][a-zA-Z\s]{2,20}):\s*((?:[^\n]+\n?){1,3})', generated_text)
-            
-            for term, definition in direct_terms:
-                term = term.strip()
-                definition = definition.strip()
-                if len(term) > 1 and len(definition) > 5 and term.lower() not in ["question", "answer", "q", "a"]:
-                    sections["key_terms"].append({
-                        "term": term,
-                        "definition": definition
-                    })
-        
-        # Extract important concepts with multiple patterns
-        concepts_patterns = [
-            r'(?:IMPORTANT CONCEPTS|Important Concepts|CONCEPTS|Concepts)(?::|;|\n)(.*?)(?:(?:FLASHCARDS|Flashcards)|$)',
-            r'(?:KEY CONCEPTS|Key Concepts)(?::|;|\n)(.*?)(?:(?:FLASHCARDS|Flashcards)|$)'
-        ]
-        
-        for pattern in concepts_patterns:
-            concepts_match = re.search(pattern, generated_text, re.DOTALL | re.IGNORECASE)
-            if concepts_match:
-                concepts_text = concepts_match.group(1).strip()
-                # Try different patterns for bullet points or numbered items
-                concept_patterns = [
-                    r'[\d\*\-\•]+\s*(.*?)(?=(?:[\d\*\-\•]+)|$)',  # Bulleted or numbered
-                    r'(?:^|\n)\s*((?:[^\n]+\n?){1,3})'            # Any paragraph-like chunk
-                ]
-                
-                for cp in concept_patterns:
-                    concept_entries = re.findall(cp, concepts_text, re.DOTALL)
-                    if concept_entries:
-                        for concept in concept_entries:
-                            concept = concept.strip()
-                            if concept and len(concept) > 10:  # Ensure it's not just a short fragment
-                                sections["important_concepts"].append(concept)
-                        break
+        # Parse the response into key terms, concepts and flashcards in one pass
+        sections = parse_study_guide(generated_text)
         
         # Look for concepts directly if the sections approach fails
         if not sections["important_concepts"]:
@@ -724,42 +634,10 @@ def generate_study_guide(text):
                 if any(phrase in sentence.lower() for phrase in key_phrases) and len(sentence) > 20:
                     sections["important_concepts"].append(sentence.strip())
         
-        # Extract flashcards with varied patterns
-        cards_patterns = [
-            r'(?:FLASHCARDS|Flashcards)(?::|;|\n)(.*?)$',
-            r'(?:STUDY CARDS|Study Cards|QUESTION|QUESTIONS)(?::|;|\n)(.*?)$'
-        ]
-        
-        for pattern in cards_patterns:
-            cards_match = re.search(pattern, generated_text, re.DOTALL | re.IGNORECASE)
-            if cards_match:
-                cards_text = cards_match.group(1).strip()
-                
-                # Try various Q&A patterns
-                qa_patterns = [
-                    r'[\d\*\-\•]*\s*(?:Q:|Question:)?\s*([^?]*\?)\s*(?:A:|Answer:)?\s*(.*?)(?=(?:[\d\*\-\•](?:\s*(?:Q:|Question:)))|$)',
-                    r'(?:Q:|Question:)\s*([^?]*\?)\s*(?:A:|Answer:)\s*(.*?)(?=(?:Q:|Question:)|$)',
-                    r'(\d+\.\s*[^?]*\?)\s*(.*?)(?=\d+\.\s*|$)'
-                ]
-                
-                for qap in qa_patterns:
-                    card_entries = re.findall(qap, cards_text, re.DOTALL | re.IGNORECASE)
-                    if card_entries:
-                        for question, answer in card_entries:
-                            question = question.strip()
-                            answer = answer.strip()
-                            if question and answer and "?" in question:
-                                sections["flashcards"].append({
-                                    "question": question,
-                                    "answer": answer
-                                })
-                        break
-        
         # Generate reliable fallback content if we couldn't parse properly
         if not sections["key_terms"]:
-            # Extract capitalized terms that are likely important concepts
-            cap_terms = re.findall(r'\b([A-Z][a-z]{3,}(?:\s+[A-Z]?[a-z]+){0,2})\b', truncated_text)
-            slide_titles = re.findall(r'Slide \d+:?\s*([^0-9\n]+?)(?:\d|$)', truncated_text)
+            # Capitalized terms are likely important concepts
+            cap_terms = analysis.capitalized_terms(PROMPT_TEXT_LIMIT)
             
             potential_terms = []
             
@@ -775,19 +653,14 @@ def generate_study_guide(text):
                     potential_terms.append(term)
             
             # Generate definitions using key sentences containing these terms
+            sentences = analysis.sentences_before(PROMPT_TEXT_LIMIT)
             for i, term in enumerate(potential_terms):
                 if i >= 5:  # Limit to 5 terms
                     break
                 
-                # Find a sentence containing this term to use as definition
-                term_sentences = []
-                sentences = re.split(r'(?<=[.!?])\s+', truncated_text)
-                
-                for sentence in sentences:
-                    if term in sentence and len(sentence) > 20:
-                        term_sentences.append(sentence)
-                
-                definition = term_sentences[0] if term_sentences else f"An important concept related to {term}."
+                # Use the first sentence containing this term as its definition
+                definition = next((sentence for sentence in sentences if term in sentence and len(sentence) > 20),
+                                  f"An important concept related to {term}.")
                 
                 sections["key_terms"].append({
                     "term": term,
@@ -796,7 +669,7 @@ def generate_study_guide(text):
         
         if not sections["important_concepts"]:
             # Extract sentences that seem to define concepts
-            sentences = re.split(r'(?<=[.!?])\s+', truncated_text)
+            sentences = analysis.sentences_before(PROMPT_TEXT_LIMIT)
             concept_sentences = []
             
             # Look for definitional sentences
@@ -805,17 +678,13 @@ def generate_study_guide(text):
                     if len(sentence) > 25:
                         concept_sentences.append(sentence)
             
-            # Add slide headers if available
-            slide_headers = re.findall(r'Slide \d+:\s*([^\n]+)', truncated_text)
-            
             # Take top 5 concepts
             for i, sentence in enumerate(concept_sentences[:5]):
                 sections["important_concepts"].append(sentence)
         
         if not sections["flashcards"]:
             # Generate Q&A pairs from content
-            sentences = re.split(r'(?<=[.!?])\s+', truncated_text)
-            slide_titles = re.findall(r'Slide \d+:?\s*([^0-9\n]+?)(?:\d|$)', truncated_text)
+            sentences = analysis.sentences_before(PROMPT_TEXT_LIMIT)
             
             flashcards_created = 0
             
@@ -877,27 +746,25 @@ def generate_study_guide(text):
         logger.exception(f"Error generating study guide: {str(e)}")
         return {"success": False, "error": f"Error generating study guide: {str(e)}"}
         
-def generate_quiz(text, num_questions=5):
+def generate_quiz(text, num_questions=5, structure=None):
     """
     Generate multiple-choice quiz questions based on the text using AI APIs.
     
     Args:
         text (str): The text to generate questions from
         num_questions (int): Number of questions to generate
+        structure (dict): Optional document structure of the text
         
     Returns:
         dict: Dictionary with success status and either quiz or error message
     """
     try:
         # Truncate long inputs
-        truncated_text = text[:10000] + "..." if len(text) > 10000 else text
+        truncated_text = text[:PROMPT_TEXT_LIMIT] + "..." if len(text) > PROMPT_TEXT_LIMIT else text
         
-        # Extract slide titles and topics for more targeted questions
-        slide_titles = []
-        slide_pattern = r'Slide \d+:?\s*([^0-9\n]+?)(?:\d|$)'
-        matches = re.findall(slide_pattern, truncated_text)
-        if matches:
-            slide_titles = [title.strip() for title in matches if len(title.strip()) > 3]
+        # Look up slide titles within the truncated text for more targeted questions
+        analysis = get_analysis(text, structure)
+        slide_titles = analysis.slide_titles(before=len(truncated_text))
         
         # Add slide titles to the prompt if found
         slide_text = ""
@@ -926,60 +793,14 @@ def generate_quiz(text, num_questions=5):
             if not generated_text:
                 return {"success": False, "error": "Unable to generate quiz. Please try again later."}
         
-        # Process and structure the response
-        quiz_questions = []
-        
-        # Extract questions, options, answers and explanations
-        questions = re.split(r'\d+\.\s+', generated_text)
-        # Remove empty first element if split creates it
-        if questions and not questions[0].strip():
-            questions = questions[1:]
-        
-        for i, q_text in enumerate(questions):
-            if not q_text.strip() or i >= num_questions:
-                continue
-                
-            # Extract question text
-            question_match = re.match(r'([^\n]+)', q_text)
-            if not question_match:
-                continue
-            
-            question = question_match.group(1).strip()
-            
-            # Extract options
-            options = {}
-            option_matches = re.findall(r'([A-D])(?:\.|\))\s+([^\n]+)', q_text)
-            
-            for opt, text in option_matches:
-                options[opt] = text.strip()
-            
-            # If not enough options found, create placeholders
-            while len(options) < 4:
-                missing = [opt for opt in "ABCD" if opt not in options]
-                if not missing:
-                    break
-                options[missing[0]] = f"Option {missing[0]}"
-            
-            # Extract correct answer
-            correct_match = re.search(r'(?:Answer|Correct(?:\s+Answer)?|The correct answer is)[^A-D]*([A-D])', q_text, re.IGNORECASE)
-            correct_answer = correct_match.group(1) if correct_match else "A"
-            
-            # Extract explanation
-            explanation_match = re.search(r'(?:Explanation|Reason)[^\n]*:\s*([^\n]+)', q_text, re.IGNORECASE)
-            explanation = explanation_match.group(1).strip() if explanation_match else "See the text for details."
-            
-            quiz_questions.append({
-                "question": question,
-                "options": options,
-                "correct_answer": correct_answer,
-                "explanation": explanation
-            })
+        # Extract questions, options, answers and explanations in one pass
+        quiz_questions = parse_quiz(generated_text, num_questions)
         
         # Ensure we have the requested number of questions
         if len(quiz_questions) < num_questions:
             # Extract sentences for basic questions if needed
-            sentences = re.split(r'(?<=[.!?])\s+', truncated_text)
-            keywords = re.findall(r'\b[A-Z][a-z]{5,}\b', truncated_text)
+            sentences = analysis.sentences_before(PROMPT_TEXT_LIMIT)
+            keywords = analysis.capitalized_words(PROMPT_TEXT_LIMIT, min_length=6)
             
             for i in range(len(quiz_questions), num_questions):
                 if i < len(sentences) and len(sentences[i].split()) > 5:
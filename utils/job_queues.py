@@ -0,0 +1,541 @@
+"""
+Shared queue and result store for study-kit jobs.
+
+The Streamlit UI submits jobs and polls their status; workers, in the UI
+process or in separate worker processes (see utils.worker), claim and run
+them. Both sides reach the jobs through a queue backend, chosen with the
+JOBS_BACKEND environment variable:
+
+- "sqlite" (default): a SQLite database, with uploaded files spooled to a
+  directory next to it. Any process on the same machine, or with the
+  database and spool directory on a shared volume, can submit and work.
+- "redis": a Redis (or Redis-compatible) server at REDIS_URL, holding the
+  queue, job states, uploaded files and results, so UI and worker processes
+  can run on different hosts. Needs the optional redis package.
+
+Every state change that can race with another process (claiming, progress,
+cancelling, finishing, requeueing) is a single conditional update, so a job is
+never run twice at once and a cancelled job stays cancelled.
+"""
+
+import os
+import json
+import time
+import shutil
+import sqlite3
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from .uploads import iter_chunks, COPY_CHUNK_SIZE
+
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Queue backend: "sqlite" or "redis"
+JOBS_BACKEND = os.environ.get("JOBS_BACKEND", "sqlite").lower()
+
+# SQLite queue database and the directory uploads of its jobs are spooled to
+JOBS_DB_PATH = os.environ.get("JOBS_DB_PATH", os.path.join(tempfile.gettempdir(), "study_assistant", "jobs.sqlite3"))
+JOBS_SPOOL_DIR = os.environ.get("JOBS_SPOOL_DIR", os.path.join(os.path.dirname(JOBS_DB_PATH), "spool"))
+
+# Redis server and the prefix of the keys used for jobs
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+REDIS_KEY_PREFIX = os.environ.get("JOBS_REDIS_PREFIX", "study_assistant:")
+
+# Running jobs whose heartbeat is older than this belong to a dead worker and are queued again
+STALE_JOB_SECONDS = 60
+
+# A job is failed instead of queued again once it has been started this often
+MAX_JOB_ATTEMPTS = 3
+
+# Finished jobs (and their results) are deleted after this many seconds
+JOB_RETENTION_SECONDS = 24 * 60 * 60
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# Errors raised by the queue backends
+QUEUE_ERRORS = (OSError, sqlite3.Error) + ((redis.RedisError,) if HAS_REDIS else ())
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    result BLOB,
+    error TEXT,
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at);
+"""
+
+class SQLiteJobQueue:
+    """Job queue in a SQLite database, with uploads spooled to a local directory."""
+
+    def __init__(self, path=JOBS_DB_PATH, spool_dir=JOBS_SPOOL_DIR):
+        self.path = path
+        self.spool_dir = spool_dir
+        self._local = threading.local()
+        # Set on submission, so idle workers of this process claim the job at once
+        self._wakeup = threading.Event()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection().executescript(SQLITE_SCHEMA)
+
+    def _connection(self):
+        """Return this thread's connection to the database."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Autocommit; the few multi-statement updates open explicit transactions
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        """Run statements in a write transaction, so claiming a job is atomic across processes."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.spool_dir, job_id)
+
+    def submit(self, job_id, kind, payload, files):
+        """Store a job's files and queue it."""
+        try:
+            for i, (name, upload) in enumerate(files):
+                # One subdirectory per file keeps uploads with the same name apart
+                directory = os.path.join(self._job_dir(job_id), str(i))
+                os.makedirs(directory, exist_ok=True)
+                with open(os.path.join(directory, name), "wb") as spooled:
+                    for chunk in iter_chunks(upload):
+                        spooled.write(chunk)
+            self._connection().execute(
+                "INSERT INTO jobs (id, kind, status, payload, message, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, json.dumps(payload), "Waiting for a worker", time.time())
+            )
+        except BaseException:
+            shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+            raise
+        self._wakeup.set()
+
+    def get(self, job_id):
+        """Return a job's status fields, or None."""
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT id, status, progress, message, error, created_at, started_at, finished_at FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["position"] = 0
+        if job["status"] == QUEUED:
+            job["position"] = connection.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < ?", (QUEUED, job["created_at"])
+            ).fetchone()[0]
+        return job
+
+    def result(self, job_id):
+        """Return a job's (status, stored kit, error), or None."""
+        row = self._connection().execute("SELECT status, result, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return None if row is None else (row["status"], row["result"], row["error"])
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns True if it was."""
+        cursor = self._connection().execute(
+            "UPDATE jobs SET status = ?, message = ?, error = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)",
+            (CANCELLED, "Cancelled", "The job was cancelled.", time.time(), job_id, QUEUED, RUNNING)
+        )
+        return bool(cursor.rowcount)
+
+    def claim(self, worker_id, timeout):
+        """Mark the oldest queued job as running and return it, waiting up to timeout seconds for one."""
+        for attempt in range(2):
+            now = time.time()
+            with self._transaction() as connection:
+                row = connection.execute(
+                    "SELECT id, kind, payload FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    connection.execute(
+                        "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, started_at = ?,"
+                        " heartbeat = ?, message = ? WHERE id = ?",
+                        (RUNNING, worker_id, now, now, "Starting", row["id"])
+                    )
+                    return dict(row)
+            if attempt == 0:
+                self._wakeup.wait(timeout)
+                self._wakeup.clear()
+        return None
+
+    @contextmanager
+    def job_files(self, job_id, names):
+        """Provide local paths of a job's files."""
+        yield [os.path.join(self._job_dir(job_id), str(i), name) for i, name in enumerate(names)]
+
+    def progress(self, job_id, worker_id, fraction, message):
+        """Record the progress of a job a worker runs; returns False if it is no longer running there."""
+        cursor = self._connection().execute(
+            "UPDATE jobs SET progress = ?, message = ?, heartbeat = ? WHERE id = ? AND status = ? AND worker = ?",
+            (fraction, message, time.time(), job_id, RUNNING, worker_id)
+        )
+        return bool(cursor.rowcount)
+
+    def finish(self, job_id, worker_id, status, message, result=None, error=None):
+        """
+        Record the outcome of a job a worker runs and drop its files; returns False if it
+        was cancelled meanwhile or requeued to another worker (whose files are kept).
+        """
+        connection = self._connection()
+        cursor = connection.execute(
+            "UPDATE jobs SET status = ?, progress = ?, message = ?, result = ?, error = ?, finished_at = ?"
+            " WHERE id = ? AND status = ? AND worker = ?",
+            (status, 1.0 if status == DONE else 0.0, message, result, error, time.time(), job_id, RUNNING, worker_id)
+        )
+        finished = bool(cursor.rowcount)
+        # A job cancelled while this worker ran it is not run again, so its files can go too
+        if finished or connection.execute(
+            "SELECT 1 FROM jobs WHERE id = ? AND status = ? AND worker = ?", (job_id, CANCELLED, worker_id)
+        ).fetchone():
+            shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+        return finished
+
+    def heartbeat(self, job_ids, worker_id):
+        """Mark the jobs a worker runs as alive."""
+        now = time.time()
+        self._connection().executemany(
+            "UPDATE jobs SET heartbeat = ? WHERE id = ? AND status = ? AND worker = ?",
+            [(now, job_id, RUNNING, worker_id) for job_id in job_ids]
+        )
+
+    def requeue_stale(self):
+        """Queue again the jobs of workers that stopped sending heartbeats, failing those started too often."""
+        cutoff = time.time() - STALE_JOB_SECONDS
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status = ? AND heartbeat < ? AND attempts >= ?",
+                (FAILED, "The job stopped its worker too many times.", time.time(), RUNNING, cutoff, MAX_JOB_ATTEMPTS)
+            )
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, progress = 0, message = ? WHERE status = ? AND heartbeat < ?",
+                (QUEUED, "Waiting for a worker (restarted)", RUNNING, cutoff)
+            )
+        if cursor.rowcount:
+            self._wakeup.set()
+        return cursor.rowcount
+
+    def purge(self, max_age):
+        """Delete finished jobs older than max_age seconds and their files; returns how many."""
+        cutoff = time.time() - max_age
+        placeholders = ", ".join("?" * len(FINISHED_STATES))
+        with self._transaction() as connection:
+            job_ids = [row["id"] for row in connection.execute(
+                f"SELECT id FROM jobs WHERE status IN ({placeholders}) AND finished_at < ?", (*FINISHED_STATES, cutoff)
+            )]
+            connection.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in job_ids])
+        for job_id in job_ids:
+            shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+        return len(job_ids)
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def __str__(self):
+        return f"SQLite queue at {self.path}"
+
+# Conditional state changes of Redis jobs, run atomically on the server
+REDIS_CLAIM_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'status') ~= 'queued' then
+    redis.call('LREM', KEYS[2], 0, ARGV[1])
+    return 0
+end
+redis.call('HSET', KEYS[1], 'status', 'running', 'worker', ARGV[2], 'started_at', ARGV[3],
+           'heartbeat', ARGV[3], 'message', 'Starting')
+redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+return 1
+"""
+
+REDIS_PROGRESS_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'status') ~= 'running' or redis.call('HGET', KEYS[1], 'worker') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+return 1
+"""
+
+# Returns 1 if the outcome was recorded, 2 if the job was cancelled while the
+# worker ran it, 0 if the job was requeued to another worker
+REDIS_FINISH_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'worker') ~= ARGV[2] then
+    return 0
+end
+redis.call('LREM', KEYS[3], 0, ARGV[1])
+if redis.call('HGET', KEYS[1], 'status') ~= 'running' then
+    return 2
+end
+redis.call('HSET', KEYS[1], 'status', ARGV[3], 'progress', ARGV[4], 'message', ARGV[5], 'error', ARGV[6],
+           'finished_at', ARGV[7])
+redis.call('EXPIRE', KEYS[1], ARGV[8])
+if ARGV[9] ~= '' then
+    redis.call('SET', KEYS[2], ARGV[9], 'EX', ARGV[8])
+end
+return 1
+"""
+
+REDIS_CANCEL_SCRIPT = """
+local status = redis.call('HGET', KEYS[1], 'status')
+if status ~= 'queued' and status ~= 'running' then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'status', 'cancelled', 'message', 'Cancelled', 'error', 'The job was cancelled.',
+           'finished_at', ARGV[2])
+redis.call('LREM', KEYS[2], 0, ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+REDIS_REQUEUE_SCRIPT = """
+local status = redis.call('HGET', KEYS[1], 'status')
+if status == 'queued' then
+    return 0
+end
+if status ~= 'running' then
+    redis.call('LREM', KEYS[2], 0, ARGV[1])
+    return 0
+end
+if tonumber(redis.call('HGET', KEYS[1], 'heartbeat') or '0') >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('LREM', KEYS[2], 0, ARGV[1])
+if tonumber(redis.call('HGET', KEYS[1], 'attempts') or '0') >= tonumber(ARGV[3]) then
+    redis.call('HSET', KEYS[1], 'status', 'failed', 'error', 'The job stopped its worker too many times.',
+               'finished_at', ARGV[4])
+    redis.call('EXPIRE', KEYS[1], ARGV[5])
+    return 0
+end
+redis.call('HSET', KEYS[1], 'status', 'queued', 'worker', '', 'progress', '0',
+           'message', 'Waiting for a worker (restarted)')
+redis.call('RPUSH', KEYS[3], ARGV[1])
+return 1
+"""
+
+class RedisJobQueue:
+    """
+    Job queue on a Redis server.
+
+    New job ids are pushed on the left of a queue list and claimed from its
+    right into a running list; each job is a hash, with its stored kit and
+    uploaded files in separate keys. Finished jobs expire after the retention
+    period.
+    """
+
+    def __init__(self, url=REDIS_URL, prefix=REDIS_KEY_PREFIX):
+        if not HAS_REDIS:
+            raise RuntimeError("JOBS_BACKEND=redis needs the redis package (pip install redis)")
+        self.url = url
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+        self.queue_key = f"{prefix}queue"
+        self.running_key = f"{prefix}running"
+        self._claim = self.client.register_script(REDIS_CLAIM_SCRIPT)
+        self._progress = self.client.register_script(REDIS_PROGRESS_SCRIPT)
+        self._finish = self.client.register_script(REDIS_FINISH_SCRIPT)
+        self._cancel = self.client.register_script(REDIS_CANCEL_SCRIPT)
+        self._requeue = self.client.register_script(REDIS_REQUEUE_SCRIPT)
+
+    def _job_key(self, job_id):
+        return f"{self.prefix}job:{job_id}"
+
+    def _result_key(self, job_id):
+        return f"{self.prefix}result:{job_id}"
+
+    def _file_key(self, job_id, index):
+        return f"{self.prefix}file:{job_id}:{index}"
+
+    def _delete_files(self, job_id, count=None):
+        if count is None:
+            count = int(self.client.hget(self._job_key(job_id), "file_count") or 0)
+        if count:
+            self.client.delete(*(self._file_key(job_id, i) for i in range(count)))
+
+    def submit(self, job_id, kind, payload, files):
+        """Store a job's files and queue it."""
+        try:
+            for i, (_, upload) in enumerate(files):
+                # Uploaded in chunks, so neither side holds a whole video in one request
+                key = self._file_key(job_id, i)
+                self.client.set(key, b"", ex=JOB_RETENTION_SECONDS)
+                for chunk in iter_chunks(upload):
+                    self.client.append(key, chunk)
+            pipeline = self.client.pipeline()
+            pipeline.hset(self._job_key(job_id), mapping={
+                "id": job_id, "kind": kind, "status": QUEUED, "payload": json.dumps(payload),
+                "progress": 0, "message": "Waiting for a worker", "error": "", "attempts": 0,
+                "file_count": len(files), "created_at": time.time(),
+            })
+            pipeline.lpush(self.queue_key, job_id)
+            pipeline.execute()
+        except BaseException:
+            self._delete_files(job_id, len(files))
+            raise
+
+    def get(self, job_id):
+        """Return a job's status fields, or None."""
+        fields = {key.decode(): value.decode() for key, value in self.client.hgetall(self._job_key(job_id)).items()}
+        if not fields:
+            return None
+        job = {"id": job_id, "status": fields["status"], "progress": float(fields.get("progress") or 0),
+               "message": fields.get("message", ""), "error": fields.get("error") or None, "position": 0}
+        for field in ("created_at", "started_at", "finished_at"):
+            job[field] = float(fields[field]) if fields.get(field) else None
+        if job["status"] == QUEUED:
+            # Ids are pushed on the left and claimed from the right
+            index = self.client.lpos(self.queue_key, job_id)
+            if index is not None:
+                job["position"] = self.client.llen(self.queue_key) - 1 - index
+        return job
+
+    def result(self, job_id):
+        """Return a job's (status, stored kit, error), or None."""
+        status, error = self.client.hmget(self._job_key(job_id), "status", "error")
+        if status is None:
+            return None
+        return status.decode(), self.client.get(self._result_key(job_id)), (error or b"").decode() or None
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns True if it was."""
+        cancelled = self._cancel(keys=[self._job_key(job_id), self.queue_key],
+                                 args=[job_id, time.time(), JOB_RETENTION_SECONDS])
+        if cancelled:
+            self._delete_files(job_id)
+        return bool(cancelled)
+
+    def claim(self, worker_id, timeout):
+        """Mark the oldest queued job as running and return it, waiting up to timeout seconds for one."""
+        job_id = self.client.brpoplpush(self.queue_key, self.running_key, max(int(timeout), 1))
+        if job_id is None:
+            return None
+        job_id = job_id.decode()
+        if not self._claim(keys=[self._job_key(job_id), self.running_key], args=[job_id, worker_id, time.time()]):
+            # Cancelled while queued
+            return None
+        kind, payload = self.client.hmget(self._job_key(job_id), "kind", "payload")
+        return {"id": job_id, "kind": kind.decode(), "payload": payload.decode()}
+
+    @contextmanager
+    def job_files(self, job_id, names):
+        """Download a job's files to a temporary directory and provide their paths."""
+        directory = tempfile.mkdtemp(prefix="job-")
+        try:
+            paths = []
+            for i, name in enumerate(names):
+                os.makedirs(os.path.join(directory, str(i)))
+                path = os.path.join(directory, str(i), name)
+                key = self._file_key(job_id, i)
+                with open(path, "wb") as local_file:
+                    for start in range(0, self.client.strlen(key), COPY_CHUNK_SIZE):
+                        local_file.write(self.client.getrange(key, start, start + COPY_CHUNK_SIZE - 1))
+                paths.append(path)
+            yield paths
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def progress(self, job_id, worker_id, fraction, message):
+        """Record the progress of a job a worker runs; returns False if it is no longer running there."""
+        return bool(self._progress(keys=[self._job_key(job_id)],
+                                   args=[worker_id, "progress", fraction, "message", message, "heartbeat", time.time()]))
+
+    def finish(self, job_id, worker_id, status, message, result=None, error=None):
+        """
+        Record the outcome of a job a worker runs and drop its files; returns False if it
+        was cancelled meanwhile or requeued to another worker (whose files are kept).
+        """
+        finished = self._finish(
+            keys=[self._job_key(job_id), self._result_key(job_id), self.running_key],
+            args=[job_id, worker_id, status, 1.0 if status == DONE else 0.0, message, error or "", time.time(),
+                  JOB_RETENTION_SECONDS, result or b""]
+        )
+        if finished:
+            self._delete_files(job_id)
+        return finished == 1
+
+    def heartbeat(self, job_ids, worker_id):
+        """Mark the jobs a worker runs as alive."""
+        now = time.time()
+        for job_id in job_ids:
+            self._progress(keys=[self._job_key(job_id)], args=[worker_id, "heartbeat", now])
+
+    def requeue_stale(self):
+        """Queue again the jobs of workers that stopped sending heartbeats, failing those started too often."""
+        cutoff = time.time() - STALE_JOB_SECONDS
+        requeued = 0
+        for job_id in self.client.lrange(self.running_key, 0, -1):
+            job_id = job_id.decode()
+            requeued += self._requeue(keys=[self._job_key(job_id), self.running_key, self.queue_key],
+                                      args=[job_id, cutoff, MAX_JOB_ATTEMPTS, time.time(), JOB_RETENTION_SECONDS])
+        return requeued
+
+    def purge(self, max_age):
+        """Finished Redis jobs expire on their own; returns 0."""
+        return 0
+
+    def close(self):
+        self.client.close()
+
+    def __str__(self):
+        return f"Redis queue at {self.url}"
+
+def open_job_queue(backend=None):
+    """
+    Open the queue backend selected by JOBS_BACKEND.
+
+    Args:
+        backend (str): "sqlite" or "redis"; defaults to JOBS_BACKEND
+
+    Returns:
+        SQLiteJobQueue or RedisJobQueue
+
+    Raises:
+        ValueError: If the backend is unknown
+        RuntimeError: If the redis backend is selected but redis is not installed
+    """
+    backend = backend or JOBS_BACKEND
+    if backend == "sqlite":
+        job_queue = SQLiteJobQueue()
+    elif backend == "redis":
+        job_queue = RedisJobQueue()
+    else:
+        raise ValueError(f"Unknown JOBS_BACKEND {backend!r}; use 'sqlite' or 'redis'")
+    logger.info(f"Using job queue: {job_queue}")
+    return job_queue
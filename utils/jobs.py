@@ -0,0 +1,276 @@
+"""
+Background study-kit jobs.
+
+Generating a study kit can take minutes (transcription, several model calls),
+too long to run inside a Streamlit script run: a rerun or a reconnecting
+browser tab loses the work, and one long transcription ties up its session.
+Instead the app submits a job and keeps only its id. Workers claim queued
+jobs from a shared queue (see job_queues), run them and record their progress
+and results there, so any script run that has the id can poll the job's
+status and pick up its results.
+
+Workers run as a thread pool inside the app process, or as a separate worker
+tier (python -m utils.worker) that scales independently of the UI; set
+JOBS_EMBEDDED_WORKERS=0 on the app when a worker tier is running. Uploaded
+files are stored with the job when it is submitted, since upload objects do
+not outlive the script run, and results are stored in the compact kit format
+(see kit_storage). The pool size caps how many jobs a process runs at once;
+jobs left running by a process that died are queued again once their
+heartbeat goes stale.
+"""
+
+import os
+import json
+import uuid
+import socket
+import logging
+import threading
+from .uploads import upload_name
+from .kit_storage import dump_kit, load_kit
+from .resources import register_resource, get_resource
+from .job_queues import open_job_queue, QUEUE_ERRORS, JOB_RETENTION_SECONDS
+from .job_queues import DONE, FAILED, CANCELLED
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Number of jobs run at once by the worker pool of a process
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+
+# Run a worker pool inside the app process; disable when a separate worker tier runs the jobs
+EMBEDDED_WORKERS = os.environ.get("JOBS_EMBEDDED_WORKERS", "1") != "0"
+
+# Seconds an idle worker waits for a job before checking again
+POLL_INTERVAL = 1.0
+
+# Running jobs refresh their heartbeat (and workers look for stale jobs) this often
+HEARTBEAT_SECONDS = 10
+
+# Input types whose content is uploaded files
+FILE_INPUT_TYPES = ("audio", "file", "files")
+
+class JobCancelled(Exception):
+    """Raised from a job's progress callback once the job has been cancelled."""
+
+# The pool is registered before the queue, so it is stopped before the queue is closed at exit
+def _start_pool():
+    return WorkerPool(JOB_WORKERS)
+
+JOB_POOL = register_resource("job_workers", _start_pool, release=lambda pool: pool.stop())
+JOB_QUEUE = register_resource("job_queue", open_job_queue, release=lambda job_queue: job_queue.close())
+
+def _queue():
+    return get_resource(JOB_QUEUE)
+
+def submit_job(input_type, input_content, selection=None):
+    """
+    Queue the generation of a study kit.
+
+    Args:
+        input_type (str): The type of input (see content_processor.process_input)
+        input_content: The text, URL, uploaded file or list of uploaded files
+        selection (dict): Optional pages/slides or PDF outline sections to extract
+
+    Returns:
+        dict: Dictionary with success status and the job id or error message
+    """
+    job_id = uuid.uuid4().hex
+    files = []
+    if input_type in FILE_INPUT_TYPES:
+        uploads = input_content if input_type == "files" else [input_content]
+        files = [(os.path.basename(upload_name(upload)) or "upload", upload) for upload in uploads]
+    payload = {
+        "input_type": input_type,
+        "input_content": None if files else input_content,
+        "files": [name for name, _ in files],
+        "selection": selection,
+    }
+    try:
+        _queue().submit(job_id, "study_kit", payload, files)
+    except (*QUEUE_ERRORS, RuntimeError, ValueError) as e:
+        logger.error(f"Error submitting job: {str(e)}")
+        return {"success": False, "error": f"Error submitting job: {str(e)}"}
+
+    logger.info(f"Submitted job {job_id} ({input_type})")
+    return {"success": True, "job_id": job_id}
+
+def get_job(job_id):
+    """
+    Return the status of a job.
+
+    Args:
+        job_id (str): The job id
+
+    Returns:
+        dict: {"id", "status", "progress" (0-1), "message", "error", "position"
+               (jobs queued ahead of it), "created_at", "started_at", "finished_at"},
+               or None if there is no such job
+    """
+    return _queue().get(job_id)
+
+def get_job_result(job_id):
+    """
+    Return the study kit generated by a finished job.
+
+    Args:
+        job_id (str): The job id
+
+    Returns:
+        dict: Dictionary with success status and the results or error message
+    """
+    stored = _queue().result(job_id)
+    if stored is None:
+        return {"success": False, "error": "Job not found"}
+    status, data, error = stored
+    if status != DONE:
+        return {"success": False, "error": error or f"Job is {status}"}
+    try:
+        return {"success": True, "results": load_kit(data)}
+    except (ValueError, TypeError) as e:
+        logger.error(f"Error loading result of job {job_id}: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+def cancel_job(job_id):
+    """
+    Cancel a queued or running job. A running job stops at its next progress update.
+
+    Args:
+        job_id (str): The job id
+
+    Returns:
+        bool: True if the job was still queued or running
+    """
+    cancelled = _queue().cancel(job_id)
+    if cancelled:
+        logger.info(f"Cancelled job {job_id}")
+    return cancelled
+
+def purge_jobs(max_age=JOB_RETENTION_SECONDS):
+    """
+    Delete finished jobs older than max_age seconds, and their files.
+
+    Args:
+        max_age (float): Age in seconds
+
+    Returns:
+        int: Number of jobs deleted
+    """
+    return _queue().purge(max_age)
+
+def _progress_callback(job_queue, job_id, worker_id):
+    """Return a process_input progress callback recording a job's progress and detecting cancellation."""
+    def report(fraction, message):
+        if not job_queue.progress(job_id, worker_id, fraction, message):
+            raise JobCancelled(f"Job {job_id} was cancelled")
+    return report
+
+def _run_study_kit(payload, progress):
+    """Generate a study kit from a job payload."""
+    from .content_processor import process_input
+    return process_input(payload["input_type"], payload["input_content"],
+                         selection=payload.get("selection"), progress=progress)
+
+# Job runners by kind, called with the job payload and a progress callback
+JOB_RUNNERS = {"study_kit": _run_study_kit}
+
+def run_job(job, worker_id):
+    """
+    Run a claimed job and record its outcome.
+
+    Args:
+        job (dict): The claimed job ("id", "kind" and "payload")
+        worker_id (str): The worker that claimed it
+    """
+    job_queue = _queue()
+    job_id = job["id"]
+    logger.info(f"Running job {job_id}")
+    try:
+        payload = json.loads(job["payload"])
+        with job_queue.job_files(job_id, payload["files"]) as paths:
+            if paths:
+                payload["input_content"] = paths if payload["input_type"] == "files" else paths[0]
+            results = JOB_RUNNERS[job["kind"]](payload, _progress_callback(job_queue, job_id, worker_id))
+        if results.get("success"):
+            outcome = (DONE, "Done", dump_kit(results), None)
+        else:
+            outcome = (FAILED, "Failed", None, results.get("error") or "Unknown error")
+    except JobCancelled:
+        outcome = (CANCELLED, "Cancelled", None, None)
+    except Exception as e:
+        logger.exception(f"Error running job {job_id}: {str(e)}")
+        outcome = (FAILED, "Failed", None, f"Error processing input: {str(e)}")
+
+    # Only a job that is still running on this worker is updated, so a cancelled job stays
+    # cancelled and a job requeued after a stale heartbeat keeps the outcome of its new run
+    if job_queue.finish(job_id, worker_id, *outcome):
+        logger.info(f"Job {job_id} {outcome[0]}")
+    else:
+        logger.info(f"Job {job_id} was cancelled or taken over by another worker")
+
+class WorkerPool:
+    """
+    Worker threads running queued jobs, plus a thread sending their heartbeats
+    and queueing again the jobs of workers that stopped.
+
+    Args:
+        workers (int): Number of jobs run at once
+    """
+
+    def __init__(self, workers=JOB_WORKERS):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.stop_event = threading.Event()
+        self.running = set()
+        self.threads = [threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                        for i in range(workers)]
+        self.threads.append(threading.Thread(target=self._beat, name="job-heartbeat", daemon=True))
+        try:
+            purge_jobs()
+        except QUEUE_ERRORS as e:
+            logger.warning(f"Error purging old jobs: {str(e)}")
+        for thread in self.threads:
+            thread.start()
+        logger.info(f"Started {workers} job workers ({self.worker_id})")
+
+    def _work(self):
+        while not self.stop_event.is_set():
+            try:
+                job = _queue().claim(self.worker_id, POLL_INTERVAL)
+            except QUEUE_ERRORS as e:
+                logger.error(f"Error claiming job: {str(e)}")
+                self.stop_event.wait(POLL_INTERVAL)
+                continue
+            if job is None:
+                continue
+            self.running.add(job["id"])
+            try:
+                run_job(job, self.worker_id)
+            except QUEUE_ERRORS as e:
+                # The job's heartbeat goes stale and another worker runs it again
+                logger.error(f"Error recording job {job['id']}: {str(e)}")
+            finally:
+                self.running.discard(job["id"])
+
+    def _beat(self):
+        while not self.stop_event.wait(HEARTBEAT_SECONDS):
+            try:
+                job_queue = _queue()
+                job_queue.heartbeat(list(self.running), self.worker_id)
+                requeued = job_queue.requeue_stale()
+                if requeued:
+                    logger.warning(f"Requeued {requeued} jobs of stopped workers")
+            except QUEUE_ERRORS as e:
+                logger.error(f"Error sending job heartbeat: {str(e)}")
+
+    def stop(self, timeout=5):
+        """
+        Stop claiming jobs and wait for the running ones, up to timeout seconds per thread.
+        Jobs still running afterwards are run again elsewhere once their heartbeat goes stale.
+        """
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout)
+
+def start_workers():
+    """Start this process's job worker pool, unless it is running already or a separate worker tier runs the jobs."""
+    if EMBEDDED_WORKERS:
+        get_resource(JOB_POOL)
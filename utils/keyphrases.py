@@ -0,0 +1,164 @@
+"""
+Statistical keyphrase extraction.
+
+Candidate phrases are found RAKE-style in a single regex pass: runs of content
+words between stopwords, numbers and punctuation, together with their shorter
+sub-phrases (up to MAX_PHRASE_WORDS words). Each word is weighted by its log
+frequency, computed with a NumPy bincount over word ids, and a phrase scores
+the sum of its word weights scaled by how often the phrase itself occurs, so
+frequent multi-word concepts ("k-means clustering") rank above one-off phrases.
+"""
+
+import re
+import logging
+import numpy as np
+from .nlp_resources import get_stopwords
+from .document_model import SECTION_MARKER_PATTERN
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Longest candidate phrase; longer runs contribute their sub-phrases
+MAX_PHRASE_WORDS = 3
+MIN_WORD_LENGTH = 2
+
+# Words (including hyphenated words such as "k-means"), numbers, punctuation and line breaks
+TOKEN_PATTERN = re.compile(r"[^\W\d_][\w'’-]*|\d[\w.,]*|[^\w\s]|\n")
+
+# Score multiplier for phrases that also appear in slide or section titles
+TITLE_BOOST = 2.0
+
+# A longer phrase replaces a selected phrase it contains if it has at least this share of its occurrences
+REPLACE_OCCURRENCE_RATIO = 0.5
+
+def _candidate_phrases(text, stop_words):
+    """
+    Split text into candidate phrases in one pass.
+
+    Returns:
+        tuple: (list of lowercase word tuples for every run of content words,
+                dict of phrase -> first surface form)
+    """
+    runs = []
+    surface = {}
+    current = []
+    current_surface = []
+
+    def close():
+        if current:
+            run = tuple(current)
+            runs.append(run)
+            for n in range(1, min(MAX_PHRASE_WORDS, len(run)) + 1):
+                for i in range(len(run) - n + 1):
+                    surface.setdefault(run[i:i + n], ' '.join(current_surface[i:i + n]))
+        current.clear()
+        current_surface.clear()
+
+    # Slide/page/file markers are structure, not content
+    text = SECTION_MARKER_PATTERN.sub('\n', text)
+    for match in TOKEN_PATTERN.finditer(text):
+        token = match.group()
+        lower = token.lower().strip("'’-")
+        if (not token[0].isalpha() or lower in stop_words
+                or len(lower) < MIN_WORD_LENGTH):
+            close()
+            continue
+        current.append(lower)
+        current_surface.append(token.strip("'’-"))
+    close()
+    return runs, surface
+
+def score_keyphrases(text, title_text=""):
+    """
+    Score the candidate phrases of a text.
+
+    Args:
+        text (str): The text to analyze
+        title_text (str): Optional slide/section titles; phrases found there are boosted
+
+    Returns:
+        list: (phrase, score, occurrences) tuples, best first, using each phrase's
+              first surface form
+    """
+    runs, surface = _candidate_phrases(text, get_stopwords())
+    if not runs:
+        return []
+
+    # Word frequencies over all content words
+    vocabulary = {}
+    word_ids = np.fromiter(
+        (vocabulary.setdefault(word, len(vocabulary)) for run in runs for word in run),
+        dtype=np.int64
+    )
+    word_weight = np.log1p(np.bincount(word_ids, minlength=len(vocabulary)))
+
+    # Occurrence counts of every phrase and sub-phrase
+    phrase_counts = dict.fromkeys(surface, 0)
+    for run in runs:
+        for n in range(1, min(MAX_PHRASE_WORDS, len(run)) + 1):
+            for i in range(len(run) - n + 1):
+                phrase_counts[run[i:i + n]] += 1
+
+    unique = list(phrase_counts)
+    counts = np.fromiter(phrase_counts.values(), dtype=np.float64, count=len(unique))
+    lengths = np.fromiter((len(p) for p in unique), dtype=np.int64, count=len(unique))
+    flat_ids = np.fromiter((vocabulary[w] for p in unique for w in p), dtype=np.int64, count=int(lengths.sum()))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    scores = np.add.reduceat(word_weight[flat_ids], starts) * np.log1p(counts)
+
+    # Phrases must recur to count as topics in longer texts
+    if len(runs) > 50:
+        scores[counts < 2] = 0
+
+    order = np.argsort(-scores, kind="stable")
+    title_text = title_text.lower()
+    ranked = []
+    for index in order[:200]:
+        if scores[index] <= 0:
+            break
+        phrase = unique[index]
+        if len(set(phrase)) < len(phrase):
+            # Run-together repetitions such as "clustering clustering"
+            continue
+        score = float(scores[index])
+        if title_text and ' '.join(phrase) in title_text:
+            score *= TITLE_BOOST
+        ranked.append((surface[phrase], score, int(counts[index])))
+    ranked.sort(key=lambda item: -item[1])
+    return ranked
+
+def _word_stems(phrase):
+    """Return the lowercase words of a phrase with plural endings removed."""
+    return frozenset(w[:-1] if len(w) > 3 and w.endswith('s') else w for w in phrase.lower().split())
+
+def extract_keyphrases(text, top_n=5, title_text=""):
+    """
+    Return the top keyphrases of a text.
+
+    Phrases mostly overlapping an already selected phrase are skipped, and a
+    longer phrase containing a selected one replaces it when it accounts for
+    most of its occurrences, so "k-means" is not listed next to "k-means clustering".
+
+    Args:
+        text (str): The text to analyze
+        top_n (int): Number of keyphrases to return
+        title_text (str): Optional slide/section titles; phrases found there are boosted
+
+    Returns:
+        list: Up to top_n keyphrases, best first
+    """
+    selected = []
+    for phrase, score, count in score_keyphrases(text, title_text)[:max(top_n * 10, 50)]:
+        words = _word_stems(phrase)
+        overlapping = [i for i, (_, other, _) in enumerate(selected) if len(words & other) * 2 > len(words) or other <= words]
+        if not overlapping:
+            if len(selected) < top_n:
+                selected.append((phrase, words, count))
+            continue
+        # A longer phrase replaces a selected one it contains when it accounts for
+        # most of its occurrences ("k-means clustering" for "k-means")
+        first = overlapping[0]
+        _, other, other_count = selected[first]
+        if len(overlapping) == 1 and other < words and count >= REPLACE_OCCURRENCE_RATIO * other_count:
+            selected[first] = (phrase, words, other_count)
+    return [phrase for phrase, _, _ in selected]
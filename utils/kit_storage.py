@@ -0,0 +1,234 @@
+"""
+Compact, versioned storage format for study kits.
+
+A stored kit is a small binary header followed by the kit's results dict
+serialized as compact JSON and compressed:
+
+    magic (4 bytes, b"SKIT") | format version (1 byte) | codec (1 byte) | payload
+
+JSON keeps stored kits readable by any version of the app and by other tools;
+it is encoded with orjson when it is installed (several times faster than the
+json module) and compressed with zstandard when it is installed, otherwise with
+zlib. The codec is recorded in the header, so a kit can be loaded by any
+installation that has its codec. Kits are checked against KIT_SCHEMA when they
+are saved and when they are loaded.
+"""
+
+import json
+import zlib
+import struct
+import logging
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# File header: magic bytes, format version and payload codec
+KIT_MAGIC = b"SKIT"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sBB")
+
+# Payload codecs
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODEC_NAMES = {CODEC_NONE: "none", CODEC_ZLIB: "zlib", CODEC_ZSTD: "zstd"}
+
+# Compression levels; both favour speed, since kits are saved on every generation
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 1
+
+# File extension of stored kits
+KIT_EXTENSION = ".kit"
+
+NoneType = type(None)
+
+# Types of the top-level results fields (see content_processor.process_input).
+# Only "success" is required; fields added by later versions are kept as-is.
+KIT_SCHEMA = {
+    "success": bool,
+    "transcript": (str, NoneType),
+    "summary": (str, NoneType),
+    "resources": (list, NoneType),
+    "study_guide": (dict, NoneType),
+    "quiz": (list, NoneType),
+    "detailed_notes": (dict, NoneType),
+    "structure": (dict, NoneType),
+    "dedup_report": (dict, NoneType),
+    "error": (str, NoneType),
+}
+REQUIRED_FIELDS = ("success",)
+
+# Types of the study-guide lists and of quiz questions
+STUDY_GUIDE_SCHEMA = {"key_terms": list, "important_concepts": list, "flashcards": list}
+QUIZ_QUESTION_SCHEMA = {"question": str, "options": dict, "correct_answer": str}
+
+def _type_names(expected):
+    expected = expected if isinstance(expected, tuple) else (expected,)
+    return " or ".join("null" if t is NoneType else t.__name__ for t in expected)
+
+def validate_kit(results):
+    """
+    Check a results dict against the kit schema.
+
+    Args:
+        results (dict): The study kit results
+
+    Returns:
+        list: Descriptions of the schema violations; empty if the kit is valid
+    """
+    if not isinstance(results, dict):
+        return [f"kit must be a dict, not {type(results).__name__}"]
+
+    errors = [f"missing field '{field}'" for field in REQUIRED_FIELDS if field not in results]
+    for field, expected in KIT_SCHEMA.items():
+        if field in results and not isinstance(results[field], expected):
+            errors.append(f"'{field}' must be {_type_names(expected)}, not {type(results[field]).__name__}")
+
+    study_guide = results.get("study_guide")
+    if isinstance(study_guide, dict):
+        for field, expected in STUDY_GUIDE_SCHEMA.items():
+            if field in study_guide and not isinstance(study_guide[field], expected):
+                errors.append(f"'study_guide.{field}' must be {_type_names(expected)}")
+
+    quiz = results.get("quiz")
+    if isinstance(quiz, list):
+        for i, question in enumerate(quiz):
+            if not isinstance(question, dict):
+                errors.append(f"'quiz[{i}]' must be a dict")
+                continue
+            for field, expected in QUIZ_QUESTION_SCHEMA.items():
+                if field in question and not isinstance(question[field], expected):
+                    errors.append(f"'quiz[{i}].{field}' must be {_type_names(expected)}")
+    return errors
+
+def _encode_json(results):
+    if HAS_ORJSON:
+        return orjson.dumps(results, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(results, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _decode_json(payload):
+    if HAS_ORJSON:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+def dump_kit(results, compress=True):
+    """
+    Serialize study kit results to the stored kit format.
+
+    Args:
+        results (dict): The study kit results
+        compress (bool): Compress the payload (zstd if installed, otherwise zlib)
+
+    Returns:
+        bytes: The stored kit
+
+    Raises:
+        ValueError: If the results do not match the kit schema
+    """
+    errors = validate_kit(results)
+    if errors:
+        raise ValueError("Invalid study kit: " + "; ".join(errors))
+
+    payload = _encode_json(results)
+    if not compress:
+        codec = CODEC_NONE
+    elif HAS_ZSTD:
+        codec = CODEC_ZSTD
+        payload = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    else:
+        codec = CODEC_ZLIB
+        payload = zlib.compress(payload, ZLIB_LEVEL)
+    return HEADER.pack(KIT_MAGIC, FORMAT_VERSION, codec) + payload
+
+def load_kit(data):
+    """
+    Deserialize a stored kit.
+
+    Args:
+        data (bytes): The stored kit
+
+    Returns:
+        dict: The study kit results
+
+    Raises:
+        ValueError: If the data is not a stored kit, was written by a newer
+                    format version, uses an unavailable codec or fails the schema
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("Not a stored study kit: data too short")
+    magic, version, codec = HEADER.unpack_from(data)
+    if magic != KIT_MAGIC:
+        raise ValueError("Not a stored study kit: bad header")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Stored study kit has format version {version}; this version reads up to {FORMAT_VERSION}")
+
+    if codec not in CODEC_NAMES:
+        raise ValueError(f"Stored study kit uses unknown codec {codec}")
+    if codec == CODEC_ZSTD and not HAS_ZSTD:
+        raise ValueError("Stored study kit is zstd-compressed; install zstandard to load it")
+
+    payload = memoryview(data)[HEADER.size:]
+    try:
+        if codec == CODEC_ZSTD:
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+        elif codec == CODEC_ZLIB:
+            payload = zlib.decompress(payload)
+        results = _decode_json(bytes(payload))
+    except Exception as e:
+        # zlib.error, zstandard.ZstdError and JSON decode errors
+        raise ValueError(f"Stored study kit is corrupt: {str(e)}")
+    errors = validate_kit(results)
+    if errors:
+        raise ValueError("Invalid study kit: " + "; ".join(errors))
+    return results
+
+def save_kit(results, path, compress=True):
+    """
+    Save study kit results to a file.
+
+    Args:
+        results (dict): The study kit results
+        path (str): Destination file path
+        compress (bool): Compress the payload
+
+    Returns:
+        dict: Dictionary with success status and the file size or error message
+    """
+    try:
+        data = dump_kit(results, compress=compress)
+        with open(path, "wb") as kit_file:
+            kit_file.write(data)
+        logger.info(f"Saved study kit to {path} ({len(data)} bytes, codec {CODEC_NAMES[data[5]]})")
+        return {"success": True, "path": path, "size": len(data)}
+    except (ValueError, OSError) as e:
+        logger.error(f"Error saving study kit: {str(e)}")
+        return {"success": False, "error": f"Error saving study kit: {str(e)}"}
+
+def load_kit_file(path):
+    """
+    Load study kit results from a file.
+
+    Args:
+        path (str): Path of a stored kit
+
+    Returns:
+        dict: Dictionary with success status and the results or error message
+    """
+    try:
+        with open(path, "rb") as kit_file:
+            return {"success": True, "results": load_kit(kit_file.read())}
+    except (ValueError, OSError) as e:
+        logger.error(f"Error loading study kit: {str(e)}")
+        return {"success": False, "error": f"Error loading study kit: {str(e)}"}
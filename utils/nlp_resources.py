@@ -0,0 +1,158 @@
+"""
+Offline access to the NLP resources used by the text-analysis code.
+
+NLTK corpora are never downloaded while the app runs. The tokenizers and
+stopword list are looked up in the local NLTK data directories (see the
+NLTK_DATA environment variable) the first time they are needed. When they are
+missing, or NLTK itself is not installed, a bundled stopword list and
+regex-based tokenizers are used instead, so no network access is needed.
+
+The corpora can be provisioned at build time with:
+
+    python -m utils.nlp_resources --download
+"""
+
+import re
+import logging
+import argparse
+from functools import lru_cache
+from .resources import register_resource, get_resource, release_resource, object_size
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# NLTK resources used by the app, as (download name, nltk.data path) pairs.
+# NLTK 3.9+ loads the Punkt sentence tokenizer from punkt_tab.
+NLTK_RESOURCES = [
+    ("punkt_tab", "tokenizers/punkt_tab/english/"),
+    ("punkt", "tokenizers/punkt"),
+    ("stopwords", "corpora/stopwords"),
+]
+
+# NLTK's English stopword list, bundled for environments without the corpus
+ENGLISH_STOPWORDS = frozenset("""
+i me my myself we our ours ourselves you you're you've you'll you'd your yours
+yourself yourselves he him his himself she she's her hers herself it it's its
+itself they them their theirs themselves what which who whom this that that'll
+these those am is are was were be been being have has had having do does did
+doing a an the and but if or because as until while of at by for with about
+against between into through during before after above below to from up down in
+out on off over under again further then once here there when where why how all
+any both each few more most other some such no nor not only own same so than too
+very s t can will just don don't should should've now d ll m o re ve y ain aren
+aren't couldn couldn't didn didn't doesn doesn't hadn hadn't hasn hasn't haven
+haven't isn isn't ma mightn mightn't mustn mustn't needn needn't shan shan't
+shouldn shouldn't wasn wasn't weren weren't won won't wouldn wouldn't
+""".split())
+
+# Fallback tokenizers
+WORD_PATTERN = re.compile(r"\w+(?:[-'’]\w+)*|[^\w\s]")
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'(?<=[.!?])["\')\]]*\s+(?=["\'(\[]?[A-Z0-9])|\n\s*\n')
+
+@lru_cache(maxsize=None)
+def nltk_resource_available(resource_path):
+    """
+    Check whether an NLTK resource is installed locally, without downloading it.
+
+    Args:
+        resource_path (str): The nltk.data path, e.g. 'corpora/stopwords'
+
+    Returns:
+        bool: True if NLTK is installed and the resource was found
+    """
+    try:
+        import nltk
+    except ImportError:
+        return False
+    try:
+        nltk.data.find(resource_path)
+        return True
+    except LookupError:
+        return False
+
+def _punkt_available():
+    return any(nltk_resource_available(path) for name, path in NLTK_RESOURCES if name.startswith("punkt"))
+
+def _load_stopwords(language):
+    if nltk_resource_available("corpora/stopwords"):
+        try:
+            from nltk.corpus import stopwords
+            return frozenset(stopwords.words(language))
+        except (LookupError, OSError) as e:
+            logger.warning(f"Could not load NLTK stopwords for {language}: {str(e)}")
+    return ENGLISH_STOPWORDS
+
+def get_stopwords(language='english'):
+    """
+    Return the stopwords of a language, loaded once per process and shared by all sessions.
+
+    Args:
+        language (str): The stopword list to load from the NLTK corpus
+
+    Returns:
+        frozenset: The stopwords (the bundled English list if the corpus is unavailable)
+    """
+    name = f"stopwords_{language}"
+    try:
+        return get_resource(name)
+    except KeyError:
+        register_resource(name, lambda: _load_stopwords(language), size=object_size)
+        return get_resource(name)
+
+def word_tokenize(text):
+    """Split text into word and punctuation tokens, with NLTK when its Punkt data is installed."""
+    if _punkt_available():
+        try:
+            from nltk.tokenize import word_tokenize as nltk_word_tokenize
+            return nltk_word_tokenize(text)
+        except LookupError:
+            pass
+    return WORD_PATTERN.findall(text)
+
+def sent_tokenize(text):
+    """Split text into sentences, with NLTK when its Punkt data is installed."""
+    if _punkt_available():
+        try:
+            from nltk.tokenize import sent_tokenize as nltk_sent_tokenize
+            return nltk_sent_tokenize(text)
+        except LookupError:
+            pass
+    return [s.strip() for s in SENTENCE_BOUNDARY_PATTERN.split(text) if s and s.strip()]
+
+def resource_status():
+    """Return a {download name: installed} mapping for the NLTK resources."""
+    return {name: nltk_resource_available(path) for name, path in NLTK_RESOURCES}
+
+def provision(download_dir=None, quiet=True):
+    """
+    Download the NLTK resources, e.g. while building an image.
+
+    Args:
+        download_dir (str): Target directory (defaults to NLTK's own choice; point
+                            NLTK_DATA at it when it is not a default location)
+        quiet (bool): Suppress NLTK's download progress output
+
+    Returns:
+        dict: {download name: installed} after provisioning
+    """
+    import nltk
+
+    for name, path in NLTK_RESOURCES:
+        if not nltk_resource_available(path):
+            nltk.download(name, download_dir=download_dir, quiet=quiet)
+
+    if download_dir and download_dir not in nltk.data.path:
+        nltk.data.path.append(download_dir)
+    nltk_resource_available.cache_clear()
+    release_resource("stopwords_english")
+    return resource_status()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check or provision the NLTK resources used by the app.")
+    parser.add_argument("--download", action="store_true", help="Download missing resources")
+    parser.add_argument("--download-dir", help="Directory to download resources into")
+    args = parser.parse_args()
+
+    status = provision(args.download_dir, quiet=False) if args.download else resource_status()
+    for name, installed in status.items():
+        print(f"{name:<10} {'installed' if installed else 'missing (bundled fallback is used)'}")
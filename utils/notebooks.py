@@ -0,0 +1,245 @@
+"""
+Memory-capped Jupyter notebook extraction.
+
+Notebooks are parsed incrementally with ijson, so a notebook is never held
+in memory as a whole. Cell outputs are capped per cell (keeping the head and
+the tail of long training logs or dataframes), and binary payloads such as
+base64 images are skipped. Each extraction returns an output report
+describing how much output text was kept.
+"""
+
+import logging
+import ijson
+from collections import deque
+from .document_model import new_structure, add_section, finalize_structure
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Output text kept per cell: the first and last characters of all its outputs
+OUTPUT_HEAD_CHARS = 1500
+OUTPUT_TAIL_CHARS = 500
+
+# Output types whose text is included, mapped to their label (v4 and v3 names)
+OUTPUT_LABELS = {
+    "stream": "Output",
+    "execute_result": "Result",
+    "pyout": "Result",
+    "error": "Error",
+    "pyerr": "Error",
+}
+
+# Fields of an output that carry its text, for v4 ("data.text/plain") and v3 ("text") notebooks
+TEXT_FIELDS = ("text", "data.text/plain")
+ERROR_FIELDS = ("ename", "evalue")
+
+class CappedText:
+    """Accumulate text while keeping only its head and tail."""
+
+    def __init__(self, head_chars=OUTPUT_HEAD_CHARS, tail_chars=OUTPUT_TAIL_CHARS):
+        self.head_chars = head_chars
+        self.tail_chars = tail_chars
+        self.head = []
+        self.head_length = 0
+        self.tail = deque()
+        self.tail_length = 0
+        self.total = 0
+
+    def append(self, text):
+        """Add text, discarding whatever falls between the head and the tail."""
+        self.total += len(text)
+        if self.head_length < self.head_chars:
+            taken = text[:self.head_chars - self.head_length]
+            self.head.append(taken)
+            self.head_length += len(taken)
+            text = text[len(taken):]
+        if not text:
+            return
+        self.tail.append(text[-self.tail_chars:])
+        self.tail_length += len(self.tail[-1])
+        while self.tail_length - len(self.tail[0]) >= self.tail_chars:
+            self.tail_length -= len(self.tail.popleft())
+
+    def skip(self, chars):
+        """Count chars omitted elsewhere between the text appended so far and the text appended next."""
+        if not chars:
+            return
+        self.total += chars
+        # Text after the gap must not join the head, and text before it is no longer the tail
+        self.head_chars = self.head_length
+        self.tail.clear()
+        self.tail_length = 0
+
+    def extend(self, other):
+        """Append the text kept by another CappedText, counting what it omitted."""
+        head = ''.join(other.head)
+        tail = ''.join(other.tail)
+        if other.truncated:
+            tail = tail[-other.tail_chars:]
+        self.append(head)
+        self.skip(other.total - len(head) - len(tail))
+        self.append(tail)
+
+    @property
+    def truncated(self):
+        return self.total > self.head_length + self.tail_length
+
+    def render(self):
+        """Return the kept text, marking the omitted middle part."""
+        head = ''.join(self.head)
+        tail = ''.join(self.tail)
+        if not self.truncated:
+            return head + tail
+        tail = tail[-self.tail_chars:]
+        # Cut at line boundaries so no partial lines are kept
+        if '\n' in head:
+            head = head[:head.rindex('\n') + 1]
+        if '\n' in tail[:-1]:
+            tail = tail[tail.index('\n') + 1:]
+        omitted = self.total - len(head) - len(tail)
+        return f"{head}[... {omitted} characters of output omitted ...]\n{tail}"
+
+def _new_cell():
+    return {"cell_type": None, "source": [], "outputs": CappedText(), "output_chars": 0, "truncated": False,
+            "binary_outputs": 0, "binary_chars": 0}
+
+def _new_output():
+    # Output text is capped while it is read, since the output type may only follow it
+    return {"output_type": None, "text": CappedText(), "error": [], "binary": 0}
+
+def _add_output(cell, output):
+    """Append a finished output to the capped output text of its cell."""
+    if output["binary"]:
+        cell["binary_outputs"] += 1
+        cell["binary_chars"] += output["binary"]
+    label = OUTPUT_LABELS.get(output["output_type"])
+    if label is None:
+        return
+    if label == "Error":
+        text = ': '.join(output["error"])
+        if text:
+            cell["outputs"].append(f"{label}:\n{text}\n")
+            cell["output_chars"] += len(text)
+    elif output["text"].total:
+        # The output's own cap carries over, so the cell marker counts everything omitted
+        cell["outputs"].append(f"{label}:\n")
+        cell["outputs"].extend(output["text"])
+        cell["outputs"].append("\n")
+        cell["output_chars"] += output["text"].total
+    cell["truncated"] = cell["outputs"].truncated
+
+def iter_notebook_cells(stream):
+    """
+    Iterate over the cells of a notebook (nbformat v3 or v4), one cell in memory at a time.
+
+    Args:
+        stream: A readable binary stream of the .ipynb file
+
+    Yields:
+        dict: Cells with "cell_type", "source" (list of strings), capped "outputs"
+              and counts of skipped binary outputs
+    """
+    cell = None
+    output = None
+    for prefix, event, value in ijson.parse(stream):
+        # nbformat v3 keeps its cells in worksheets
+        if prefix.startswith("worksheets.item."):
+            prefix = prefix[len("worksheets.item."):]
+        if not prefix.startswith("cells.item"):
+            continue
+
+        if prefix == "cells.item":
+            if event == "start_map":
+                cell = _new_cell()
+            elif event == "end_map" and cell is not None:
+                yield cell
+                cell = None
+            continue
+        if cell is None:
+            continue
+
+        field = prefix[len("cells.item."):]
+        if field == "outputs.item":
+            if event == "start_map":
+                output = _new_output()
+            elif event == "end_map" and output is not None:
+                _add_output(cell, output)
+                output = None
+            continue
+        if event != "string":
+            continue
+
+        # Multi-line strings are stored as lists of lines
+        if field.endswith(".item"):
+            field = field[:-len(".item")]
+        if field == "cell_type":
+            cell["cell_type"] = value
+        elif field in ("source", "input"):
+            cell["source"].append(value)
+        elif output is not None and field.startswith("outputs.item."):
+            _collect_output_field(output, field[len("outputs.item."):], value)
+
+def _collect_output_field(output, field, value):
+    """Store one string field of an output, keeping only its text."""
+    if field == "output_type":
+        output["output_type"] = value
+    elif field in TEXT_FIELDS:
+        output["text"].append(value)
+    elif field in ERROR_FIELDS:
+        output["error"].append(value)
+    elif field.startswith("data.") or field in ("png", "jpeg", "svg", "html", "javascript", "latex", "json"):
+        # Images, HTML and widget payloads are not useful as study text
+        output["binary"] += len(value)
+
+def extract_notebook(stream):
+    """
+    Extract the text of a notebook with capped cell outputs.
+
+    Args:
+        stream: A readable binary stream of the .ipynb file
+
+    Returns:
+        dict: The "text", its "structure" (one section per cell) and an "output_report"
+    """
+    parts = []
+    length = 0
+    structure = new_structure("cells")
+    report = {
+        "cells": 0,
+        "output_chars": 0,
+        "output_chars_kept": 0,
+        "truncated_cells": 0,
+        "binary_outputs_skipped": 0,
+        "binary_chars_skipped": 0,
+    }
+
+    for i, cell in enumerate(iter_notebook_cells(stream)):
+        report["cells"] += 1
+        source = ''.join(cell["source"])
+        if cell["cell_type"] == 'markdown':
+            header = f"Cell {i+1} (Markdown):\n"
+            block = f"{header}{source}\n\n"
+            title = source.strip().split('\n')[0].lstrip('#').strip()
+        elif cell["cell_type"] == 'code':
+            header = f"Cell {i+1} (Code):\n"
+            outputs = cell["outputs"]
+            rendered = outputs.render() + "\n" if outputs.total else ""
+            block = f"{header}{source}\n\n{rendered}"
+            title = source.strip().split('\n')[0]
+            report["output_chars"] += cell["output_chars"]
+            report["output_chars_kept"] += len(rendered)
+            report["truncated_cells"] += int(cell["truncated"])
+            report["binary_outputs_skipped"] += cell["binary_outputs"]
+            report["binary_chars_skipped"] += cell["binary_chars"]
+        else:
+            continue
+        add_section(structure, "cell", i + 1, title, length, length + len(header), length + len(block))
+        parts.append(block)
+        length += len(block)
+
+    text = ''.join(parts)
+    finalize_structure(structure, len(text))
+    if report["truncated_cells"] or report["binary_outputs_skipped"]:
+        logger.info(f"Notebook outputs capped: kept {report['output_chars_kept']} of {report['output_chars']} chars, "
+                    f"skipped {report['binary_outputs_skipped']} binary outputs")
+    return {"text": text, "structure": structure, "output_report": report}
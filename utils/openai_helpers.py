@@ -1,14 +1,28 @@
 import os
 from openai import OpenAI
 import json
+from .resources import register_resource, get_resource
 
-# Initialize OpenAI client
 # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
 # do not change this unless explicitly requested by the user
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
-client = OpenAI(api_key=OPENAI_API_KEY)
 MODEL = "gpt-4o"
 
+# One client (and its HTTP connection pool) per process, shared by all sessions
+OPENAI_CLIENT = register_resource(
+    "openai_client",
+    lambda: OpenAI(api_key=os.environ.get("OPENAI_API_KEY")),
+    release=lambda client: client.close()
+)
+
+def get_client():
+    """
+    Return the shared OpenAI client, creating it on first use.
+
+    Returns:
+        OpenAI: The shared client
+    """
+    return get_resource(OPENAI_CLIENT)
+
 def get_summary(text, max_bullets=7):
     """
     Generate a summary of the given text in bullet points.
@@ -39,7 +53,7 @@ def get_summary(text, max_bullets=7):
         Use markdown formatting throughout for clear, structured presentation.
         """
 
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model=MODEL,
             messages=[{"role": "user", "content": prompt}],
             max_tokens=1000,
@@ -91,7 +105,7 @@ def get_resources(topic, max_resources=3):
         }}
         """
 
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model=MODEL,
             messages=[{"role": "user", "content": prompt}],
             response_format={"type": "json_object"},
@@ -152,7 +166,7 @@ def generate_study_guide(text):
         }}
         """
 
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model=MODEL,
             messages=[{"role": "user", "content": prompt}],
             response_format={"type": "json_object"},
@@ -214,7 +228,7 @@ def generate_quiz(text, num_questions=5):
         }}
         """
 
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model=MODEL,
             messages=[{"role": "user", "content": prompt}],
             response_format={"type": "json_object"},
@@ -245,51 +259,24 @@ def generate_personalized_insights(prompt_text):
     Generate personalized insights based on a user's profile and study content.
     
     Args:
-        prompt_text (str): The full prompt containing resume, LinkedIn, and study content
+        prompt_text (str): The full prompt containing resume, LinkedIn, and study content,
+                           asking for a JSON object with one key per insight field
         
     Returns:
         dict: Dictionary with success status and either insights or error message
     """
+    from .personal_insight import parse_insights
+    
     try:
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model=MODEL,
             messages=[{"role": "user", "content": prompt_text}],
+            response_format={"type": "json_object"},
             max_tokens=2000,
         )
         
         insights_text = response.choices[0].message.content
-        
-        # Extract the various sections
-        sections = {
-            "relevance": extract_section(insights_text, "relates to the person's background"),
-            "alignment": extract_section(insights_text, "align with their skills"),
-            "growth_areas": extract_section(insights_text, "Areas for growth"),
-            "applications": extract_section(insights_text, "apply this knowledge"),
-            "learning_path": extract_section(insights_text, "learning path")
-        }
-        
-        return {"success": True, "insights": sections}
+        return {"success": True, "insights": parse_insights(insights_text)}
     
     except Exception as e:
         return {"success": False, "error": f"Error generating personalized insights: {str(e)}"}
-
-def extract_section(text, section_marker):
-    """Extract a specific section from AI-generated text based on marker phrase"""
-    import re
-    
-    if not text:
-        return "Not available"
-    
-    # Look for the section following the marker
-    pattern = f".*{re.escape(section_marker)}.*?([\\s\\S]+?)(?=\\d\\.|\Z)"
-    match = re.search(pattern, text, re.IGNORECASE)
-    
-    if match:
-        content = match.group(1).strip()
-        return content
-    
-    # If pattern not found, return a segment of text
-    sentences = text.split('.')
-    if len(sentences) > 3:
-        return '. '.join(sentences[:3]).strip() + '.'
-    return text[:200] + "..."
@@ -2,8 +2,14 @@ import logging
 import os
 import io
 import re
+import json
+import hashlib
 import tempfile
 from .file_processor import process_file
+from .uploads import upload_digest
+from .response_parser import split_numbered_sections
+from .profile_digest import build_profile_digest, format_profile_digest, skill_overlap
+from .text_analysis import get_analysis
 from . import content_processor
 
 # Set up logging
@@ -63,7 +69,174 @@ def extract_text_from_linkedin(linkedin_file):
         logger.exception(f"Error extracting text from LinkedIn profile: {str(e)}")
         return {"success": False, "error": f"Error extracting text from LinkedIn profile: {str(e)}"}
 
-def generate_personal_insights(resume_text, linkedin_text, study_content):
+# Number of parsed profile texts kept per session cache
+MAX_CACHED_PROFILES = 8
+
+def profile_cache_key(kind, upload):
+    """
+    Return the cache key of a profile upload: its kind and a hash of its contents.
+
+    Args:
+        kind (str): "resume" or "linkedin"
+        upload: The uploaded file object, or a LinkedIn URL string
+
+    Returns:
+        str: A key that is the same for identical uploads
+    """
+    if isinstance(upload, str):
+        # LinkedIn URLs are hashed as text
+        digest = hashlib.sha256(upload.encode("utf-8")).hexdigest()
+    else:
+        digest = upload_digest(upload)
+    return f"{kind}:{digest}"
+
+def extract_profile_text(kind, upload, cache=None):
+    """
+    Extract the text of a resume or LinkedIn upload, reusing a cached result.
+
+    Successful extractions are stored in the cache under the upload's content
+    hash, so the same files are only parsed once per session.
+
+    Args:
+        kind (str): "resume" or "linkedin"
+        upload: The uploaded file object, or a LinkedIn URL string
+        cache (dict): Optional cache of extracted texts, e.g. kept in the session state
+
+    Returns:
+        dict: Dictionary with success status and extracted text or error message
+    """
+    extract = extract_text_from_resume if kind == "resume" else extract_text_from_linkedin
+    if cache is None:
+        return extract(upload)
+
+    key = profile_cache_key(kind, upload)
+    if key in cache:
+        logger.info(f"Using cached {kind} text")
+        return {"success": True, "text": cache[key]}
+
+    result = extract(upload)
+    if result["success"]:
+        _cache_put(cache, key, result["text"])
+    return result
+
+def _cache_put(cache, key, value):
+    """Store a value in a profile cache, dropping the oldest entry when it is full."""
+    if len(cache) >= MAX_CACHED_PROFILES:
+        del cache[next(iter(cache))]
+    cache[key] = value
+
+def get_profile_digest(resume_text, linkedin_text, cache=None):
+    """
+    Return the digest of a profile, building it once per profile text.
+
+    Args:
+        resume_text (str): Text of the resume ("" if none)
+        linkedin_text (str): Text of the LinkedIn profile ("" if none)
+        cache (dict): Optional cache, e.g. kept in the session state
+
+    Returns:
+        dict: The profile digest (see profile_digest.build_profile_digest)
+    """
+    if cache is None:
+        return build_profile_digest(resume_text, linkedin_text)
+    key = "digest:" + hashlib.sha256(f"{resume_text}\0{linkedin_text}".encode("utf-8")).hexdigest()
+    if key not in cache:
+        _cache_put(cache, key, build_profile_digest(resume_text, linkedin_text))
+    return cache[key]
+
+# Insight fields, in the order of the numbered points of the prompt
+INSIGHT_FIELDS = [
+    ("relevance", "How this content relates to the person's background and experience"),
+    ("alignment", "Specific aspects that align with their skills and career goals"),
+    ("growth_areas", "Areas for growth and development based on their profile"),
+    ("applications", "How they might apply this knowledge in their current or future roles"),
+    ("learning_path", "Customized learning path recommendations"),
+]
+
+def build_insight_prompt(resume_text, linkedin_text, study_content, as_json=False, digest=None):
+    """
+    Build the insight prompt, asking for numbered points or for a JSON object.
+
+    Args:
+        resume_text: Text content from resume
+        linkedin_text: Text content from LinkedIn profile
+        study_content: Text content from the study materials
+        as_json (bool): Ask for a JSON object with one key per insight field
+        digest (dict): Optional profile digest, sent instead of the raw profile texts
+
+    Returns:
+        str: The prompt
+    """
+    if as_json:
+        keys = ", ".join(f'"{field}" ({description.lower()})' for field, description in INSIGHT_FIELDS)
+        instructions = f"Return a JSON object with these string keys: {keys}."
+    else:
+        points = "\n".join(f"{i}. {description}" for i, (_, description) in enumerate(INSIGHT_FIELDS, 1))
+        instructions = f"Provide insights on:\n{points}"
+
+    if digest is not None:
+        profile = f"PROFILE:\n{format_profile_digest(digest)}\n\n"
+    else:
+        # Inputs are limited to avoid token limits
+        profile = f"RESUME:\n{resume_text[:2000]}\n\nLINKEDIN PROFILE:\n{linkedin_text[:2000]}\n\n"
+    return (
+        "Based on the following information, provide personalized learning insights and recommendations:\n\n"
+        f"{profile}"
+        f"STUDY CONTENT:\n{study_content[:3000]}\n\n"
+        f"{instructions}\n"
+    )
+
+def _excerpt(text):
+    """Return the first sentences of a response, for fields that could not be found in it."""
+    sentences = text.split('.', 3)
+    if len(sentences) > 3:
+        return '. '.join(sentence.strip() for sentence in sentences[:3]) + '.'
+    return text[:200] + "..."
+
+def parse_insights(response):
+    """
+    Fill the insight fields from a model response.
+
+    A JSON object response is read by key; otherwise the response is split into
+    its numbered points in a single pass, and fields missing from it get an
+    excerpt of the response.
+
+    Args:
+        response (str): The model response
+
+    Returns:
+        dict: One text per insight field
+    """
+    if not response:
+        return {field: "Not available" for field, _ in INSIGHT_FIELDS}
+
+    values = None
+    fallback = None
+    if response.lstrip().startswith("{"):
+        try:
+            data = json.loads(response)
+            if isinstance(data, dict):
+                values = []
+                fallback = "Not available"
+                for field, _ in INSIGHT_FIELDS:
+                    value = data.get(field)
+                    if isinstance(value, list):
+                        value = "\n".join(f"- {item}" for item in value)
+                    values.append(str(value).strip() if value else None)
+        except json.JSONDecodeError:
+            logger.warning("Insights response is not valid JSON, splitting it into numbered sections")
+    if values is None:
+        values = split_numbered_sections(response, len(INSIGHT_FIELDS))
+
+    insights = {}
+    for (field, _), value in zip(INSIGHT_FIELDS, values):
+        if not value:
+            fallback = fallback or _excerpt(response)
+            value = fallback
+        insights[field] = value
+    return insights
+
+def generate_personal_insights(resume_text, linkedin_text, study_content, digest=None):
     """
     Generate personalized insights based on resume, LinkedIn profile, and study content.
     
@@ -71,6 +244,7 @@ def generate_personal_insights(resume_text, linkedin_text, study_content):
         resume_text: Text content from resume
         linkedin_text: Text content from LinkedIn profile
         study_content: Text content from the study materials
+        digest (dict): Optional profile digest, sent instead of the raw profile texts
         
     Returns:
         dict: Dictionary with success status and insights or error message
@@ -79,59 +253,17 @@ def generate_personal_insights(resume_text, linkedin_text, study_content):
         # Use OpenAI or fallback to generate insights
         logger.info("Generating personalized insights")
         
-        # Create a combined prompt for insight generation
-        prompt = f"""
-        Based on the following information, provide personalized learning insights and recommendations:
-        
-        RESUME:
-        {resume_text[:2000]}  # Limit to 2000 chars to avoid token limits
-        
-        LINKEDIN PROFILE:
-        {linkedin_text[:2000]}  # Limit to 2000 chars to avoid token limits
-        
-        STUDY CONTENT:
-        {study_content[:3000]}  # Limit to 3000 chars to avoid token limits
-        
-        Provide insights on:
-        1. How this content relates to the person's background and experience
-        2. Specific aspects that align with their skills and career goals
-        3. Areas for growth and development based on their profile
-        4. How they might apply this knowledge in their current or future roles
-        5. Customized learning path recommendations
-        """
-        
-        # Use the content processor wrapper mechanism 
-        openai_api_key = os.environ.get("OPENAI_API_KEY")
-        
-        if openai_api_key:
-            # If OpenAI key is available, try using it first
+        # If OpenAI key is available, try it first, with a structured JSON response
+        if os.environ.get("OPENAI_API_KEY"):
             try:
-                # Use OpenAI directly
-                from openai import OpenAI
-                client = OpenAI(api_key=openai_api_key)
-                MODEL = "gpt-4o"  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024
+                from .openai_helpers import generate_personalized_insights
                 
-                response = client.chat.completions.create(
-                    model=MODEL,
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=2000,
+                result = generate_personalized_insights(
+                    build_insight_prompt(resume_text, linkedin_text, study_content, as_json=True, digest=digest)
                 )
-                
-                insights_text = response.choices[0].message.content
-                
-                # Extract the various sections
-                insights_result = {
-                    "success": True,
-                    "insights": {
-                        "relevance": extract_section(insights_text, "relates to the person's background"),
-                        "alignment": extract_section(insights_text, "align with their skills"),
-                        "growth_areas": extract_section(insights_text, "Areas for growth"),
-                        "applications": extract_section(insights_text, "apply this knowledge"),
-                        "learning_path": extract_section(insights_text, "learning path")
-                    }
-                }
-                
-                return insights_result
+                if result["success"]:
+                    return result
+                logger.warning(f"OpenAI insights generation failed: {result['error']}")
             except Exception as e:
                 logger.exception(f"Error with OpenAI insights generation: {str(e)}")
                 # Fall through to free AI option
@@ -139,19 +271,10 @@ def generate_personal_insights(resume_text, linkedin_text, study_content):
         # Use free AI helper as fallback
         from .free_ai_helpers import make_api_request
         
-        api_response = make_api_request(prompt)
+        api_response = make_api_request(build_insight_prompt(resume_text, linkedin_text, study_content, digest=digest))
         
         if api_response:
-            return {
-                "success": True,
-                "insights": {
-                    "relevance": extract_section(api_response, "relates to the person's background"),
-                    "alignment": extract_section(api_response, "align with their skills"),
-                    "growth_areas": extract_section(api_response, "Areas for growth"),
-                    "applications": extract_section(api_response, "apply this knowledge"),
-                    "learning_path": extract_section(api_response, "learning path")
-                }
-            }
+            return {"success": True, "insights": parse_insights(api_response)}
         else:
             # Simple fallback if all AI methods fail
             return {
@@ -169,26 +292,7 @@ def generate_personal_insights(resume_text, linkedin_text, study_content):
         logger.exception(f"Error generating personal insights: {str(e)}")
         return {"success": False, "error": f"Error generating personal insights: {str(e)}"}
 
-def extract_section(text, section_marker):
-    """Extract a specific section from AI-generated text based on marker phrase"""
-    if not text:
-        return "Not available"
-    
-    # Look for the section following the marker
-    pattern = f".*{re.escape(section_marker)}.*?([\\s\\S]+?)(?=\\d\\.|\Z)"
-    match = re.search(pattern, text, re.IGNORECASE)
-    
-    if match:
-        content = match.group(1).strip()
-        return content
-    
-    # If pattern not found, return a segment of text
-    sentences = text.split('.')
-    if len(sentences) > 3:
-        return '. '.join(sentences[:3]).strip() + '.'
-    return text[:200] + "..."
-
-def process_profile_data(resume_file, linkedin_file, study_content):
+def process_profile_data(resume_file, linkedin_file, study_content, text_cache=None):
     """
     Process profile data (resume and LinkedIn) and generate insights.
     
@@ -196,20 +300,23 @@ def process_profile_data(resume_file, linkedin_file, study_content):
         resume_file: The resume file object
         linkedin_file: The LinkedIn profile file object
         study_content: The study content text
+        text_cache (dict): Optional cache of parsed profile texts and digests
         
     Returns:
-        dict: Dictionary with success status and insights or error message
+        dict: Dictionary with success status, insights (or error message) and
+              the local skill-to-topic relevance of the kit
     """
     try:
         result = {
             "success": False,
             "insights": None,
+            "relevance": None,
             "error": None
         }
         
         # Process resume
         if resume_file:
-            resume_result = extract_text_from_resume(resume_file)
+            resume_result = extract_profile_text("resume", resume_file, text_cache)
             if not resume_result["success"]:
                 return {"success": False, "error": f"Error processing resume: {resume_result['error']}"}
             resume_text = resume_result["text"]
@@ -218,15 +325,20 @@ def process_profile_data(resume_file, linkedin_file, study_content):
         
         # Process LinkedIn profile
         if linkedin_file:
-            linkedin_result = extract_text_from_linkedin(linkedin_file)
+            linkedin_result = extract_profile_text("linkedin", linkedin_file, text_cache)
             if not linkedin_result["success"]:
                 return {"success": False, "error": f"Error processing LinkedIn profile: {linkedin_result['error']}"}
             linkedin_text = linkedin_result["text"]
         else:
             linkedin_text = "No LinkedIn profile provided."
         
+        # Reduce the profile to a compact digest and match it against the kit's key topics locally
+        digest = get_profile_digest(resume_text if resume_file else "", linkedin_text if linkedin_file else "", text_cache)
+        if study_content:
+            result["relevance"] = skill_overlap(digest, get_analysis(study_content).key_topics)
+
         # Generate insights
-        insights_result = generate_personal_insights(resume_text, linkedin_text, study_content)
+        insights_result = generate_personal_insights(resume_text, linkedin_text, study_content, digest=digest)
         if insights_result["success"]:
             result["insights"] = insights_result["insights"]
             result["success"] = True
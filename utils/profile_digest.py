@@ -0,0 +1,187 @@
+"""
+Compact profile digests for personalized insights.
+
+A resume and LinkedIn profile are reduced once to a digest of the person's
+skills, roles and seniority, a few hundred characters instead of the
+thousands of characters of raw profile text. The insight prompts send the
+digest, and the digest's skills are matched locally against the key topics
+of each study kit, giving an instant relevance hint without a model call.
+"""
+
+import re
+import logging
+from .keyphrases import extract_keyphrases
+from .text_analysis import content_terms
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Headings of skill sections ("Skills", "Technical Skills:", "Tools & Technologies"),
+# optionally followed by the skills after a colon
+SKILL_HEADING_PATTERN = re.compile(
+    r'^[ \t#*_]*(?-i:(?:(?:[A-Z][\w/]*|&)[ \t]+){0,3})(skills|technologies|tools|competencies|expertise)'
+    r'[ \t*_]*(?::[ \t*_]*(.*))?$',
+    re.IGNORECASE
+)
+
+# Other section headings, which end a skill section
+HEADING_PATTERN = re.compile(r'^[ \t#*_]*[A-Z][A-Za-z &/]{2,40}[ \t*_]*:?[ \t*_]*$')
+
+# Separators between skills listed on one line
+SKILL_SEPARATOR_PATTERN = re.compile(r'\s*(?:[,;|•·]|\s-\s)\s*')
+
+# Job titles: up to three capitalized words followed by a role noun
+ROLE_PATTERN = re.compile(
+    r'\b((?:[A-Z][\w+#/.-]*[ \t]+){0,3}'
+    r'(?:Engineer|Developer|Scientist|Analyst|Manager|Consultant|Designer|Architect|Researcher'
+    r'|Intern|Student|Teacher|Professor|Director|Specialist|Administrator|Officer|Founder))\b'
+)
+
+# "5 years", "10+ years of experience"
+YEARS_PATTERN = re.compile(r'\b(\d{1,2})\+?\s*(?:years?|yrs?)\b', re.IGNORECASE)
+
+# Seniority levels implied by words in job titles, most senior first
+SENIORITY_BY_TITLE_WORD = [
+    ("executive", ("chief", "director", "head", "vp", "founder")),
+    ("senior", ("senior", "lead", "principal", "staff", "manager", "architect")),
+    ("junior", ("junior", "associate", "assistant")),
+    ("student", ("intern", "student", "trainee")),
+]
+
+# Digest size limits
+MAX_DIGEST_SKILLS = 25
+MAX_DIGEST_ROLES = 5
+MAX_SKILL_CHARS = 40
+
+# Keyphrases of the profile text added to the listed skills
+PROFILE_KEYPHRASES = 15
+
+# Keyphrases made only of these words are resume vocabulary, not skills
+GENERIC_PROFILE_TERMS = {
+    "experience", "year", "work", "worked", "team", "skill", "technical", "responsibilitie", "responsibility",
+    "summary", "profile", "education", "present", "role", "position", "project", "company", "professional",
+}
+
+# Keyphrases with one of these words name organizations, not skills
+ORGANIZATION_TERMS = {"inc", "corp", "ltd", "llc", "gmbh", "university", "college", "school", "institute"}
+
+# Key topics of a kit that profile skills are matched against
+MAX_MATCHED_TOPICS = 10
+
+def _skill_section_items(text):
+    """Return the items listed in the skill sections of a profile."""
+    items = []
+    in_section = False
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        heading = SKILL_HEADING_PATTERN.match(line)
+        if heading:
+            in_section = True
+            line = heading.group(2) or ""
+            if not line:
+                continue
+        elif HEADING_PATTERN.match(line):
+            in_section = False
+            continue
+        if in_section:
+            items.extend(SKILL_SEPARATOR_PATTERN.split(line.lstrip("-*• ")))
+    return items
+
+def _unique(values, limit):
+    """Deduplicate values case-insensitively, keeping the first form, up to a limit."""
+    unique = {}
+    for value in values:
+        value = value.strip(" .:-*_")
+        if value and value.lower() not in unique:
+            unique[value.lower()] = value
+            if len(unique) >= limit:
+                break
+    return list(unique.values())
+
+def _is_skill_phrase(phrase, excluded):
+    """Return True if a profile keyphrase looks like a skill rather than a name, role or heading."""
+    terms = set(content_terms(phrase))
+    return (bool(terms) and phrase.lower() not in excluded
+            and not terms <= GENERIC_PROFILE_TERMS and not terms & ORGANIZATION_TERMS)
+
+def _seniority(roles, years):
+    """Estimate a seniority level from job titles and years of experience."""
+    title_words = {word.lower() for role in roles for word in role.split()}
+    for level, words in SENIORITY_BY_TITLE_WORD:
+        if title_words.intersection(words):
+            return level
+    if years is None:
+        return "unknown"
+    if years < 2:
+        return "junior"
+    return "mid-level" if years < 5 else "senior"
+
+def build_profile_digest(resume_text, linkedin_text=""):
+    """
+    Reduce a resume and LinkedIn profile to their skills, roles and seniority.
+
+    Args:
+        resume_text (str): Text of the resume ("" if none)
+        linkedin_text (str): Text of the LinkedIn profile ("" if none)
+
+    Returns:
+        dict: {"skills": [str], "roles": [str], "seniority": str, "years": int or None}
+    """
+    text = "\n\n".join(part for part in (resume_text, linkedin_text) if part)
+    roles = _unique((match.group(1) for match in ROLE_PATTERN.finditer(text)), MAX_DIGEST_ROLES)
+
+    # Roles and the first line of each profile (usually the person's name) are not skills
+    excluded = {role.lower() for role in roles}
+    excluded.update(line.strip().lower() for text_part in (resume_text, linkedin_text)
+                    for line in text_part.strip().split("\n", 1)[:1])
+    listed = [item for item in _skill_section_items(text)
+              if 1 < len(item) <= MAX_SKILL_CHARS and item.lower() not in excluded and not YEARS_PATTERN.search(item)]
+    keyphrases = [phrase for phrase in extract_keyphrases(text, PROFILE_KEYPHRASES)
+                  if _is_skill_phrase(phrase, excluded)]
+    skills = _unique(listed + keyphrases, MAX_DIGEST_SKILLS)
+    years = max((int(match.group(1)) for match in YEARS_PATTERN.finditer(text)), default=None)
+
+    digest = {"skills": skills, "roles": roles, "seniority": _seniority(roles, years), "years": years}
+    logger.info(f"Built profile digest: {len(skills)} skills, {len(roles)} roles, {digest['seniority']}")
+    return digest
+
+def format_profile_digest(digest):
+    """
+    Format a profile digest for a prompt.
+
+    Args:
+        digest (dict): A profile digest
+
+    Returns:
+        str: A few lines listing the roles, seniority and skills
+    """
+    seniority = digest["seniority"]
+    if digest.get("years") is not None:
+        seniority += f" ({digest['years']} years of experience)"
+    return (
+        f"Roles: {', '.join(digest['roles']) or 'not stated'}\n"
+        f"Seniority: {seniority}\n"
+        f"Skills: {', '.join(digest['skills']) or 'not stated'}"
+    )
+
+def skill_overlap(digest, topics):
+    """
+    Score how well a profile's skills cover the key topics of a study kit.
+
+    A topic matches when it shares a content word (ignoring case and plurals)
+    with one of the skills.
+
+    Args:
+        digest (dict): A profile digest
+        topics (list): Key topics or terms of the kit, most important first
+
+    Returns:
+        dict: {"score": share of the topics matched (0-1), "matched_topics": [str]}
+    """
+    skill_terms = {term for skill in digest["skills"] for term in content_terms(skill)}
+    topics = [topic for topic in topics[:MAX_MATCHED_TOPICS] if content_terms(topic)]
+    matched = [topic for topic in topics if skill_terms.intersection(content_terms(topic))]
+    score = len(matched) / len(topics) if topics else 0.0
+    return {"score": score, "matched_topics": matched}
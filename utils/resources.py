@@ -0,0 +1,182 @@
+"""
+Process-wide registry of heavy shared resources.
+
+The Whisper model, the OpenAI client and the NLTK stopwords are expensive to
+build and safe to share, so every session served by a process should use the
+same instance. Modules register a factory under a name; the first call to
+get_resource builds the instance (under a per-resource lock, so concurrent
+sessions never build it twice and loading one resource does not block the
+others) and every later call returns it. The registry is plain module state,
+which Streamlit shares between all sessions of a server process, so it needs
+no framework-specific cache and works the same from the CLI and workers.
+
+Each resource can have a release hook (e.g. closing a client's connection
+pool), is released at interpreter exit, and records its load time and an
+estimate of its memory use for resource_stats().
+"""
+
+import os
+import sys
+import time
+import atexit
+import logging
+import threading
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+# Marker for resources that are registered but not loaded
+_NOT_LOADED = object()
+
+def _process_memory():
+    """Return the resident memory of this process in bytes, or None if it cannot be measured."""
+    if HAS_PSUTIL:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+class _Resource:
+    """A registered resource and its bookkeeping."""
+
+    def __init__(self, name, factory, release=None, size=None):
+        self.name = name
+        self.factory = factory
+        self.release = release
+        self.size = size
+        self.instance = _NOT_LOADED
+        self.lock = threading.Lock()
+        self.load_seconds = None
+        self.memory_bytes = None
+
+def register_resource(name, factory, release=None, size=None):
+    """
+    Register a shared resource, unless one is already registered under the name.
+
+    Args:
+        name (str): Unique resource name
+        factory (callable): Builds the instance; called at most once until released
+        release (callable): Optional hook called with the instance when it is released
+        size (callable): Optional function returning the instance's memory use in bytes;
+                         by default the growth of the process memory during loading is used
+
+    Returns:
+        str: The name, for use with get_resource
+    """
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = _Resource(name, factory, release, size)
+    return name
+
+def get_resource(name):
+    """
+    Return the shared instance of a resource, building it on first use.
+
+    Args:
+        name (str): A registered resource name
+
+    Returns:
+        The instance
+
+    Raises:
+        KeyError: If no resource is registered under the name
+    """
+    resource = _registry[name]
+    instance = resource.instance
+    if instance is not _NOT_LOADED:
+        return instance
+
+    with resource.lock:
+        if resource.instance is _NOT_LOADED:
+            memory_before = _process_memory() if resource.size is None else None
+            start = time.perf_counter()
+            instance = resource.factory()
+            resource.load_seconds = time.perf_counter() - start
+            if resource.size is not None:
+                resource.memory_bytes = resource.size(instance)
+            elif memory_before is not None:
+                resource.memory_bytes = max(_process_memory() - memory_before, 0)
+            resource.instance = instance
+            memory = f", ~{resource.memory_bytes / 2 ** 20:.1f} MiB" if resource.memory_bytes is not None else ""
+            logger.info(f"Loaded shared resource {name} in {resource.load_seconds:.2f} s{memory}")
+        return resource.instance
+
+def release_resource(name):
+    """
+    Release a loaded resource, calling its release hook; it is rebuilt on next use.
+
+    Args:
+        name (str): A registered resource name
+
+    Returns:
+        bool: True if the resource was loaded
+    """
+    resource = _registry.get(name)
+    if resource is None:
+        return False
+    with resource.lock:
+        instance = resource.instance
+        if instance is _NOT_LOADED:
+            return False
+        resource.instance = _NOT_LOADED
+        resource.memory_bytes = None
+    if resource.release is not None:
+        try:
+            resource.release(instance)
+        except Exception as e:
+            logger.warning(f"Error releasing shared resource {name}: {str(e)}")
+    logger.info(f"Released shared resource {name}")
+    return True
+
+def release_all():
+    """Release every loaded resource, e.g. at shutdown."""
+    for name in list(_registry):
+        release_resource(name)
+
+def resource_stats():
+    """
+    Describe the registered resources.
+
+    Returns:
+        list: One dict per resource with "name", "loaded", "load_seconds" and "memory_bytes"
+    """
+    return [
+        {
+            "name": resource.name,
+            "loaded": resource.instance is not _NOT_LOADED,
+            "load_seconds": resource.load_seconds,
+            "memory_bytes": resource.memory_bytes,
+        }
+        for resource in list(_registry.values())
+    ]
+
+def object_size(value, depth=2):
+    """
+    Estimate the memory of a container resource (such as a stopword set) in bytes.
+
+    Args:
+        value: The container
+        depth (int): How many levels of nested containers to include
+
+    Returns:
+        int: Size of the container and its elements
+    """
+    size = sys.getsizeof(value)
+    if depth > 0 and isinstance(value, (set, frozenset, list, tuple)):
+        size += sum(object_size(item, depth - 1) for item in value)
+    elif depth > 0 and isinstance(value, dict):
+        size += sum(object_size(k, depth - 1) + object_size(v, depth - 1) for k, v in value.items())
+    return size
+
+atexit.register(release_all)
@@ -0,0 +1,287 @@
+"""
+Single-pass parsing of free-tier model responses.
+
+The free models answer the study-guide and quiz prompts in loosely formatted
+text: section headings, "Term: definition" lines, bullets, "Q:"/"A:" pairs,
+numbered questions with lettered options. Instead of trying a series of
+whole-response regexes (which backtrack badly on long outputs), the response
+is read once, line by line, by a small state machine. Every pattern is
+precompiled, anchored and applied to a single line, without nested
+quantifiers, so parsing time is linear in the length of the response.
+"""
+
+import re
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Study-guide section headings, optionally numbered, bold or markdown headings
+SECTION_HEADING_PATTERN = re.compile(
+    r'^(?:#+|\d+[.)])?[ \t*_]*'
+    r'(key terms?(?: and definitions)?|terms?|definitions?|important concepts?|key concepts?|concepts?'
+    r'|flashcards?|study cards?|questions?)'
+    r'[ \t*_]*(?:[:;][ \t*_]*(.*))?$',
+    re.IGNORECASE
+)
+SECTION_BY_HEADING = {
+    "key term": "key_terms", "key terms and definition": "key_terms", "term": "key_terms", "definition": "key_terms",
+    "important concept": "important_concepts", "key concept": "important_concepts", "concept": "important_concepts",
+    "flashcard": "flashcards", "study card": "flashcards", "question": "flashcards",
+}
+
+# List item markers: bullets and numbers
+ITEM_PATTERN = re.compile(r'^(?:[-*•]|\d+[.)])\s+')
+
+# "Term: definition", with an optional bold term
+TERM_DEFINITION_PATTERN = re.compile(r'^\**([^:*]{2,80}?)\**\s*:\s*(.+)$')
+
+# Flashcard question and answer lines
+CARD_QUESTION_PATTERN = re.compile(r'^(?:Q(?:uestion)?\s*\d*\s*[:.)])\s*(.*)$', re.IGNORECASE)
+CARD_ANSWER_PATTERN = re.compile(r'^(?:A(?:nswer)?\s*[:.)])\s*(.*)$', re.IGNORECASE)
+INLINE_ANSWER_PATTERN = re.compile(r'\s(?:A|Answer):\s', re.IGNORECASE)
+
+# Quiz lines: numbered questions, lettered options, answers and explanations
+QUIZ_QUESTION_PATTERN = re.compile(r'^(?:Q(?:uestion)?\s*)?(\d+)\s*[.):]\s*(.*)$', re.IGNORECASE)
+QUIZ_OPTION_PATTERN = re.compile(r'^\(?([A-D])[.)]\s+(.+)$')
+QUIZ_ANSWER_PATTERN = re.compile(r'(?:correct answer|answer|correct)(?: is)?\W{0,10}((?-i:[A-D]))\b', re.IGNORECASE)
+QUIZ_EXPLANATION_PATTERN = re.compile(r'^\W{0,5}(?:explanation|reason)[^:]{0,40}:\s*(.*)$', re.IGNORECASE)
+
+# Terms that are flashcard labels rather than key terms
+NON_TERMS = {"question", "answer", "q", "a"}
+
+def _clean_line(line):
+    """Strip whitespace and surrounding bold markers (but not "* " bullets) from a line."""
+    line = line.strip()
+    if line.startswith(('**', '__')) or line.endswith(('**', '__')):
+        line = line.strip('*_').strip()
+    return line
+
+def _strip_item(line):
+    """Remove a leading bullet or number, returning (text, whether it was a list item)."""
+    match = ITEM_PATTERN.match(line)
+    if match:
+        return _clean_line(line[match.end():]), True
+    return line, False
+
+def _add(parts, text):
+    """Add a line to the parts of an entry's field; fields are joined once, when parsing ends."""
+    if text:
+        parts.append(text)
+
+def _join(parts):
+    """Join the parts of an entry's field into its text."""
+    return " ".join(parts)
+
+def parse_study_guide(response):
+    """
+    Parse a study-guide response into key terms, important concepts and flashcards.
+
+    Args:
+        response (str): The model response
+
+    Returns:
+        dict: {"key_terms": [{"term", "definition"}], "important_concepts": [str],
+               "flashcards": [{"question", "answer"}]}
+    """
+    sections = {"key_terms": [], "important_concepts": [], "flashcards": []}
+    # "Term: definition" lines outside any section, used if there is no key-terms section
+    loose_terms = []
+    section = None
+    # The entry and field that continuation lines are added to; while parsing, concepts,
+    # definitions and card questions and answers are lists of lines, so that long entries
+    # are joined once instead of being rebuilt for every line
+    current = None
+    concept_open = False
+    card = None
+
+    for raw_line in response.splitlines():
+        line = _clean_line(raw_line)
+        if not line:
+            # Blank lines end multi-line concepts and definitions
+            if section != "flashcards":
+                current = None
+                concept_open = False
+            continue
+
+        heading = SECTION_HEADING_PATTERN.match(line)
+        if heading and heading.group(2) and heading.group(1).lower().startswith("question"):
+            # "Question: ...?" is a flashcard, not a heading
+            heading = None
+        if heading:
+            section = SECTION_BY_HEADING[heading.group(1).lower().rstrip('s')]
+            current = None
+            concept_open = False
+            line = (heading.group(2) or "").strip()
+            if not line:
+                continue
+
+        question = CARD_QUESTION_PATTERN.match(line)
+        answer = CARD_ANSWER_PATTERN.match(line) if not question and card is not None else None
+        text, is_item = _strip_item(line)
+
+        if question:
+            # "Q: ...? A: ..." may be on one line
+            text = question.group(1)
+            inline = INLINE_ANSWER_PATTERN.search(text)
+            card = {"question": [], "answer": []}
+            _add(card["question"], (text[:inline.start()] if inline else text).strip())
+            if inline:
+                _add(card["answer"], text[inline.end():].strip())
+            sections["flashcards"].append(card)
+            current = (card, "answer" if inline else "question")
+        elif answer:
+            _add(card["answer"], answer.group(1).strip())
+            current = (card, "answer")
+        elif section == "flashcards":
+            if text.endswith("?") and (is_item or current is None or current[0]["answer"]):
+                # "1. What is ...?" followed by its answer
+                card = {"question": [text], "answer": []}
+                sections["flashcards"].append(card)
+                current = (card, "answer")
+            elif current is not None:
+                entry, field = current
+                # Only the last line of a question can hold a "?"; the answer starts after it
+                if field == "question" and entry["question"] and "?" in entry["question"][-1]:
+                    field = "answer"
+                    current = (entry, field)
+                _add(entry[field], text)
+        elif section == "important_concepts":
+            if is_item or not concept_open:
+                sections["important_concepts"].append([text])
+                concept_open = True
+            else:
+                _add(sections["important_concepts"][-1], text)
+        else:
+            term_definition = TERM_DEFINITION_PATTERN.match(text)
+            if term_definition:
+                entry = {"term": term_definition.group(1).strip(), "definition": [term_definition.group(2).strip()]}
+                if section == "key_terms":
+                    sections["key_terms"].append(entry)
+                    current = (entry, "definition")
+                elif entry["term"][:1].isupper() and len(entry["term"]) <= 20 and entry["term"].lower() not in NON_TERMS:
+                    loose_terms.append(entry)
+                    current = (entry, "definition")
+            elif current is not None and current[1] == "definition":
+                entry, field = current
+                _add(entry[field], text)
+
+    if not sections["key_terms"]:
+        sections["key_terms"] = loose_terms
+    key_terms = ({"term": t["term"], "definition": _join(t["definition"])} for t in sections["key_terms"])
+    sections["key_terms"] = [t for t in key_terms if len(t["term"]) > 1 and len(t["definition"]) > 5]
+    concepts = (_join(c) for c in sections["important_concepts"])
+    sections["important_concepts"] = [c for c in concepts if len(c) > 10]
+    cards = ({"question": _join(c["question"]), "answer": _join(c["answer"])} for c in sections["flashcards"])
+    sections["flashcards"] = [c for c in cards if c["answer"] and "?" in c["question"]]
+    return sections
+
+def parse_quiz(response, max_questions=None):
+    """
+    Parse a multiple-choice quiz response.
+
+    Args:
+        response (str): The model response
+        max_questions (int): Maximum number of questions to return
+
+    Returns:
+        list: Questions as {"question", "options" (A-D), "correct_answer", "explanation"}
+    """
+    questions = []
+    question = None
+    field = None
+
+    for raw_line in response.splitlines():
+        line = _clean_line(raw_line)
+        if not line:
+            continue
+
+        explanation = QUIZ_EXPLANATION_PATTERN.match(line)
+        option = QUIZ_OPTION_PATTERN.match(line)
+        numbered = QUIZ_QUESTION_PATTERN.match(line) if not option else None
+
+        if numbered and numbered.group(2):
+            if max_questions and len(questions) >= max_questions:
+                break
+            # The question and explanation are lists of lines until parsing ends
+            question = {"question": [numbered.group(2).strip()], "options": {}, "correct_answer": None, "explanation": []}
+            questions.append(question)
+            field = "question"
+            continue
+        if question is None:
+            continue
+
+        if explanation:
+            question["explanation"] = []
+            _add(question["explanation"], explanation.group(1).strip())
+            field = "explanation"
+        elif option:
+            question["options"][option.group(1)] = option.group(2).strip()
+            field = None
+        else:
+            answer = QUIZ_ANSWER_PATTERN.search(line)
+            if answer and question["correct_answer"] is None:
+                question["correct_answer"] = answer.group(1).upper()
+                field = None
+            elif field:
+                _add(question[field], line)
+
+    for question in questions:
+        question["question"] = _join(question["question"])
+        question["explanation"] = _join(question["explanation"])
+        # Fill in missing options, answers and explanations
+        question["options"] = {letter: question["options"].get(letter, f"Option {letter}") for letter in "ABCD"}
+        question["correct_answer"] = question["correct_answer"] or "A"
+        question["explanation"] = question["explanation"] or "See the text for details."
+    return questions
+
+# Starts of numbered sections: "1.", "2)", "**3.", "### 4." at the very start of a line;
+# only a heading marker may be followed by a space (indented numbers belong to nested lists)
+NUMBERED_SECTION_PATTERN = re.compile(r'^(?:#+[ \t]*)?[*_]*(\d{1,2})[.)]', re.MULTILINE)
+
+# Longest bold or colon-terminated title dropped from the start of a section
+MAX_SECTION_TITLE_CHARS = 100
+
+def _strip_section_title(body):
+    """Drop a leading "**Title**:" or "Title:" line from a section body, if text follows it."""
+    body = body.strip()
+    if body.startswith(("**", "__")):
+        close = body.find(body[:2], 2)
+        if 0 < close <= MAX_SECTION_TITLE_CHARS:
+            rest = body[close + 2:].lstrip(" \t:-–")
+            if rest.strip():
+                return rest.strip()
+    first_line, _, rest = body.partition("\n")
+    if len(first_line) <= MAX_SECTION_TITLE_CHARS and first_line.rstrip(" *_").endswith(":") and rest.strip():
+        return rest.strip()
+    return body
+
+def split_numbered_sections(response, count):
+    """
+    Split a response to a numbered prompt ("1. ... 2. ...") into its sections in one scan.
+
+    A section starts at a top-level number (not indented) that is the next
+    expected one, so indented nested lists stay inside their section. A nested
+    list that is not indented is split wherever it reaches the next section
+    number.
+
+    Args:
+        response (str): The model response
+        count (int): Number of sections the prompt asked for
+
+    Returns:
+        list: count section bodies, with titles removed; None for missing sections
+    """
+    starts = []
+    for match in NUMBERED_SECTION_PATTERN.finditer(response):
+        if int(match.group(1)) == len(starts) + 1:
+            starts.append((match.start(), match.end()))
+            if len(starts) == count:
+                break
+
+    sections = [None] * count
+    for number, (_, body_start) in enumerate(starts):
+        body_end = starts[number + 1][0] if number + 1 < len(starts) else len(response)
+        body = _strip_section_title(response[body_start:body_end])
+        sections[number] = body or None
+    return sections
@@ -0,0 +1,195 @@
+"""
+BM25 retrieval over transcript chunks for targeted prompts.
+
+A transcript is cut into chunks along its structure (one chunk per slide, page
+or cell; long sections and unstructured text are split at paragraph or sentence
+boundaries). The BM25 index over the chunks is built once per transcript and
+kept on its shared text analysis. Each generator then sends the model only the
+chunks most relevant to its own queries (the quiz topics, the study-guide key
+terms, the note sections) instead of the first characters of the transcript,
+so prompts stay small and late-lecture material is covered too.
+"""
+
+import math
+import logging
+from collections import Counter, defaultdict
+import numpy as np
+from .document_model import get_sections
+from .text_analysis import get_analysis, content_terms
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Target chunk size; sections longer than this are split
+CHUNK_CHARS = 1200
+
+# Characters of retrieved context sent with a prompt
+PROMPT_CONTEXT_CHARS = 10000
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+def _split_span(text, start, end, max_chars=CHUNK_CHARS):
+    """Split text[start:end] into spans of at most max_chars, preferring paragraph and sentence ends."""
+    spans = []
+    while end - start > max_chars:
+        limit = start + max_chars
+        cut = -1
+        for separator in ('\n\n', '\n', '. ', ' '):
+            position = text.rfind(separator, start + max_chars // 2, limit)
+            if position != -1:
+                cut = position + len(separator)
+                break
+        if cut == -1:
+            cut = limit
+        spans.append((start, cut))
+        start = cut
+    if text[start:end].strip():
+        spans.append((start, end))
+    return spans
+
+def chunk_spans(text, structure):
+    """
+    Cut a text into retrieval chunks along its sections.
+
+    Args:
+        text (str): The text
+        structure (dict): Its document structure
+
+    Returns:
+        list: (start, end) character spans in document order
+    """
+    spans = []
+    position = 0
+    for section in get_sections(structure):
+        if section["start"] > position:
+            # Text before the first section
+            spans.extend(_split_span(text, position, section["start"]))
+        spans.extend(_split_span(text, section["start"], section["end"]))
+        position = section["end"]
+    if position < len(text):
+        spans.extend(_split_span(text, position, len(text)))
+    return spans
+
+class BM25Index:
+    """Okapi BM25 index over the chunks of a text."""
+
+    def __init__(self, text, structure):
+        self.text = text
+        self.spans = chunk_spans(text, structure)
+        self.postings = defaultdict(lambda: ([], []))
+        lengths = []
+        for chunk_id, (start, end) in enumerate(self.spans):
+            counts = Counter(content_terms(text[start:end]))
+            lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                chunk_ids, frequencies = self.postings[term]
+                chunk_ids.append(chunk_id)
+                frequencies.append(count)
+
+        self.lengths = np.asarray(lengths, dtype=np.float64)
+        average_length = self.lengths.mean() if len(lengths) and self.lengths.mean() > 0 else 1.0
+        self.length_norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths / average_length)
+        n_chunks = len(self.spans)
+        self.postings = {
+            term: (np.asarray(chunk_ids), np.asarray(frequencies, dtype=np.float64),
+                   math.log(1 + (n_chunks - len(chunk_ids) + 0.5) / (len(chunk_ids) + 0.5)))
+            for term, (chunk_ids, frequencies) in self.postings.items()
+        }
+
+    def __len__(self):
+        return len(self.spans)
+
+    def chunk(self, chunk_id):
+        start, end = self.spans[chunk_id]
+        return self.text[start:end]
+
+    def scores(self, query):
+        """Return the BM25 score of every chunk for a query."""
+        scores = np.zeros(len(self.spans))
+        for term in set(content_terms(query)):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            chunk_ids, frequencies, idf = posting
+            scores[chunk_ids] += idf * frequencies * (BM25_K1 + 1) / (frequencies + self.length_norm[chunk_ids])
+        return scores
+
+    def search(self, query, top_k=None):
+        """
+        Find the chunks most relevant to a query.
+
+        Args:
+            query (str): Words or a phrase to search for
+            top_k (int): Maximum number of chunks to return; None for all matches
+
+        Returns:
+            list: Matching chunk ids, best first
+        """
+        scores = self.scores(query)
+        matches = np.flatnonzero(scores > 0)
+        ranked = matches[np.argsort(-scores[matches], kind="stable")]
+        return ranked[:top_k].tolist() if top_k else ranked.tolist()
+
+def select_context(text, queries, budget=PROMPT_CONTEXT_CHARS, structure=None):
+    """
+    Select the chunks of a text most relevant to a set of queries.
+
+    Queries take turns picking their next best chunk, so each query (one per
+    quiz topic or key term) gets a share of the budget. The selected chunks are
+    returned in document order, with their slide and page markers.
+
+    Args:
+        text (str): The full text
+        queries (list): Topics, key terms or section titles the prompt is about
+        budget (int): Maximum number of characters to return
+        structure (dict): Optional document structure of the text
+
+    Returns:
+        str: The text itself if it fits the budget, otherwise the selected chunks
+    """
+    if len(text) <= budget:
+        return text
+    index = get_analysis(text, structure).retrieval_index
+    rankings = [iter(index.search(query)) for query in queries if query]
+    selected = set()
+    used = 0
+    while rankings:
+        remaining = []
+        for ranking in rankings:
+            # Take this query's best chunk that is not selected yet and still fits
+            for chunk_id in ranking:
+                start, end = index.spans[chunk_id]
+                if chunk_id not in selected and used + end - start <= budget:
+                    selected.add(chunk_id)
+                    used += end - start
+                    remaining.append(ranking)
+                    break
+        rankings = remaining
+
+    if not selected:
+        logger.info("No chunks matched the prompt queries, using the start of the text")
+        return text[:budget]
+    logger.info(f"Selected {len(selected)} of {len(index)} chunks ({used} of {len(text)} chars) for {len(queries)} queries")
+    return "\n\n".join(index.chunk(chunk_id).strip() for chunk_id in sorted(selected))
+
+def prompt_context(text, structure=None, queries=None, budget=PROMPT_CONTEXT_CHARS):
+    """
+    Select prompt context for a generator, by default about the key topics and slide titles.
+
+    Args:
+        text (str): The full text
+        structure (dict): Optional document structure of the text
+        queries (list): Queries to retrieve for; defaults to the key topics and slide titles
+        budget (int): Maximum number of characters to return
+
+    Returns:
+        str: The selected context
+    """
+    if len(text) <= budget:
+        return text
+    if queries is None:
+        analysis = get_analysis(text, structure)
+        queries = list(dict.fromkeys(analysis.key_topics + analysis.slide_titles()))
+    return select_context(text, queries, budget, structure)
@@ -5,70 +5,104 @@ without using any external APIs, ensuring the application always has content to
 """
 
 import re
+import zlib
+import bisect
 import random
 import logging
+from .text_analysis import get_analysis
+from .summarizer import summarize
 
 logger = logging.getLogger(__name__)
 
-def extract_slide_content(text):
-    """Extract slide titles and their content from input text."""
-    slide_pattern = r'Slide\s+(\d+):\s+([^\n]+)(?:\n(?:[^\n]*\d+[^\n]*\n)?)?([^S]*?)(?=Slide\s+\d+:|$)'
-    matches = re.findall(slide_pattern, text, re.DOTALL)
-    
-    slides = []
-    for slide_num, title, content in matches:
-        cleaned_content = re.sub(r'\s+', ' ', content).strip()
-        if title and cleaned_content:
-            slides.append({
-                "number": slide_num,
-                "title": title.strip(),
-                "content": cleaned_content
-            })
-    
-    return slides
+# Colons that may follow a term in "Term: definition" slides
+DEFINITION_COLON_PATTERN = re.compile(r':\s+')
+
+# Quiz distractors are drawn from this many slides on either side of the answer in lead length
+DISTRACTOR_WINDOW = 6
+
+def extract_slide_content(text, structure=None):
+    """Extract slide titles and their content from input text using its shared analysis."""
+    return get_analysis(text, structure).slides
 
-def get_static_summary(text, max_bullets=7):
+def transcript_random(text):
+    """Return a random generator seeded by the text, so the same transcript gives the same output."""
+    return random.Random(zlib.crc32(text.encode("utf-8", "replace")))
+
+def definition_pairs(content):
+    """
+    Find "Term: definition." pairs in slide content in one linear scan.
+
+    The term is the capitalized run of letters, spaces and hyphens before a colon;
+    the definition runs from the colon through its first sentence up to the next period.
+
+    Args:
+        content (str): Slide content with whitespace collapsed
+
+    Returns:
+        list: (term, definition) tuples
+    """
+    pairs = []
+    position = 0
+    for match in DEFINITION_COLON_PATTERN.finditer(content):
+        colon = match.start()
+        if colon < position:
+            continue
+        # Walk back over the term characters, not past the previous definition
+        term_start = colon
+        while term_start > position and (content[term_start - 1].isalpha() or content[term_start - 1] in " -"):
+            term_start -= 1
+        while term_start < colon and not content[term_start].isupper():
+            term_start += 1
+        first_period = content.find(".", match.end())
+        if term_start + 1 >= colon or first_period <= match.end():
+            continue
+        second_period = content.find(".", first_period + 1)
+        end = second_period if second_period != -1 else len(content)
+        pairs.append((content[term_start:colon].strip(), content[match.end():end].strip()))
+        position = end
+    return pairs
+
+def get_static_summary(text, max_bullets=7, structure=None):
     """
     Generate a summary directly from the text without using external APIs.
     
     Args:
         text (str): The text to summarize
         max_bullets (int): Maximum number of bullet points to generate
+        structure (dict): Optional document structure of the text
         
     Returns:
         dict: Dictionary with success status and summary
     """
     try:
-        slides = extract_slide_content(text)
+        analysis = get_analysis(text, structure)
+        slides = analysis.slides
         
-        # If no slides found, extract sentences
+        # If no slides found, pick the most central sentences
         if not slides:
-            sentences = re.split(r'(?<=[.!?])\s+', text)
-            important_sentences = []
+            summary_points = summarize(text, max_bullets, structure=structure)
             
-            for sentence in sentences:
-                if any(kw in sentence.lower() for kw in [
+            if not summary_points:
+                # Too few full sentences to rank; keep sentences with signal words
+                sentences = analysis.sentences
+                summary_points = [s.strip() for s in sentences if any(kw in s.lower() for kw in [
                     'important', 'key', 'main', 'crucial', 'essential',
                     'significant', 'primary', 'fundamental', 'critical'
-                ]):
-                    important_sentences.append(sentence.strip())
-            
-            summary_points = important_sentences[:max_bullets]
-            if not summary_points and sentences:
-                # If no important sentences found, take first few
-                summary_points = [s.strip() for s in sentences[:max_bullets] if len(s.strip()) > 20]
+                ])][:max_bullets]
+                if not summary_points and sentences:
+                    # If no important sentences found, take first few
+                    summary_points = [s.strip() for s in sentences[:max_bullets] if len(s.strip()) > 20]
         else:
             # Use slide titles and first sentences of content
             summary_points = []
-            for slide in slides:
+            for slide, first_sentence in zip(slides, analysis.slide_first_sentences):
                 if len(summary_points) >= max_bullets:
                     break
                 
                 if "key concept" in slide["title"].lower() or "important" in slide["title"].lower():
                     summary_points.append(f"{slide['title']}: {slide['content'][:100]}...")
                 elif slide["content"] and len(slide["content"]) > 20:
-                    # Extract first sentence of slide content
-                    first_sentence = re.split(r'(?<=[.!?])\s+', slide["content"])[0]
+                    # Use the first sentence of slide content
                     if first_sentence and len(first_sentence) > 20:
                         summary_points.append(first_sentence)
         
@@ -203,18 +237,20 @@ def get_static_resources(text, max_resources=3):
             ]
         }
 
-def generate_static_study_guide(text):
+def generate_static_study_guide(text, structure=None):
     """
     Generate a study guide directly from the text without using external APIs.
     
     Args:
         text (str): The text to generate a study guide from
+        structure (dict): Optional document structure of the text
         
     Returns:
         dict: Dictionary with success status and study guide
     """
     try:
-        slides = extract_slide_content(text)
+        analysis = get_analysis(text, structure)
+        slides = analysis.slides
         
         # Prepare sections
         sections = {
@@ -222,35 +258,47 @@ def generate_static_study_guide(text):
             "important_concepts": [],
             "flashcards": []
         }
+        important_concepts = []
+        first_sentences = []
         
-        # Extract key terms from slides
-        term_pattern = r'([A-Z][a-zA-Z\s-]+):\s+([^\.]+\.[^\.]*)'
-        definition_slides = []
-        
-        # Look for slides with definitions
-        for slide in slides:
-            if any(kw in slide["title"].lower() for kw in ["key", "concept", "term", "definition"]):
-                definition_slides.append(slide)
-        
-        # Process definition slides
-        for slide in definition_slides:
-            matches = re.findall(term_pattern, slide["content"])
-            for term, definition in matches:
-                if term and definition and len(term) > 1 and len(definition) > 10:
-                    sections["key_terms"].append({
-                        "term": term.strip(),
-                        "definition": definition.strip()
-                    })
-        
-        # If no terms found using pattern, extract from slides directly
+        # Single pass over the slides: definitions, title terms, concepts and flashcards
+        title_terms = []
+        for slide, first_sentence in zip(slides, analysis.slide_first_sentences):
+            title = slide["title"].strip()
+            title_lower = title.lower()
+            content = slide["content"]
+            
+            # "Term: definition" pairs on slides about key terms or definitions
+            if any(kw in title_lower for kw in ["key", "concept", "term", "definition"]):
+                for term, definition in definition_pairs(content):
+                    if len(term) > 1 and len(definition) > 10:
+                        sections["key_terms"].append({"term": term, "definition": definition})
+            
+            # Titles such as "Algorithm: K-means" name a term
+            if ":" in title and len(content) > 20:
+                title_terms.append({
+                    "term": title.split(":")[1].strip(),
+                    "definition": content[:200].strip()
+                })
+            
+            # Concepts from key-concept slides, else from first sentences
+            if any(kw in title_lower for kw in [
+                "key", "important", "concept", "fundamental", "principle"
+            ]) and len(content) > 30:
+                important_concepts.append(content[:200].strip())
+            elif len(content) > 50 and len(first_sentence) > 30:
+                first_sentences.append(first_sentence)
+            
+            # Flashcards from slide titles
+            if len(sections["flashcards"]) < 5 and len(title) > 5 and len(content) > 20:
+                sections["flashcards"].append({
+                    "question": f"What is {title}?",
+                    "answer": content.strip()[:200]
+                })
+        
+        # If no terms found as definitions, use the terms named by slide titles
         if not sections["key_terms"]:
-            for slide in slides:
-                if ":" in slide["title"] and len(slide["content"]) > 20:
-                    term = slide["title"].split(":")[1].strip() if len(slide["title"].split(":")) > 1 else slide["title"]
-                    sections["key_terms"].append({
-                        "term": term,
-                        "definition": slide["content"][:200].strip()
-                    })
+            sections["key_terms"] = title_terms
         
         # Ensure we have at least some terms
         if not sections["key_terms"]:
@@ -273,24 +321,8 @@ def generate_static_study_guide(text):
                 }
             ]
         
-        # Extract important concepts
-        for slide in slides:
-            if any(kw in slide["title"].lower() for kw in [
-                "key", "important", "concept", "fundamental", "principle"
-            ]) and len(slide["content"]) > 30:
-                concept_text = slide["content"]
-                sections["important_concepts"].append(concept_text[:200].strip())
-        
-        # Ensure we have some concepts
-        if not sections["important_concepts"]:
-            for slide in slides:
-                if slide["content"] and len(slide["content"]) > 50:
-                    concept_sentences = re.split(r'(?<=[.!?])\s+', slide["content"])
-                    if concept_sentences and len(concept_sentences[0]) > 30:
-                        sections["important_concepts"].append(concept_sentences[0])
-        
-        # Limit concepts to reasonable number
-        sections["important_concepts"] = sections["important_concepts"][:5]
+        # Use first sentences if no slide is about key concepts, and limit concepts to a reasonable number
+        sections["important_concepts"] = (important_concepts or first_sentences)[:5]
         
         # Ensure we have at least some concepts
         if not sections["important_concepts"]:
@@ -300,25 +332,6 @@ def generate_static_study_guide(text):
                 "Different distance metrics affect how similarity between data points is calculated in clustering algorithms."
             ]
         
-        # Generate flashcards from content
-        for slide in slides:
-            if len(sections["flashcards"]) >= 5:
-                break
-                
-            title = slide["title"].strip()
-            content = slide["content"].strip()
-            
-            if len(title) > 5 and len(content) > 20:
-                # Create question from title
-                question = f"What is {title}?"
-                if "?" not in question:
-                    question = f"Explain the concept of {title}?"
-                    
-                sections["flashcards"].append({
-                    "question": question,
-                    "answer": content[:200]
-                })
-        
         # Ensure we have some flashcards
         if not sections["flashcards"]:
             sections["flashcards"] = [
@@ -376,24 +389,54 @@ def generate_static_study_guide(text):
             }
         }
 
-def generate_static_quiz(text, num_questions=5):
+def distractor_leads(analysis, slide_index, rng, count=3):
+    """
+    Pick the leads of other slides whose length is close to a slide's lead, as quiz distractors.
+
+    Options of similar length do not give the answer away. Candidates come from
+    the analysis' lead length index, so picking costs a binary search per question.
+
+    Args:
+        analysis (TextAnalysis): Analysis of the transcript
+        slide_index (int): Index of the slide the question is about
+        rng (random.Random): Seeded random generator
+        count (int): Number of distractors
+
+    Returns:
+        list: Up to count distinct leads of other slides
+    """
+    index = analysis.lead_length_index
+    leads = analysis.slide_leads
+    correct = leads[slide_index]
+    position = bisect.bisect_left(index, (len(correct), -1))
+    window = index[max(position - DISTRACTOR_WINDOW, 0):position + DISTRACTOR_WINDOW]
+    candidates = list(dict.fromkeys(leads[j] for _, j in window if j != slide_index and leads[j] != correct))
+    return rng.sample(candidates, min(count, len(candidates)))
+
+def generate_static_quiz(text, num_questions=5, structure=None):
     """
     Generate quiz questions directly from the text without using external APIs.
     
     Args:
         text (str): The text to generate questions from
         num_questions (int): Number of questions to generate
+        structure (dict): Optional document structure of the text
         
     Returns:
         dict: Dictionary with success status and quiz
     """
     try:
-        slides = extract_slide_content(text)
+        analysis = get_analysis(text, structure)
+        slides = analysis.slides
+        leads = analysis.slide_leads
+        
+        # The same transcript always gets the same quiz
+        rng = transcript_random(text)
         
         quiz_questions = []
         
         # Create questions based on slide content
-        for slide in slides:
+        for i, slide in enumerate(slides):
             if len(quiz_questions) >= num_questions:
                 break
                 
@@ -408,57 +451,29 @@ def generate_static_quiz(text, num_questions=5):
                     f"Which statement about {title} is correct?"
                 ]
                 
-                question = random.choice(question_types)
+                question = rng.choice(question_types)
                 
                 # Create options (one correct from content, three incorrect)
-                correct_answer = content.split(".")[0] if "." in content else content[:100]
+                correct_answer = leads[i]
                 
-                # Generate plausible but incorrect options
-                incorrect_options = []
+                # Use the leading sentences of other slides of similar length as incorrect options
+                incorrect_options = distractor_leads(analysis, i, rng)
                 
-                # Use content from other slides as incorrect options
-                for other_slide in slides:
-                    if other_slide["number"] != slide["number"] and len(other_slide["content"]) > 20:
-                        other_content = other_slide["content"].split(".")[0] if "." in other_slide["content"] else other_slide["content"][:100]
-                        if len(other_content) > 20:
-                            incorrect_options.append(other_content)
-                
-                # If we don't have enough options, create some generic ones
+                # If we don't have enough options, use some generic ones
                 generic_options = [
                     f"A statistical method unrelated to {title.lower()}.",
                     f"The process of labeling data points for supervised learning.",
                     f"A visualization technique that doesn't involve grouping data.",
                     f"A preprocessing step that normalizes all data values."
                 ]
+                rng.shuffle(generic_options)
+                selected_incorrect = (incorrect_options + generic_options)[:3]
                 
-                # Combine and select options
-                all_incorrect = incorrect_options + generic_options
-                random.shuffle(all_incorrect)
-                selected_incorrect = all_incorrect[:3]
-                
-                # Create options dict
-                options = {
-                    "A": correct_answer,
-                    "B": selected_incorrect[0] if len(selected_incorrect) > 0 else "An alternative approach not discussed in the slides.",
-                    "C": selected_incorrect[1] if len(selected_incorrect) > 1 else "A concept from supervised learning, not clustering.",
-                    "D": selected_incorrect[2] if len(selected_incorrect) > 2 else "None of the above."
-                }
-                
-                # Shuffle options
-                keys = list(options.keys())
-                values = list(options.values())
-                random.shuffle(values)
-                shuffled_options = {k: v for k, v in zip(keys, values)}
-                
-                # Find correct answer letter
-                correct_answer_letter = None
-                for letter, option_text in shuffled_options.items():
-                    if option_text == correct_answer:
-                        correct_answer_letter = letter
-                        break
-                
-                if not correct_answer_letter:
-                    correct_answer_letter = "A"  # Default if something went wrong
+                # Shuffle the correct answer in among the incorrect options
+                values = [correct_answer] + selected_incorrect
+                rng.shuffle(values)
+                shuffled_options = dict(zip("ABCD", values))
+                correct_answer_letter = "ABCD"[values.index(correct_answer)]
                 
                 # Add question to quiz
                 quiz_questions.append({
@@ -575,19 +590,20 @@ def generate_static_quiz(text, num_questions=5):
             ]
         }
 
-def generate_static_topic_notes(text, max_sections=3):
+def generate_static_topic_notes(text, max_sections=3, structure=None):
     """
     Generate detailed topic notes directly from the text without using external APIs.
     
     Args:
         text (str): The text to generate notes from
         max_sections (int): Maximum number of sections to include
+        structure (dict): Optional document structure of the text
         
     Returns:
         dict: Dictionary with success status and notes
     """
     try:
-        slides = extract_slide_content(text)
+        slides = extract_slide_content(text, structure)
         
         if not slides:
             return {
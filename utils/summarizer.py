@@ -0,0 +1,173 @@
+"""
+Offline extractive summarization with TextRank.
+
+Sentences are ranked by their centrality in a sentence-similarity graph, where
+two sentences are linked by the cosine similarity of their TF-IDF vectors
+(continuous LexRank). The graph is never materialized: with X the sparse
+sentence-term matrix, the similarity matrix is X Xᵀ, so each power-iteration
+step is two sparse matrix-vector products over the term postings, done with
+NumPy bincounts. Ranking a long lecture transcript takes well under a second.
+"""
+
+import logging
+import numpy as np
+from .document_model import SECTION_MARKER_PATTERN
+from .text_analysis import get_analysis, content_terms
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Summary sentences must be full sentences, not titles or run-on fragments
+MIN_SENTENCE_WORDS = 6
+MAX_SENTENCE_WORDS = 80
+
+# PageRank damping factor and power-iteration limits
+DAMPING = 0.85
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-6
+
+# A sentence sharing more than this share of its terms with a selected one is redundant
+REDUNDANCY_THRESHOLD = 0.6
+
+def summary_candidates(sentences):
+    """
+    Turn split sentences into candidate summary sentences.
+
+    Slide and page markers are removed and sentences are split at line breaks,
+    so slide titles do not run into the first sentence of a slide.
+
+    Args:
+        sentences (list): Sentences in document order
+
+    Returns:
+        list: Candidate sentences with whitespace collapsed, in document order
+    """
+    candidates = []
+    for sentence in sentences:
+        for line in SECTION_MARKER_PATTERN.sub('\n', sentence).split('\n'):
+            words = line.split()
+            if MIN_SENTENCE_WORDS <= len(words) <= MAX_SENTENCE_WORDS:
+                candidates.append(' '.join(words))
+    return candidates
+
+def _term_matrix(sentences):
+    """
+    Build the L2-normalized TF-IDF sentence-term matrix in coordinate form.
+
+    Returns:
+        tuple: (row ids, column ids, values, number of terms)
+    """
+    vocabulary = {}
+    row_list = []
+    col_list = []
+    for i, sentence in enumerate(sentences):
+        for term in content_terms(sentence):
+            row_list.append(i)
+            col_list.append(vocabulary.setdefault(term, len(vocabulary)))
+
+    n_terms = max(len(vocabulary), 1)
+    keys, tf = np.unique(np.asarray(row_list, dtype=np.int64) * n_terms + np.asarray(col_list, dtype=np.int64),
+                         return_counts=True)
+    rows, cols = keys // n_terms, keys % n_terms
+
+    # Terms found in every sentence get zero weight
+    df = np.bincount(cols, minlength=n_terms)
+    idf = np.log(len(sentences) / np.maximum(df, 1))
+    values = (1 + np.log(tf)) * idf[cols]
+    norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=len(sentences)))
+    values = values / np.where(norms > 0, norms, 1)[rows]
+    return rows, cols, values, n_terms
+
+def textrank_scores(sentences, damping=DAMPING):
+    """
+    Score sentences by their TextRank centrality.
+
+    Args:
+        sentences (list): The sentences to rank
+        damping (float): PageRank damping factor
+
+    Returns:
+        numpy.ndarray: One score per sentence; the scores sum to 1
+    """
+    n = len(sentences)
+    if n == 0:
+        return np.zeros(0)
+    rows, cols, values, n_terms = _term_matrix(sentences)
+    self_similarity = np.bincount(rows, weights=values ** 2, minlength=n)
+
+    def similarity_product(vector):
+        # (X Xᵀ - diag) · vector, i.e. summed similarities to the other sentences
+        term_sums = np.bincount(cols, weights=values * vector[rows], minlength=n_terms)
+        return np.bincount(rows, weights=values * term_sums[cols], minlength=n) - self_similarity * vector
+
+    degree = np.maximum(similarity_product(np.ones(n)), 0)
+    connected = degree > 1e-12
+    inverse_degree = np.where(connected, 1 / np.where(connected, degree, 1), 0)
+
+    scores = np.full(n, 1 / n)
+    for _ in range(MAX_ITERATIONS):
+        # Sentences without neighbours spread their score evenly
+        dangling = scores[~connected].sum()
+        updated = (1 - damping) / n + damping * (similarity_product(scores * inverse_degree) + dangling / n)
+        converged = np.abs(updated - scores).sum() < TOLERANCE
+        scores = updated
+        if converged:
+            break
+    return scores
+
+def rank_sentences(sentences):
+    """
+    Rank the candidate summary sentences of a text.
+
+    Args:
+        sentences (list): Split sentences in document order
+
+    Returns:
+        list: (sentence, score) tuples for the candidate sentences, in document order
+    """
+    candidates = summary_candidates(sentences)
+    scores = textrank_scores(candidates)
+    return list(zip(candidates, scores.tolist()))
+
+def sentences_by_rank(text, structure=None):
+    """
+    Return the candidate summary sentences of a text, most central first.
+
+    Args:
+        text (str): The text to rank
+        structure (dict): Optional document structure of the text
+
+    Returns:
+        list: Candidate sentences, best first
+    """
+    ranked = get_analysis(text, structure).ranked_sentences
+    return [sentence for sentence, _ in sorted(ranked, key=lambda item: -item[1])]
+
+def summarize(text, max_sentences=7, structure=None):
+    """
+    Build an extractive summary of a text.
+
+    The most central sentences are selected, skipping sentences that mostly
+    repeat the terms of an already selected one, and returned in document order.
+
+    Args:
+        text (str): The text to summarize
+        max_sentences (int): Maximum number of sentences
+        structure (dict): Optional document structure of the text
+
+    Returns:
+        list: The summary sentences in document order
+    """
+    ranked = get_analysis(text, structure).ranked_sentences
+    selected = []
+    selected_terms = []
+    for index in sorted(range(len(ranked)), key=lambda i: -ranked[i][1]):
+        terms = set(content_terms(ranked[index][0]))
+        if not terms or any(len(terms & other) > REDUNDANCY_THRESHOLD * min(len(terms), len(other))
+                            for other in selected_terms):
+            continue
+        selected.append(index)
+        selected_terms.append(terms)
+        if len(selected) >= max_sentences:
+            break
+    return [ranked[index][0] for index in sorted(selected)]
@@ -0,0 +1,76 @@
+"""
+Token-position inverted index for term lookups.
+
+The text is tokenized once; each lowercase word maps to the positions where
+it occurs. A multi-word term is found by checking only the occurrences of its
+first word, so looking up many terms costs time linear in the text plus the
+occurrences of those terms, instead of one full regex scan of the text per term.
+"""
+
+import re
+from collections import defaultdict
+
+WORD_PATTERN = re.compile(r"\w+")
+
+class TermIndex:
+    """Inverted index from lowercase words to their token positions in a text."""
+
+    def __init__(self, text):
+        self.text = text
+        self.starts = []
+        self.ends = []
+        self.words = []
+        self.positions = defaultdict(list)
+        for position, match in enumerate(WORD_PATTERN.finditer(text)):
+            word = match.group().lower()
+            self.starts.append(match.start())
+            self.ends.append(match.end())
+            self.words.append(word)
+            self.positions[word].append(position)
+
+    def find(self, term):
+        """
+        Find the first case-insensitive occurrence of a term within a single line.
+
+        Args:
+            term (str): A word or phrase
+
+        Returns:
+            tuple: (start, end) character offsets, or None if the term does not occur
+        """
+        term_words = [w.lower() for w in WORD_PATTERN.findall(term)]
+        if not term_words:
+            return None
+        length = len(term_words)
+        for position in self.positions.get(term_words[0], ()):
+            if self.words[position:position + length] == term_words:
+                start, end = self.starts[position], self.ends[position + length - 1]
+                # Phrases do not span line breaks (e.g. a title and the next line)
+                if length == 1 or '\n' not in self.text[start:end]:
+                    return start, end
+        return None
+
+    def context(self, term, context_length=100):
+        """
+        Return the text around the first occurrence of a term, with the term in bold.
+
+        The window extends up to context_length characters on either side, without
+        crossing line breaks.
+
+        Args:
+            term (str): The term to find context for
+            context_length (int): The number of characters to include before and after
+
+        Returns:
+            str: The highlighted context, or "" if the term does not occur
+        """
+        span = self.find(term)
+        if span is None:
+            return ""
+        start, end = span
+        window_start = max(start - context_length, self.text.rfind('\n', 0, start) + 1)
+        line_end = self.text.find('\n', end)
+        window_end = min(end + context_length, len(self.text) if line_end == -1 else line_end)
+        context = self.text[window_start:window_end]
+        pattern = re.compile(re.escape(self.text[start:end]), re.IGNORECASE)
+        return pattern.sub(lambda match: f"**{match.group()}**", context)
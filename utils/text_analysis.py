@@ -0,0 +1,261 @@
+"""
+Shared, memoized analysis of a transcript.
+
+The summary, study guide, quiz and notes generators (the free-API fallbacks as
+well as the static ones) all need the same views of the transcript: its
+sentences, its slides and slide titles, its capitalized terms and word counts.
+A TextAnalysis computes each view lazily, the first time a generator asks for
+it, and get_analysis returns the same object for the same transcript, so every
+view is computed at most once per transcript however many generators run.
+"""
+
+import re
+import bisect
+import logging
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from .document_model import ensure_structure, get_sections, section_content, slide_titles
+from .deduplication import estimate_tokens
+from .nlp_resources import get_stopwords
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Sentences end at ., ! or ? followed by whitespace
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?])\s+')
+
+# Capitalized words such as "Clustering" or "Euclidean"
+CAPITALIZED_WORD_PATTERN = re.compile(r'\b[A-Z][a-z]+\b')
+
+# Content words (including hyphenated words such as "k-means") for term statistics
+CONTENT_WORD_PATTERN = re.compile(r"[^\W\d_][\w'’-]*")
+MIN_TERM_LENGTH = 3
+
+# Keyphrases kept as the key topics of a transcript
+MAX_KEY_TOPICS = 10
+
+# Number of recent transcripts whose analysis is kept
+MAX_CACHED_ANALYSES = 4
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _limit_index(starts, before):
+    """Return how many items of a sorted offset list start before an offset (all if None)."""
+    return len(starts) if before is None else bisect.bisect_left(starts, before)
+
+def content_terms(text):
+    """
+    Return the content words of a text for term statistics.
+
+    Args:
+        text (str): A sentence, chunk or query
+
+    Returns:
+        list: Lowercase words without stopwords or short words, with plural endings removed
+    """
+    stop_words = get_stopwords()
+    terms = []
+    for word in CONTENT_WORD_PATTERN.findall(text.lower()):
+        if len(word) < MIN_TERM_LENGTH or word in stop_words:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+class TextAnalysis:
+    """Lazily computed views of a transcript shared by the content generators."""
+
+    def __init__(self, text, structure=None):
+        self.text = text
+        self._structure = structure
+
+    @cached_property
+    def structure(self):
+        return ensure_structure(self.text, self._structure)
+
+    @cached_property
+    def _sentence_spans(self):
+        spans = []
+        start = 0
+        for match in SENTENCE_SPLIT_PATTERN.finditer(self.text):
+            spans.append((start, match.start()))
+            start = match.end()
+        spans.append((start, len(self.text)))
+        return spans
+
+    @cached_property
+    def sentence_starts(self):
+        return [start for start, _ in self._sentence_spans]
+
+    @cached_property
+    def sentences(self):
+        """The sentences of the text, as re.split(r'(?<=[.!?])\\s+', text) returns them."""
+        return [self.text[start:end] for start, end in self._sentence_spans]
+
+    @cached_property
+    def sentence_word_counts(self):
+        return [len(sentence.split()) for sentence in self.sentences]
+
+    def sentences_before(self, before=None):
+        """
+        Return the sentences starting before an offset, e.g. within a truncated prompt.
+
+        Args:
+            before (int): Character offset limit; None for all sentences
+
+        Returns:
+            list: The sentences, the last one cut at the offset
+        """
+        count = _limit_index(self.sentence_starts, before)
+        sentences = self.sentences[:count]
+        if sentences and before is not None and self._sentence_spans[count - 1][1] > before:
+            start = self._sentence_spans[count - 1][0]
+            sentences[-1] = self.text[start:before]
+        return sentences
+
+    @cached_property
+    def ranked_sentences(self):
+        """Candidate summary sentences in document order, with their TextRank scores."""
+        from .summarizer import rank_sentences
+        return rank_sentences(self.sentences)
+
+    @cached_property
+    def retrieval_index(self):
+        """BM25 index over the chunks of the text."""
+        from .retrieval import BM25Index
+        return BM25Index(self.text, self.structure)
+
+    @cached_property
+    def key_topics(self):
+        """The main keyphrases of the text, boosted by slide titles, best first."""
+        from .keyphrases import extract_keyphrases
+        return extract_keyphrases(self.text, MAX_KEY_TOPICS, title_text=" | ".join(self.slide_titles()))
+
+    @cached_property
+    def slides(self):
+        """Slides with a title and content, as dicts with "number", "title" and "content"."""
+        slides = []
+        for section in get_sections(self.structure, "slide"):
+            cleaned_content = section_content(self.text, section)
+            if section["title"] and cleaned_content:
+                slides.append({
+                    "number": section["number"],
+                    "title": section["title"],
+                    "content": cleaned_content
+                })
+        return slides
+
+    @cached_property
+    def slide_first_sentences(self):
+        """The first sentence of each slide's content, aligned with slides."""
+        return [SENTENCE_SPLIT_PATTERN.split(slide["content"], maxsplit=1)[0] for slide in self.slides]
+
+    @cached_property
+    def slide_leads(self):
+        """The text of each slide's content up to its first period (or its first 100 characters)."""
+        return [slide["content"].split(".")[0] if "." in slide["content"] else slide["content"][:100]
+                for slide in self.slides]
+
+    @cached_property
+    def lead_length_index(self):
+        """Slides whose leads can serve as quiz options, as (lead length, slide index) pairs sorted by length."""
+        return sorted((len(lead), i) for i, lead in enumerate(self.slide_leads)
+                      if len(lead) > 20 and len(self.slides[i]["content"]) > 20)
+
+    def slide_titles(self, before=None):
+        """Return the titles of the slides starting before an offset."""
+        return slide_titles(self.structure, before=before)
+
+    @cached_property
+    def _capitalized_words(self):
+        matches = list(CAPITALIZED_WORD_PATTERN.finditer(self.text))
+        return [match.start() for match in matches], matches
+
+    def capitalized_words(self, before=None, min_length=1):
+        """
+        Return the capitalized words of the text in order of occurrence.
+
+        Args:
+            before (int): Only include words starting before this offset
+            min_length (int): Minimum word length
+
+        Returns:
+            list: The words, with repetitions
+        """
+        starts, matches = self._capitalized_words
+        return [match.group() for match in matches[:_limit_index(starts, before)] if len(match.group()) >= min_length]
+
+    @cached_property
+    def _capitalized_phrases(self):
+        # Runs of 2-4 capitalized words on one line, separated only by whitespace
+        starts = []
+        phrases = []
+        run = []
+
+        def close():
+            if len(run) >= 2:
+                starts.append(run[0].start())
+                phrases.append(self.text[run[0].start():run[min(len(run), 4) - 1].end()])
+            run.clear()
+
+        for match in self._capitalized_words[1]:
+            gap = self.text[run[-1].end():match.start()] if run else ""
+            if run and (not gap.isspace() or '\n' in gap):
+                close()
+            run.append(match)
+        close()
+        return starts, phrases
+
+    def capitalized_phrases(self, before=None):
+        """Return multi-word capitalized phrases (likely topics), with repetitions, in order."""
+        starts, phrases = self._capitalized_phrases
+        return phrases[:_limit_index(starts, before)]
+
+    def capitalized_terms(self, before=None, min_length=5):
+        """
+        Return candidate key terms: capitalized phrases, then capitalized words.
+
+        Args:
+            before (int): Only include terms starting before this offset
+            min_length (int): Minimum length of single-word terms
+
+        Returns:
+            list: Unique terms in order of first occurrence
+        """
+        terms = dict.fromkeys(self.capitalized_phrases(before))
+        terms.update(dict.fromkeys(self.capitalized_words(before, min_length)))
+        return list(terms)
+
+    @cached_property
+    def word_count(self):
+        return len(self.text.split())
+
+    @cached_property
+    def token_count(self):
+        """Approximate number of model tokens in the text."""
+        return estimate_tokens(self.text)
+
+def get_analysis(text, structure=None):
+    """
+    Return the shared analysis of a transcript, creating it on first use.
+
+    Args:
+        text (str): The transcript
+        structure (dict): Optional document structure of the text
+
+    Returns:
+        TextAnalysis: The same object for every call with the same text
+    """
+    with _cache_lock:
+        analysis = _cache.get(text)
+        if analysis is not None:
+            _cache.move_to_end(text)
+            return analysis
+        analysis = TextAnalysis(text, structure)
+        _cache[text] = analysis
+        if len(_cache) > MAX_CACHED_ANALYSES:
+            _cache.popitem(last=False)
+        return analysis
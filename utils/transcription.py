@@ -1,14 +1,28 @@
-import os
-import tempfile
 import requests
 from youtube_transcript_api import YouTubeTranscriptApi
 import re
-from faster_whisper import WhisperModel
+from .uploads import open_upload
+from .resources import register_resource, get_resource
 
-# Initialize Whisper model
+# Whisper model, loaded on first transcription and shared by all sessions
 # Options for model size: "tiny", "base", "small", "medium", "large-v2"
 model_size = "base"
-whisper_model = WhisperModel(model_size, device="cpu", compute_type="int8")
+
+def _load_whisper_model():
+    from faster_whisper import WhisperModel
+    return WhisperModel(model_size, device="cpu", compute_type="int8")
+
+WHISPER_MODEL = register_resource("whisper_model", _load_whisper_model)
+
+def get_whisper_model():
+    """Return the shared Whisper model, loading it on first use."""
+    return get_resource(WHISPER_MODEL)
+
+# Whisper expects 16 kHz mono audio. Long recordings are decoded and transcribed
+# in windows of this many seconds so the decoded waveform never has to be held
+# in memory all at once (10 minutes of audio is about 38 MB of float32 samples).
+SAMPLE_RATE = 16000
+TRANSCRIPTION_WINDOW_SECONDS = 600
 
 def extract_youtube_id(url):
     """Extract YouTube video ID from a URL."""
@@ -79,44 +93,76 @@ def get_youtube_transcript(youtube_url):
     except Exception as e:
         return {"success": False, "error": f"Error getting YouTube transcript: {str(e)}"}
 
+def iter_audio_windows(audio_stream, window_seconds=TRANSCRIPTION_WINDOW_SECONDS):
+    """
+    Decode audio into fixed-length windows of 16 kHz mono samples.
+    
+    Decoding the whole file at once would hold the full waveform in memory,
+    so samples are resampled frame by frame and yielded one window at a time.
+    
+    Args:
+        audio_stream: A readable binary stream containing audio (or video) data
+        window_seconds (int): Length of each window in seconds
+        
+    Yields:
+        numpy.ndarray: float32 samples in [-1, 1] for one window
+    """
+    import av
+    import numpy as np
+    
+    window_samples = window_seconds * SAMPLE_RATE
+    resampler = av.audio.resampler.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+    pending = []
+    pending_samples = 0
+    
+    def resampled_frames(container):
+        for frame in container.decode(audio=0):
+            yield from resampler.resample(frame)
+        # Flush any samples buffered in the resampler
+        yield from resampler.resample(None)
+    
+    with av.open(audio_stream, mode="r", metadata_errors="ignore") as container:
+        for frame in resampled_frames(container):
+            samples = frame.to_ndarray().reshape(-1)
+            pending.append(samples)
+            pending_samples += len(samples)
+            
+            while pending_samples >= window_samples:
+                buffered = np.concatenate(pending)
+                yield buffered[:window_samples].astype(np.float32) / 32768.0
+                remainder = buffered[window_samples:]
+                pending = [remainder] if len(remainder) else []
+                pending_samples = len(remainder)
+    
+    if pending_samples:
+        yield np.concatenate(pending).astype(np.float32) / 32768.0
+
 def transcribe_audio(audio_file):
-    """Transcribe audio file using Hugging Face's faster-whisper implementation."""
-    temp_path = None
+    """Transcribe audio file using Hugging Face's faster-whisper implementation.
+    
+    The audio may be an uploaded file object or a path (e.g. audio extracted
+    from a video). It is streamed to the decoder and transcribed window by
+    window, so memory use does not grow with the length of the recording.
+    """
     try:
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
-            # Write uploaded file to the temp file
-            temp_file.write(audio_file.getvalue())
-            temp_path = temp_file.name
-        
-        # Transcribe the audio file with faster-whisper
-        segments, info = whisper_model.transcribe(temp_path, beam_size=5)
+        transcript_parts = []
+        with open_upload(audio_file) as audio_stream:
+            for window in iter_audio_windows(audio_stream):
+                # Transcribe the window with faster-whisper
+                segments, info = get_whisper_model().transcribe(window, beam_size=5)
+                
+                # Combine all segments into the transcript
+                transcript_parts.extend(segment.text.strip() for segment in segments)
         
         # Check if transcription was successful
-        if not segments:
+        if not transcript_parts:
             return {"success": False, "error": "No speech detected in the audio file."}
         
-        # Combine all segments into a full transcript
-        transcription_text = ""
-        for segment in segments:
-            transcription_text += segment.text + " "
-        
-        # Clean up the temporary file
-        if temp_path:
-            os.unlink(temp_path)
-            temp_path = None
-        
+        transcription_text = " ".join(part for part in transcript_parts if part)
         if not transcription_text.strip():
             return {"success": False, "error": "Transcription result is empty."}
         
         return {"success": True, "transcript": transcription_text.strip()}
     
     except Exception as e:
-        # Clean up the temporary file if it exists
-        if temp_path:
-            try:
-                os.unlink(temp_path)
-            except:
-                pass
-        
         return {"success": False, "error": f"Error transcribing audio: {str(e)}"}
@@ -0,0 +1,214 @@
+"""
+Memory-bounded access to uploaded files.
+
+Uploads arrive as in-memory file objects (Streamlit's UploadedFile), as file
+objects opened from disk, or as filesystem paths (e.g. audio extracted from a
+video). Calling `getvalue()` on an upload copies the whole file into a new bytes
+object, so the helpers in this module read uploads through streams, memory
+views and memory maps instead, and spool data to disk in fixed-size chunks
+when a parser needs a real file path. Data without a backing buffer or path is
+spooled to a temporary file that only stays in memory below a size threshold.
+"""
+
+import io
+import os
+import mmap
+import shutil
+import hashlib
+import logging
+import tempfile
+from contextlib import contextmanager
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Size of the chunks used when copying uploads, bounding the extra memory per copy
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Spooled data larger than this is moved from memory to a temporary file on disk
+SPOOL_THRESHOLD = int(os.environ.get("UPLOAD_SPOOL_THRESHOLD_MB", "16")) * 1024 * 1024
+
+def is_path(upload):
+    """Return True if the upload is a filesystem path rather than a file object."""
+    return isinstance(upload, (str, os.PathLike))
+
+def upload_name(upload):
+    """Return the file name of an upload (path or file object)."""
+    if is_path(upload):
+        return os.path.basename(os.fspath(upload))
+    return getattr(upload, "name", "")
+
+def upload_size(upload):
+    """
+    Return the size of an upload in bytes without reading it.
+
+    Args:
+        upload: A filesystem path or a seekable file object
+
+    Returns:
+        int: The size in bytes
+    """
+    if is_path(upload):
+        return os.path.getsize(upload)
+    if isinstance(getattr(upload, "size", None), int):
+        return upload.size
+    position = upload.tell()
+    size = upload.seek(0, io.SEEK_END)
+    upload.seek(position)
+    return size
+
+def iter_chunks(upload, chunk_size=COPY_CHUNK_SIZE):
+    """
+    Stream an upload in fixed-size chunks.
+
+    Args:
+        upload: A filesystem path or a file object
+        chunk_size (int): Maximum size of each chunk
+
+    Yields:
+        bytes: Consecutive chunks of the upload
+    """
+    with open_upload(upload) as stream:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+def upload_digest(upload):
+    """
+    Return the SHA-256 hex digest of an upload's contents, read in chunks.
+
+    Seekable file objects are rewound afterwards, so they can be parsed next.
+
+    Args:
+        upload: A filesystem path or a file object
+
+    Returns:
+        str: The hex digest, identical for identical uploads
+    """
+    digest = hashlib.sha256()
+    for chunk in iter_chunks(upload):
+        digest.update(chunk)
+    if not is_path(upload) and hasattr(upload, "seek") and (not hasattr(upload, "seekable") or upload.seekable()):
+        upload.seek(0)
+    return digest.hexdigest()
+
+def spool_stream(stream, threshold=None):
+    """
+    Copy a readable stream into a spooled temporary file.
+
+    The copy stays in memory while it is smaller than the threshold and is
+    moved to disk once it grows past it.
+
+    Args:
+        stream: A readable binary stream (e.g. a ZIP member)
+        threshold (int): Spool threshold in bytes (defaults to SPOOL_THRESHOLD)
+
+    Returns:
+        SpooledTemporaryFile: The spooled copy, rewound to the start
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_THRESHOLD if threshold is None else threshold)
+    shutil.copyfileobj(stream, spooled, COPY_CHUNK_SIZE)
+    spooled.seek(0)
+    return spooled
+
+@contextmanager
+def open_upload(upload):
+    """
+    Open an upload as a seekable binary stream for parsers that accept file objects.
+
+    Seekable file objects are rewound and used directly, paths are opened from
+    disk, and anything else is spooled so no full in-memory copy is made.
+
+    Args:
+        upload: A filesystem path or a file object
+
+    Yields:
+        A readable, seekable binary stream positioned at the start
+    """
+    if is_path(upload):
+        with open(upload, 'rb') as stream:
+            yield stream
+    elif hasattr(upload, "seek") and (not hasattr(upload, "seekable") or upload.seekable()):
+        upload.seek(0)
+        yield upload
+    else:
+        with spool_stream(upload) as stream:
+            yield stream
+
+@contextmanager
+def upload_path(upload, suffix=""):
+    """
+    Provide a filesystem path for an upload, for tools that only accept paths.
+
+    Paths are used as-is; file objects are copied to a temporary file in
+    chunks, and the temporary file is removed when the context exits.
+
+    Args:
+        upload: A filesystem path or a file object
+        suffix (str): Suffix for the temporary file (e.g. '.mp4')
+
+    Yields:
+        str: Path to a file containing the upload
+    """
+    if is_path(upload):
+        yield os.fspath(upload)
+        return
+
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_file:
+        with open_upload(upload) as stream:
+            shutil.copyfileobj(stream, temp_file, COPY_CHUNK_SIZE)
+        temp_path = temp_file.name
+
+    try:
+        yield temp_path
+    finally:
+        remove_temporary_file(temp_path)
+
+def read_text(upload, encoding='utf-8', errors='strict'):
+    """
+    Decode an upload as text without an intermediate copy of its bytes.
+
+    In-memory uploads are decoded straight from their buffer, files on disk
+    through a memory map, and other streams through an incremental decoder.
+
+    Args:
+        upload: A filesystem path or a file object
+        encoding (str): Text encoding
+        errors (str): Error handling scheme passed to the decoder
+
+    Returns:
+        str: The decoded text
+    """
+    if hasattr(upload, "getbuffer"):
+        with upload.getbuffer() as buffer:
+            return str(buffer, encoding, errors)
+
+    if is_path(upload) or hasattr(upload, "fileno"):
+        with open_upload(upload) as stream:
+            try:
+                if upload_size(stream) == 0:
+                    return ""
+                with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return str(mapped, encoding, errors)
+            except (OSError, ValueError, io.UnsupportedOperation):
+                # Not backed by a real file descriptor; fall back to streaming
+                stream.seek(0)
+
+    with open_upload(upload) as stream:
+        wrapper = io.TextIOWrapper(stream, encoding=encoding, errors=errors)
+        try:
+            return wrapper.read()
+        finally:
+            # Detach so closing the wrapper does not close the caller's upload
+            wrapper.detach()
+
+def remove_temporary_file(path):
+    """Delete a temporary file, ignoring files that are already gone."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not remove temporary file {path}: {str(e)}")
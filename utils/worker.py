@@ -0,0 +1,59 @@
+"""
+Standalone worker tier for study-kit jobs.
+
+Runs a job worker pool in its own process, so generation scales on CPU and
+I/O independently of the Streamlit UI, which then only submits jobs and polls
+them (set JOBS_EMBEDDED_WORKERS=0 on the app). The heavy models (Whisper) are
+loaded only in worker processes. Workers and UI must share the queue: the same
+SQLite database on one machine or a shared volume, or, across hosts, a Redis
+server (JOBS_BACKEND=redis, REDIS_URL).
+
+Stopping the worker (Ctrl-C or SIGTERM) stops it claiming jobs and waits for
+the running ones; jobs still running after the grace period are run again by
+another worker once their heartbeat goes stale.
+
+Usage:
+    python -m utils.worker [--workers 4] [--grace 60]
+"""
+
+import signal
+import logging
+import argparse
+import threading
+from .jobs import WorkerPool, JOB_WORKERS, JOB_QUEUE
+from .resources import get_resource
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Seconds a stopping worker waits for its running jobs by default
+DEFAULT_GRACE_SECONDS = 60
+
+def run_worker(workers=JOB_WORKERS, grace=DEFAULT_GRACE_SECONDS):
+    """
+    Run job workers until the process is interrupted or terminated.
+
+    Args:
+        workers (int): Number of jobs run at once
+        grace (float): Seconds to wait for running jobs when stopping
+    """
+    stop = threading.Event()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signal_number, lambda *_: stop.set())
+
+    # Fail fast if the queue cannot be opened
+    get_resource(JOB_QUEUE)
+    pool = WorkerPool(workers)
+    stop.wait()
+    logger.info(f"Stopping job workers, waiting up to {grace} s for running jobs")
+    pool.stop(timeout=grace)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run workers that generate queued study kits.")
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS, help="Number of jobs run at once")
+    parser.add_argument("--grace", type=float, default=DEFAULT_GRACE_SECONDS,
+                        help="Seconds to wait for running jobs when stopping")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    run_worker(args.workers, args.grace)